@@ -1,58 +1,44 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from app.core.database import get_db
-from app.models.violation import Violation
-from app.models.rule import Rule
+from app.core.database import get_read_db, run_read
+from app.services.analytics_cache import cached_response
+from app.services.rollup_service import summary_totals, distinct_rule_count, top_tables
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("")
-def get_dashboard(
+async def get_dashboard(
+    request: Request,
     scan_id: int | None = Query(default=None),
-    db: Session = Depends(get_db)
+    db=Depends(get_read_db)
 ):
 
-    base_query = db.query(Violation)
+    return await run_read(
+        db,
+        lambda session: cached_response(
+            request, session, "dashboard", {"scan_id": scan_id},
+            lambda: build_dashboard(session, scan_id)
+        )
+    )
 
-    if scan_id is not None:
-        base_query = base_query.filter(Violation.scan_id == scan_id)
 
-    # ───────────── Basic Metrics ─────────────
-    total_violations = base_query.count()
+def build_dashboard(db: Session, scan_id: int | None) -> dict:
 
-    total_risk = base_query.with_entities(
-        func.coalesce(func.sum(Violation.risk_value), 0)
-    ).scalar()
+    # ───────────── Basic Metrics (from scan rollups) ─────────────
+    totals = summary_totals(db, scan_id)
+
+    total_violations = totals["total_violations"]
+    total_risk = totals["total_risk"]
 
     avg_risk = total_risk / total_violations if total_violations else 0
 
     # Count distinct rules involved in this scan
-    total_rules = base_query.with_entities(
-        func.count(func.distinct(Violation.rule_id))
-    ).scalar() or 0
+    total_rules = distinct_rule_count(db, scan_id)
 
     # ───────────── Top Risky Table ─────────────
-    top_table_query = (
-        base_query
-        .with_entities(
-            Violation.table_name,
-            func.sum(Violation.risk_value).label("table_risk")
-        )
-        .group_by(Violation.table_name)
-        .order_by(desc("table_risk"))
-        .first()
-    )
-
-    top_table = (
-        {
-            "table_name": top_table_query[0],
-            "total_risk": top_table_query[1]
-        }
-        if top_table_query
-        else None
-    )
+    top = top_tables(db, scan_id, limit=1)
+    top_table = top[0] if top else None
 
     # ───────────── System Health Logic ─────────────
     if avg_risk >= 8:
@@ -71,4 +57,4 @@ def get_dashboard(
         "average_risk": round(avg_risk, 2),
         "system_status": status,
         "top_risky_table": top_table
-    }
\ No newline at end of file
+    }
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_read_db, run_read
 from app.models.scan_history import ScanHistory
 from app.schemas.scan_schema import ScanHistoryResponse
 
@@ -10,13 +10,14 @@ router = APIRouter(prefix="/history", tags=["History"])
 
 
 @router.get("", response_model=List[ScanHistoryResponse])
-def list_scans(db: Session = Depends(get_db)):
+async def list_scans(db=Depends(get_read_db)):
+    return await run_read(db, recent_scans)
 
-    scans = (
+
+def recent_scans(db: Session) -> List[ScanHistory]:
+    return (
         db.query(ScanHistory)
         .order_by(ScanHistory.scanned_at.desc())
         .limit(50)
         .all()
-    )
-
-    return scans
\ No newline at end of file
+    )
\ No newline at end of file
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app.core.database import engine, get_db
+from app.services.scan_metrics import render_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+# ─────────────────────────────────────────────
+# PROMETHEUS SCRAPE ENDPOINT
+# Scan series come from the app database, so any worker serves the
+# same values; pool series are labelled with the serving worker
+# ─────────────────────────────────────────────
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics(db: Session = Depends(get_db)):
+    return PlainTextResponse(
+        render_metrics(db, engine.pool),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
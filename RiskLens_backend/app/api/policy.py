@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List
+
+from app.core.database import get_db
+from app.models.policy import Policy
+from app.models.rule import Rule
+from app.schemas.policy_schema import PolicyResponse, PolicySummary
+from app.schemas.rule_schema import RuleResponse
+
+router = APIRouter(prefix="/policies", tags=["Policies"])
+
+
+@router.get("", response_model=List[PolicySummary])
+def list_policies(db: Session = Depends(get_db)):
+
+    rule_counts = (
+        db.query(Rule.policy_id, func.count(Rule.id).label("rule_count"))
+        .group_by(Rule.policy_id)
+        .subquery()
+    )
+
+    rows = (
+        db.query(
+            Policy.id,
+            Policy.file_name,
+            Policy.page_count,
+            Policy.extraction_seconds,
+            Policy.created_at,
+            func.coalesce(rule_counts.c.rule_count, 0).label("rule_count")
+        )
+        .outerjoin(rule_counts, rule_counts.c.policy_id == Policy.id)
+        .order_by(Policy.created_at.desc())
+        .limit(50)
+        .all()
+    )
+
+    return rows
+
+
+@router.get("/{policy_id}", response_model=PolicyResponse)
+def get_policy(policy_id: int, db: Session = Depends(get_db)):
+
+    policy = db.get(Policy, policy_id)
+
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+    return policy
+
+
+@router.get("/{policy_id}/rules", response_model=List[RuleResponse])
+def get_policy_rules(policy_id: int, db: Session = Depends(get_db)):
+
+    return (
+        db.query(Rule)
+        .filter(Rule.policy_id == policy_id)
+        .order_by(Rule.id)
+        .all()
+    )
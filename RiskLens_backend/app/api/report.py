@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Literal
 import os
-import uuid
+import time
 
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 
-from app.core.database import get_db
-from app.models.violation import Violation
+from app.core.config import REPORT_DIR
+from app.core.database import get_db, SessionLocal
+from app.models.report_job import ReportJob
+from app.services.analytics_cache import current_generation
+from app.services.report_service import generate_audit_report
+from app.services.report_store import (
+    WORKER_ID, artifact_path, create_job, enforce_store_limits,
+    find_reusable_job, job_heartbeat, job_payload, touch
+)
+from app.services.rollup_service import summary_totals, top_tables, top_rules
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
@@ -71,60 +80,20 @@ def generate_pdf_report(file_path: str, report_data: dict):
 
 
 # ─────────────────────────────────────────────
-# MAIN REPORT ENDPOINT
+# REPORT DATA (rollups only)
 # ─────────────────────────────────────────────
-@router.post("")
-def create_report(
-    scan_id: int | None = Query(default=None),
-    db: Session = Depends(get_db)
-):
-
-    base_query = db.query(Violation)
+def build_report_data(db: Session, scan_id: int | None) -> dict:
 
-    if scan_id:
-        base_query = base_query.filter(Violation.scan_id == scan_id)
+    # Aggregates come from the per-scan rollups, not the raw violations table
+    totals = summary_totals(db, scan_id)
 
-    total_violations = base_query.count()
-    total_risk = base_query.with_entities(func.sum(Violation.risk_value)).scalar() or 0
+    total_violations = totals["total_violations"]
+    total_risk = totals["total_risk"]
 
-    if total_violations == 0:
-        raise HTTPException(404, "No violations found for report generation")
+    avg_risk = total_risk / total_violations if total_violations else 0
 
-    avg_risk = total_risk / total_violations
-
-    top_tables_query = (
-        base_query
-        .with_entities(
-            Violation.table_name,
-            func.sum(Violation.risk_value).label("table_risk")
-        )
-        .group_by(Violation.table_name)
-        .order_by(desc("table_risk"))
-        .limit(5)
-        .all()
-    )
-
-    top_tables = [
-        {"table_name": table, "total_risk": risk}
-        for table, risk in top_tables_query
-    ]
-
-    top_rules_query = (
-        base_query
-        .with_entities(
-            Violation.rule_id,
-            func.sum(Violation.risk_value).label("rule_risk")
-        )
-        .group_by(Violation.rule_id)
-        .order_by(desc("rule_risk"))
-        .limit(5)
-        .all()
-    )
-
-    top_rules = [
-        {"rule_id": rule, "total_risk": risk}
-        for rule, risk in top_rules_query
-    ]
+    top_tables_list = top_tables(db, scan_id, limit=5)
+    top_rules_list = top_rules(db, scan_id, limit=5)
 
     if total_risk >= 200:
         status = "CRITICAL"
@@ -135,7 +104,7 @@ def create_report(
     else:
         status = "LOW"
 
-    report_data = {
+    return {
         "generated_at": datetime.utcnow(),
         "scan_id": scan_id,
         "overview": {
@@ -144,19 +113,147 @@ def create_report(
             "average_risk": round(avg_risk, 2),
             "status": status
         },
-        "top_tables": top_tables,
-        "top_rules": top_rules
+        "top_tables": top_tables_list,
+        "top_rules": top_rules_list
     }
 
-    os.makedirs("reports", exist_ok=True)
 
-    file_name = f"report_{uuid.uuid4().hex}.pdf"
-    file_path = os.path.join("reports", file_name)
+def render_summary_report(db: Session, scan_id: int | None, file_path: str) -> dict:
+    generate_pdf_report(file_path, build_report_data(db, scan_id))
+    return {}
+
+
+def render_audit_report(db: Session, scan_id: int | None, file_path: str) -> dict:
+    return generate_audit_report(db, file_path, scan_id)
+
+
+# Each renderer writes file_path and returns optional render stats
+REPORT_RENDERERS = {
+    "summary": render_summary_report,
+    "audit": render_audit_report,
+}
+
+
+# ─────────────────────────────────────────────
+# BACKGROUND JOB
+# ─────────────────────────────────────────────
+def run_report_job(job_id: str):
+    db = SessionLocal()
+
+    try:
+        job = db.get(ReportJob, job_id)
+        job.status = "RUNNING"
+        job.owner = WORKER_ID
+        job.heartbeat_at = datetime.utcnow()
+        db.commit()
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        file_path = artifact_path(job.id)
+
+        started = time.perf_counter()
+
+        with job_heartbeat(job.id):
+            stats = REPORT_RENDERERS[job.report_type](db, job.scan_id, file_path)
+
+        job.status = "COMPLETED"
+        job.file_path = file_path
+        job.file_size = os.path.getsize(file_path)
+        job.render_seconds = round(time.perf_counter() - started, 4)
+        job.process_peak_rss_bytes = stats.get("process_peak_rss_bytes")
+        job.completed_at = datetime.utcnow()
+        job.last_accessed_at = job.completed_at
+        db.commit()
+
+        enforce_store_limits(db)
+
+    except Exception as e:
+        db.rollback()
+
+        job = db.get(ReportJob, job_id)
+        if job is not None:
+            job.status = "FAILED"
+            job.error = str(e)
+            db.commit()
+
+        print("Report job failed:", e)
+
+    finally:
+        db.close()
 
-    generate_pdf_report(file_path, report_data)
+
+# ─────────────────────────────────────────────
+# MAIN REPORT ENDPOINT
+# ─────────────────────────────────────────────
+@router.post("")
+def create_report(
+    background_tasks: BackgroundTasks,
+    scan_id: int | None = Query(default=None),
+    report_type: Literal["summary", "audit"] = Query(default="summary"),
+    db: Session = Depends(get_db)
+):
+
+    if summary_totals(db, scan_id)["total_violations"] == 0:
+        raise HTTPException(404, "No violations found for report generation")
+
+    generation = current_generation(db)
+
+    job = find_reusable_job(db, scan_id, report_type, generation)
+
+    # Same scan, type and data generation: serve the stored artifact
+    if job is not None and job.status == "COMPLETED":
+        touch(db, job)
+        return FileResponse(
+            path=job.file_path,
+            filename="Compliance_Analysis_Report.pdf",
+            media_type="application/pdf",
+            headers={"X-Report-Job": job.id}
+        )
+
+    if job is None:
+        job, created = create_job(db, scan_id, report_type, generation)
+
+        if created:
+            background_tasks.add_task(run_report_job, job.id)
+
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(job_payload(job)),
+        headers={"Location": f"/reports/jobs/{job.id}"}
+    )
+
+
+@router.get("/jobs/{job_id}")
+def get_report_job(job_id: str, db: Session = Depends(get_db)):
+
+    job = db.get(ReportJob, job_id)
+
+    if not job:
+        raise HTTPException(404, "Report job not found")
+
+    return job_payload(job)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report(job_id: str, db: Session = Depends(get_db)):
+
+    job = db.get(ReportJob, job_id)
+
+    if not job:
+        raise HTTPException(404, "Report job not found")
+
+    if job.status in ("PENDING", "RUNNING"):
+        raise HTTPException(409, f"Report is {job.status.lower()}")
+
+    if job.status == "FAILED":
+        raise HTTPException(500, f"Report generation failed: {job.error}")
+
+    if job.status == "EVICTED" or not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(410, "Report artifact was evicted; request it again")
+
+    touch(db, job)
 
     return FileResponse(
-        path=file_path,
+        path=job.file_path,
         filename="Compliance_Analysis_Report.pdf",
         media_type="application/pdf"
-    )
\ No newline at end of file
+    )
@@ -1,23 +1,71 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from datetime import datetime, timedelta
+from typing import Literal
+import time
 
-from app.core.database import get_db
-from app.models.violation import Violation
+from app.core.database import get_read_db, run_read
+from app.services.analytics_cache import cached_response
+from app.services.rollup_service import risk_distribution, top_rules
+from app.services.trend_service import RETENTION_DAYS, bucket_start, query_trend
 
 router = APIRouter(prefix="/risk", tags=["Risk"])
 
 
+HIGH_RISK_THRESHOLD = 7
+
+
 @router.get("")
-def get_risk_analysis(db: Session = Depends(get_db)):
+async def get_risk_analysis(
+    request: Request,
+    scan_id: int | None = Query(default=None),
+    table_name: str | None = Query(default=None),
+    start: datetime | None = Query(default=None, description="Scans at or after (UTC)"),
+    end: datetime | None = Query(default=None, description="Scans before (UTC)"),
+    top_k: int = Query(default=5, ge=1, le=50),
+    db=Depends(get_read_db)
+):
+
+    params = {
+        "scan_id": scan_id,
+        "table_name": table_name,
+        "start": start,
+        "end": end,
+        "top_k": top_k
+    }
+
+    return await run_read(
+        db,
+        lambda session: cached_response(
+            request, session, "risk", params,
+            lambda: build_risk_analysis(session, **params)
+        )
+    )
+
+
+def build_risk_analysis(
+    db: Session,
+    scan_id: int | None,
+    table_name: str | None,
+    start: datetime | None,
+    end: datetime | None,
+    top_k: int
+) -> dict:
+
+    filters = {"table_name": table_name, "start": start, "end": end}
+    timings = {}
 
     # ─────────────────────────────────────
-    # BASIC AGGREGATES
+    # SINGLE PASS: one grouped query over risk_value
     # ─────────────────────────────────────
-    total_violations = db.query(func.count(Violation.id)).scalar() or 0
-    total_risk = db.query(func.sum(Violation.risk_value)).scalar() or 0
-    max_risk = db.query(func.max(Violation.risk_value)).scalar() or 0
-    min_risk = db.query(func.min(Violation.risk_value)).scalar() or 0
+    started = time.perf_counter()
+    distribution = risk_distribution(db, scan_id, **filters)
+    timings["risk_groups"] = round((time.perf_counter() - started) * 1000, 3)
+
+    total_violations = sum(d["count"] for d in distribution.values())
+    total_risk = sum(d["risk"] for d in distribution.values())
+    max_risk = max(distribution, default=0)
+    min_risk = min(distribution, default=0)
 
     avg_risk = (
         total_risk / total_violations
@@ -25,29 +73,16 @@ def get_risk_analysis(db: Session = Depends(get_db)):
         else 0
     )
 
-    # ─────────────────────────────────────
-    # RISK DISTRIBUTION (Value Frequency)
-    # ─────────────────────────────────────
-    distribution_query = (
-        db.query(Violation.risk_value, func.count(Violation.id))
-        .group_by(Violation.risk_value)
-        .all()
-    )
-
-    risk_distribution = {
-        str(risk): count for risk, count in distribution_query
+    risk_distribution_map = {
+        str(risk): d["count"] for risk, d in sorted(distribution.items())
     }
 
     # ─────────────────────────────────────
-    # HIGH RISK % (threshold configurable)
+    # HIGH RISK % (derived from the same pass)
     # ─────────────────────────────────────
-    HIGH_RISK_THRESHOLD = 7
-
-    high_risk_count = (
-        db.query(func.count(Violation.id))
-        .filter(Violation.risk_value >= HIGH_RISK_THRESHOLD)
-        .scalar()
-        or 0
+    high_risk_count = sum(
+        d["count"] for risk, d in distribution.items()
+        if risk >= HIGH_RISK_THRESHOLD
     )
 
     high_risk_percentage = (
@@ -57,26 +92,11 @@ def get_risk_analysis(db: Session = Depends(get_db)):
     )
 
     # ─────────────────────────────────────
-    # TOP 5 RISKY RULES
+    # TOP-K RISKY RULES
     # ─────────────────────────────────────
-    top_rules_query = (
-        db.query(
-            Violation.rule_id,
-            func.sum(Violation.risk_value).label("total_rule_risk")
-        )
-        .group_by(Violation.rule_id)
-        .order_by(desc("total_rule_risk"))
-        .limit(5)
-        .all()
-    )
-
-    top_risky_rules = [
-        {
-            "rule_id": rule_id,
-            "total_risk": total_rule_risk
-        }
-        for rule_id, total_rule_risk in top_rules_query
-    ]
+    started = time.perf_counter()
+    top_risky_rules = top_rules(db, scan_id, limit=top_k, **filters)
+    timings["top_rules"] = round((time.perf_counter() - started) * 1000, 3)
 
     # ─────────────────────────────────────
     # SYSTEM STATUS LOGIC
@@ -101,8 +121,67 @@ def get_risk_analysis(db: Session = Depends(get_db)):
             "max_risk": max_risk,
             "min_risk": min_risk
         },
-        "distribution": risk_distribution,
+        "distribution": risk_distribution_map,
         "high_risk_percentage": round(high_risk_percentage, 2),
         "top_risky_rules": top_risky_rules,
-        "system_status": status
-    }
\ No newline at end of file
+        "system_status": status,
+        "filters": {
+            "scan_id": scan_id,
+            "table_name": table_name,
+            "start": start,
+            "end": end
+        },
+        "query_timings_ms": timings
+    }
+
+
+# ─────────────────────────────────────────────
+# RISK TREND (bucketed rollups)
+# ─────────────────────────────────────────────
+@router.get("/trend")
+async def get_risk_trend(
+    request: Request,
+    granularity: Literal["hour", "day", "week"] = Query(default="day"),
+    group_by: Literal["table", "rule"] | None = Query(default=None),
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    table_name: str | None = Query(default=None),
+    rule_id: int | None = Query(default=None),
+    db=Depends(get_read_db)
+):
+
+    params = {
+        "granularity": granularity,
+        "group_by": group_by,
+        "start": start,
+        "end": end,
+        "table_name": table_name,
+        "rule_id": rule_id
+    }
+
+    return await run_read(
+        db,
+        lambda session: cached_response(
+            request, session, "risk_trend", params,
+            lambda: build_risk_trend(session, **params)
+        )
+    )
+
+
+def build_risk_trend(db: Session, granularity: str, **filters) -> dict:
+
+    retention_days = RETENTION_DAYS[granularity]
+
+    # Older buckets at this granularity were downsampled away
+    retained_from = (
+        bucket_start(datetime.utcnow() - timedelta(days=retention_days), granularity)
+        if retention_days is not None
+        else None
+    )
+
+    return {
+        "granularity": granularity,
+        "group_by": filters["group_by"],
+        "retained_from": retained_from,
+        "points": query_trend(db, granularity, **filters)
+    }
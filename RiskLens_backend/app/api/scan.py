@@ -1,33 +1,328 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy import create_engine, inspect, text
-import pandas as pd
-import tempfile
-import os
-from typing import Optional
-
-from app.core.database import get_db, create_dynamic_engine
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import ArgumentError
+from sqlalchemy.orm import Session
+import time
+from typing import Dict, List, Literal, Optional, Tuple
+
+from app.core.config import MAX_POLICY_UPLOAD_MB, MAX_DATASET_UPLOAD_MB
+from app.core.database import get_db, create_dynamic_engine, build_target_url
 from app.models.policy import Policy
 from app.models.rule import Rule
-from app.models.violation import Violation
 from app.models.scan_history import ScanHistory
+from app.models.targetdb import TargetDatabase
 from app.services.ai_rule_engine import extract_rules_with_ai
-from app.services.pdf_service import extract_text_from_pdf
+from app.services.checkpoint_service import (
+    checkpoint_progress,
+    claim_for_resume,
+    create_checkpoints,
+    finish_checkpointed_scan,
+    mark_interrupted,
+    plan_shards,
+    request_cancel,
+    resume_scan,
+    run_checkpoints,
+)
+from app.services.diff_service import diff_records, diff_summary, find_predecessor
+from app.services.pdf_service import extract_pdf
+from app.services.remediation_ai import remediate_scan
+from app.services.scan_engine import (
+    DATASET_READERS,
+    build_dataset_engine,
+    compile_rules,
+    introspect_schema,
+    is_compact_scan,
+)
+from app.services.scan_metrics import ScanTimer
+from app.services.upload_service import spool_upload
 
 router = APIRouter(prefix="/scan", tags=["Scan"])
 
 
 # ─────────────────────────────────────────────
-# Severity → Numeric Risk Mapping
+# Helper: Reuse Text of an Already Uploaded Policy
 # ─────────────────────────────────────────────
-def severity_to_risk(severity: str) -> int:
-    mapping = {
-        "Low": 1,
-        "Medium": 3,
-        "High": 5,
-        "Critical": 8
+def _reuse_extraction(db: Session, content_hash: str) -> Optional[dict]:
+    existing = (
+        db.query(Policy.extracted_text, Policy.page_count)
+        .filter(
+            Policy.content_hash == content_hash,
+            Policy.extracted_text.isnot(None)
+        )
+        .order_by(Policy.id.desc())
+        .first()
+    )
+
+    # End the read so the scan can open its own transaction
+    db.rollback()
+
+    if existing is None:
+        return None
+
+    return {
+        "text": existing.extracted_text,
+        "page_count": existing.page_count,
+        "pages_from_cache": existing.page_count,
+        "content_hash": content_hash,
+        "extraction_seconds": 0.0,
     }
-    return mapping.get(severity, 3)
+
+
+def _target_url(db: Session, target_id: int):
+    target = db.get(TargetDatabase, target_id)
+
+    try:
+        return build_target_url(target) if target else None
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    finally:
+        # End the read so the scan can open its own transaction
+        db.rollback()
+
+
+# ─────────────────────────────────────────────
+# Helper: Open the Data Source for a Scan
+# ─────────────────────────────────────────────
+async def _open_data_source(
+    db: Session,
+    db_uri: Optional[str],
+    data_file: Optional[UploadFile],
+    timer: ScanTimer,
+    target_id: Optional[int] = None
+) -> dict:
+    """
+    Returns the target engine plus the ScanHistory fields describing it.
+    The caller disposes the engine and removes the spooled upload.
+    """
+
+    if target_id is not None:
+        url = await run_in_threadpool(_target_url, db, target_id)
+
+        if url is None:
+            raise HTTPException(404, "Target database not found")
+
+        return {
+            "engine": create_dynamic_engine(url),
+            "upload": None,
+            "scan_mode": "database",
+            "input_format": "sql",
+            "file_name": None,
+            "source_hash": None,
+            "target_db_id": target_id,
+        }
+
+    if db_uri:
+        try:
+            engine = create_dynamic_engine(db_uri)
+        except ArgumentError as e:
+            raise HTTPException(400, f"Invalid db_uri: {e}")
+
+        return {
+            "engine": engine,
+            "upload": None,
+            "scan_mode": "database",
+            "input_format": "sql",
+            "file_name": None,
+            "source_hash": None,
+            "target_db_id": None,
+        }
+
+    with timer.phase("upload"):
+        upload = await spool_upload(
+            data_file,
+            MAX_DATASET_UPLOAD_MB * 1024 * 1024,
+            allowed_suffixes=DATASET_READERS.keys()
+        )
+
+    try:
+        with timer.phase("dataset_load"):
+            engine = await run_in_threadpool(build_dataset_engine, upload.path, upload.suffix)
+    except BaseException:
+        upload.remove()
+        raise
+
+    return {
+        "engine": engine,
+        "upload": upload,
+        "scan_mode": "file",
+        "input_format": upload.suffix.lstrip("."),
+        "file_name": upload.filename,
+        "source_hash": upload.sha256,
+        "target_db_id": None,
+    }
+
+
+def _close_data_source(source: Optional[dict]):
+    if not source:
+        return
+
+    source["engine"].dispose()
+
+    if source["upload"]:
+        source["upload"].remove()
+
+
+def _new_scan_record(source: dict, policy_id: int) -> ScanHistory:
+    return ScanHistory(
+        policy_id=policy_id,
+        target_db_id=source["target_db_id"],
+        scan_mode=source["scan_mode"],
+        input_format=source["input_format"],
+        file_name=source["file_name"],
+        source_hash=source["source_hash"],
+        total_rules=0,
+        total_violations=0,
+        status="PROCESSING"
+    )
+
+
+def _finish_scan(db: Session, scan_id: int, outcome: str, elapsed: float, timer: ScanTimer) -> dict:
+    # Read the fields here: after the commit they'd lazy-load on the event loop
+    scan = finish_checkpointed_scan(db, scan_id, outcome, elapsed, timer=timer)
+
+    return {
+        "id": scan.id,
+        "status": scan.status,
+        "total_violations": scan.total_violations,
+        "duration_seconds": scan.duration_seconds,
+        "phase_timings": scan.phase_timings,
+    }
+
+
+async def _run_scan(
+    db: Session,
+    scan_id: int,
+    engine,
+    compiled,
+    started: float,
+    timer: ScanTimer
+) -> dict:
+    """
+    Run the planned checkpoints, then roll the scan up. An error leaves
+    the committed shards in place: INTERRUPTED (resumable) for a
+    registered target, FAILED otherwise.
+
+    Everything touching a database runs in the threadpool: the rollup
+    aggregates all of the scan's violations.
+    """
+
+    try:
+        outcome = await run_in_threadpool(run_checkpoints, scan_id, engine, compiled, 1, timer)
+    except Exception:
+        await run_in_threadpool(
+            mark_interrupted, db, scan_id, round(time.perf_counter() - started, 4), timer=timer
+        )
+        raise
+
+    return await run_in_threadpool(
+        _finish_scan, db, scan_id, outcome, round(time.perf_counter() - started, 4), timer
+    )
+
+
+def _save_policy_and_plan(
+    db: Session,
+    file_name: str,
+    extraction: dict,
+    ai_rules: List[dict],
+    source: dict,
+    schema: Dict[str, List[str]],
+    timer: ScanTimer
+) -> Tuple[int, int, list, int]:
+    """
+    Policy, rules, scan record and checkpoints in one short transaction.
+    Returns (policy_id, scan_id, compiled rules, rule count).
+    """
+
+    target_engine = source["engine"]
+
+    with db.begin():
+
+        # Save policy
+        policy = Policy(
+            file_name=file_name,
+            extracted_text=extraction["text"],
+            content_hash=extraction["content_hash"],
+            page_count=extraction["page_count"],
+            pages_from_cache=extraction["pages_from_cache"],
+            extraction_seconds=extraction["extraction_seconds"]
+        )
+        db.add(policy)
+        db.flush()
+
+        # Create scan history
+        scan_record = _new_scan_record(source, policy.id)
+        db.add(scan_record)
+        db.flush()
+
+        rules = []
+
+        for r in ai_rules:
+            rule = Rule(
+                policy_id=policy.id,
+                table_name=r["table_name"],
+                condition_json={
+                    "field": r["field"],
+                    "operator": r["operator"],
+                    "value": r["value"]
+                },
+                description=f"{r['field']} {r['operator']} {r['value']}",
+                severity=r.get("severity", "Medium")
+            )
+            db.add(rule)
+            rules.append(rule)
+
+        db.flush()
+
+        compiled = compile_rules(rules, schema, target_engine)
+
+        with timer.phase("shard_planning"):
+            plan = plan_shards(target_engine, schema, compiled)
+
+        create_checkpoints(db, scan_record, plan)
+        scan_record.total_rules = len(rules)
+
+        policy_id, scan_id = policy.id, scan_record.id
+
+    # Reload the expired rules once, then detach them: shard threads read
+    # them concurrently and must not lazy-load through this session
+    for rule in rules:
+        db.refresh(rule)
+
+    db.expunge_all()
+    db.rollback()
+
+    return policy_id, scan_id, compiled, len(rules)
+
+
+def _plan_scan(db: Session, source: dict, policy_id: int, compiled: list, plan: List[dict]) -> int:
+    with db.begin():
+
+        scan_record = _new_scan_record(source, policy_id)
+        scan_record.total_rules = len(compiled)
+        db.add(scan_record)
+        db.flush()
+
+        create_checkpoints(db, scan_record, plan)
+
+        return scan_record.id
+
+
+def _load_rules(db: Session, policy_id: int) -> List[Rule]:
+    rules = db.query(Rule).filter(Rule.policy_id == policy_id).all()
+
+    if not rules:
+        exists = db.query(Policy.id).filter(Policy.id == policy_id).first()
+        raise HTTPException(
+            422 if exists else 404,
+            "Policy has no extracted rules" if exists else "Policy not found"
+        )
+
+    # Detach the rules from the read transaction; they're only read from here on
+    db.expunge_all()
+    db.rollback()
+
+    return rules
 
 
 # ─────────────────────────────────────────────
@@ -44,173 +339,304 @@ async def scan(
     if not db_uri and not data_file:
         raise HTTPException(400, "Provide either db_uri or dataset file")
 
-    policy_path = None
-    dataset_path = None
-    target_engine = None
+    policy_upload = None
+    source = None
+    timer = ScanTimer()
 
     try:
+        started = time.perf_counter()
+
         # ───────────── POLICY EXTRACTION ─────────────
-        content = await policy_file.read()
+        with timer.phase("upload"):
+            policy_upload = await spool_upload(policy_file, MAX_POLICY_UPLOAD_MB * 1024 * 1024)
+
+        extraction = await run_in_threadpool(_reuse_extraction, db, policy_upload.sha256)
+
+        if extraction is None:
+            if policy_upload.suffix == ".pdf":
+                # Off the event loop: large PDFs fan out to a process pool
+                with timer.phase("pdf_extraction"):
+                    extraction = await run_in_threadpool(
+                        extract_pdf, policy_upload.path, policy_upload.sha256
+                    )
+            else:
+                extraction_started = time.perf_counter()
+                extraction = {
+                    "text": await run_in_threadpool(policy_upload.read_text),
+                    "page_count": None,
+                    "pages_from_cache": None,
+                    "content_hash": policy_upload.sha256,
+                    "extraction_seconds": round(time.perf_counter() - extraction_started, 4),
+                }
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(content)
-            policy_path = tmp.name
-
-        if policy_file.filename.lower().endswith(".pdf"):
-            extracted_text = extract_text_from_pdf(policy_path)
-        else:
-            extracted_text = content.decode("utf-8", errors="ignore")
+        extracted_text = extraction["text"]
 
         if not extracted_text.strip():
             raise HTTPException(400, "Policy contains no readable text")
 
         # ───────────── DATA SOURCE ─────────────
-        if db_uri:
-            target_engine = create_dynamic_engine(db_uri)
-            scan_mode = "database"
-        else:
-            dataset_content = await data_file.read()
+        source = await _open_data_source(db, db_uri, data_file, timer)
+        target_engine = source["engine"]
 
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                tmp.write(dataset_content)
-                dataset_path = tmp.name
+        with timer.phase("schema_introspection"):
+            schema = await run_in_threadpool(introspect_schema, target_engine)
 
-            filename_lower = data_file.filename.lower()
+        if not schema:
+            raise HTTPException(400, "No tables found in data source")
 
-            if filename_lower.endswith(".csv"):
-                df = pd.read_csv(dataset_path)
-            elif filename_lower.endswith((".xlsx", ".xls")):
-                df = pd.read_excel(dataset_path)
-            elif filename_lower.endswith(".json"):
-                df = pd.read_json(dataset_path)
-            else:
-                raise HTTPException(400, "Supported formats: CSV, XLSX, JSON")
+        # Extract AI rules (before anything is written, so a failure leaves no trace)
+        with timer.phase("llm_extraction"):
+            ai_rules = await run_in_threadpool(extract_rules_with_ai, extracted_text, schema)
+
+        if not ai_rules:
+            raise HTTPException(422, "AI could not extract rules")
 
-            target_engine = create_engine("sqlite:///:memory:")
-            df.to_sql("temp_table", target_engine, if_exists="replace", index=False)
+        # ───────────── POLICY, RULES, SCAN PLAN (one short transaction) ─────────────
+        policy_id, scan_id, compiled, rule_count = await run_in_threadpool(
+            _save_policy_and_plan,
+            db, policy_file.filename, extraction, ai_rules, source, schema, timer
+        )
 
-            scan_mode = "file"
+        # ───────────── COMPLIANCE SCAN (committed per shard) ─────────────
+        scan_record = await _run_scan(db, scan_id, target_engine, compiled, started, timer)
 
-        inspector = inspect(target_engine)
-        schema = {
-            table: [col["name"] for col in inspector.get_columns(table)]
-            for table in inspector.get_table_names()
+        return {
+            "status": "success" if scan_record["status"] != "CANCELLED" else "cancelled",
+            "scan_id": scan_record["id"],
+            "policy_id": policy_id,
+            "policy_pages": extraction["page_count"],
+            "policy_extraction_seconds": extraction["extraction_seconds"],
+            "total_rules": rule_count,
+            "violations_found": scan_record["total_violations"],
+            "scan_mode": source["scan_mode"],
+            "duration_seconds": scan_record["duration_seconds"],
+            "phase_timings": scan_record["phase_timings"]
         }
 
-        if not schema:
-            raise HTTPException(400, "No tables found in data source")
+    except HTTPException:
+        raise
 
-        # ───────────── MAIN TRANSACTION ─────────────
-        with db.begin():
+    except Exception as e:
+        raise HTTPException(500, f"Scan failed: {str(e)}")
 
-            # Save policy
-            policy = Policy(
-                file_name=policy_file.filename,
-                extracted_text=extracted_text
-            )
-            db.add(policy)
-            db.flush()
-
-            # Create scan history
-            scan_record = ScanHistory(
-                scan_mode=scan_mode,
-                total_rules=0,
-                total_violations=0,
-                status="PROCESSING"
-            )
-            db.add(scan_record)
-            db.flush()
-
-            # Extract AI rules
-            ai_rules = extract_rules_with_ai(extracted_text, schema)
-
-            if not ai_rules:
-                raise HTTPException(422, "AI could not extract rules")
-
-            rules = []
-
-            for r in ai_rules:
-                rule = Rule(
-                    policy_id=policy.id,
-                    table_name=r["table_name"],
-                    condition_json={
-                        "field": r["field"],
-                        "operator": r["operator"],
-                        "value": r["value"]
-                    },
-                    description=f"{r['field']} {r['operator']} {r['value']}",
-                    severity=r.get("severity", "Medium")
-                )
-                db.add(rule)
-                rules.append(rule)
-
-            db.flush()
-
-            # Run compliance scan
-            TargetSession = sessionmaker(bind=target_engine)
-            target_db = TargetSession()
-
-            violations = []
-
-            try:
-                for rule in rules:
-
-                    field = rule.condition_json.get("field")
-                    operator = rule.condition_json.get("operator")
-                    value = rule.condition_json.get("value")
-
-                    query = text(f"""
-                        SELECT * FROM {rule.table_name}
-                        WHERE NOT ({field} {operator} :value)
-                    """)
-
-                    result = target_db.execute(query, {"value": value})
-                    rows = result.fetchall()
-
-                    for row in rows:
-                        violations.append(
-                            Violation(
-                                rule_id=rule.id,
-                                scan_id=scan_record.id,
-                                table_name=rule.table_name,
-                                record_id=row[0],
-                                field_name=field,
-                                actual_value=str(row[0]),
-                                expected_condition=f"{operator} {value}",
-                                explanation="Rule condition violated",
-                                risk_value=severity_to_risk(rule.severity)
-                            )
-                        )
-
-            finally:
-                target_db.close()
-
-            for v in violations:
-                db.add(v)
-
-            # Update scan summary
-            scan_record.total_rules = len(rules)
-            scan_record.total_violations = len(violations)
-            scan_record.status = "SUCCESS" if violations else "NO_VIOLATIONS"
+    finally:
+        _close_data_source(source)
+
+        if policy_upload:
+            policy_upload.remove()
+
+
+# ─────────────────────────────────────────────
+# SCAN WITH A STORED POLICY
+# No upload, no PDF parse, no LLM call: only rule evaluation
+# ─────────────────────────────────────────────
+@router.post("/policy/{policy_id}")
+async def scan_with_policy(
+    policy_id: int,
+    db_uri: Optional[str] = None,
+    target_id: Optional[int] = None,
+    data_file: Optional[UploadFile] = File(None),
+    db: Session = Depends(get_db),
+):
+
+    if not db_uri and not data_file and target_id is None:
+        raise HTTPException(400, "Provide db_uri, target_id or dataset file")
+
+    rules = await run_in_threadpool(_load_rules, db, policy_id)
+
+    source = None
+    timer = ScanTimer()
+
+    try:
+        started = time.perf_counter()
+
+        source = await _open_data_source(db, db_uri, data_file, timer, target_id)
+        target_engine = source["engine"]
+
+        with timer.phase("schema_introspection"):
+            schema = await run_in_threadpool(introspect_schema, target_engine)
+
+        compiled = compile_rules(rules, schema, target_engine)
+
+        if not compiled:
+            raise HTTPException(422, "None of the policy's rules apply to this data source")
+
+        with timer.phase("shard_planning"):
+            plan = await run_in_threadpool(plan_shards, target_engine, schema, compiled)
+
+        scan_id = await run_in_threadpool(_plan_scan, db, source, policy_id, compiled, plan)
+
+        scan_record = await _run_scan(db, scan_id, target_engine, compiled, started, timer)
 
         return {
-            "status": "success",
-            "scan_id": scan_record.id,
-            "total_rules": len(rules),
-            "violations_found": len(violations),
-            "scan_mode": scan_mode
+            "status": "success" if scan_record["status"] != "CANCELLED" else "cancelled",
+            "scan_id": scan_record["id"],
+            "policy_id": policy_id,
+            "total_rules": len(compiled),
+            "rules_skipped": len(rules) - len(compiled),
+            "violations_found": scan_record["total_violations"],
+            "scan_mode": source["scan_mode"],
+            "duration_seconds": scan_record["duration_seconds"],
+            "phase_timings": scan_record["phase_timings"]
         }
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         raise HTTPException(500, f"Scan failed: {str(e)}")
 
     finally:
-        if target_engine:
-            target_engine.dispose()
-
-        for path in [policy_path, dataset_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.remove(path)
-                except:
-                    pass
\ No newline at end of file
+        _close_data_source(source)
+
+
+# ─────────────────────────────────────────────
+# CHECKPOINTS: progress, cancel, resume
+# ─────────────────────────────────────────────
+def _get_scan(db: Session, scan_id: int) -> ScanHistory:
+    scan = db.get(ScanHistory, scan_id)
+
+    if scan is None:
+        raise HTTPException(404, "Scan not found")
+
+    return scan
+
+
+@router.get("/{scan_id}/checkpoints")
+def get_checkpoints(scan_id: int, db: Session = Depends(get_db)):
+
+    scan = _get_scan(db, scan_id)
+
+    return {
+        "scan_id": scan_id,
+        "status": scan.status,
+        "shards_total": scan.shards_total,
+        "shards_done": scan.shards_done,
+        "last_checkpoint_at": scan.last_checkpoint_at,
+        "stalled": scan.stalled,
+        "resumable": scan.resumable,
+        "rules": checkpoint_progress(db, scan_id),
+    }
+
+
+@router.post("/{scan_id}/cancel")
+def cancel_scan(scan_id: int, db: Session = Depends(get_db)):
+
+    scan = _get_scan(db, scan_id)
+
+    if scan.status != "PROCESSING" or scan.shards_total is None:
+        raise HTTPException(409, f"Scan is {scan.status}, not a running checkpointed scan")
+
+    return {"scan_id": scan_id, "status": request_cancel(db, scan)}
+
+
+@router.post("/{scan_id}/resume", status_code=202)
+def resume(scan_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+
+    scan = _get_scan(db, scan_id)
+
+    if not scan.resumable:
+        if scan.shards_total is not None and scan.target_db_id is None:
+            detail = "Only scans of registered targets can resume; the uploaded file or db_uri wasn't kept"
+        else:
+            detail = f"Scan is {scan.status} with {scan.shards_done}/{scan.shards_total} shards done; nothing to resume"
+
+        raise HTTPException(409, detail)
+
+    if not claim_for_resume(db, scan_id):
+        raise HTTPException(409, "Scan was resumed by another request")
+
+    background_tasks.add_task(resume_scan, scan_id)
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "scan_id": scan_id,
+            "status": "PROCESSING",
+            "shards_done": scan.shards_done,
+            "shards_total": scan.shards_total,
+        }
+    )
+
+
+# ─────────────────────────────────────────────
+# REMEDIATION (deduplicated, batched, cached)
+# ─────────────────────────────────────────────
+@router.post("/{scan_id}/remediation")
+def remediate(scan_id: int, db: Session = Depends(get_db)):
+
+    if db.get(ScanHistory, scan_id) is None:
+        raise HTTPException(404, "Scan not found")
+
+    # Remediation text is stored per violation row
+    if is_compact_scan(db, scan_id):
+        raise HTTPException(409, "Scan uses compact storage; remediation needs row-stored violations")
+
+    stats = remediate_scan(db, scan_id)
+
+    return {
+        "scan_id": scan_id,
+        **stats
+    }
+
+
+
+# ─────────────────────────────────────────────
+# SCAN DIFF (new / resolved / persisting)
+# ─────────────────────────────────────────────
+def _resolve_base(db: Session, scan_id: int, base_scan_id: Optional[int]) -> int:
+    scan = db.get(ScanHistory, scan_id)
+
+    if scan is None:
+        raise HTTPException(404, "Scan not found")
+
+    if base_scan_id is None:
+        base_scan_id = find_predecessor(db, scan)
+
+        if base_scan_id is None:
+            raise HTTPException(404, "No earlier scan of the same target or policy to compare with")
+
+    elif db.get(ScanHistory, base_scan_id) is None:
+        raise HTTPException(404, "Base scan not found")
+
+    return base_scan_id
+
+
+@router.get("/{scan_id}/diff")
+def get_scan_diff(
+    scan_id: int,
+    base_scan_id: int | None = Query(default=None, description="Defaults to the previous scan of the same target/policy"),
+    refresh: bool = Query(default=False),
+    db: Session = Depends(get_db)
+):
+    base_scan_id = _resolve_base(db, scan_id, base_scan_id)
+    return diff_summary(db, base_scan_id, scan_id, refresh=refresh)
+
+
+@router.get("/{scan_id}/diff/records")
+def get_scan_diff_records(
+    scan_id: int,
+    kind: Literal["new", "resolved", "persisting"] = Query(...),
+    rule_id: int = Query(...),
+    table_name: str = Query(...),
+    base_scan_id: int | None = Query(default=None),
+    after_record_id: int | None = Query(default=None),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    base_scan_id = _resolve_base(db, scan_id, base_scan_id)
+
+    record_ids = diff_records(
+        db, base_scan_id, scan_id, kind, rule_id, table_name,
+        after_record_id=after_record_id, limit=limit
+    )
+
+    return {
+        "base_scan_id": base_scan_id,
+        "scan_id": scan_id,
+        "kind": kind,
+        "rule_id": rule_id,
+        "table_name": table_name,
+        "record_ids": record_ids,
+        "next_after_record_id": record_ids[-1] if len(record_ids) == limit else None
+    }
@@ -1,9 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, engine, async_engine, POOL_SETTINGS
+from app.core.db_pool import pool_status
 from app.models.system_config import SystemConfig
-from app.schemas.system import SystemConfigResponse, SystemConfigUpdate
+from app.models.violation_archive import ViolationArchive
+from app.schemas.system import SystemConfigResponse, SystemConfigUpdate, ViolationArchiveResponse
+from app.services.request_profiler import (
+    delete_profile,
+    get_profile,
+    list_profiles,
+    profiling_available,
+    token_matches,
+)
+from app.services.retention_service import apply_retention
+from app.services.scheduler import scheduler_status
 
 router = APIRouter(prefix="/system", tags=["System"])
 
@@ -58,7 +71,104 @@ def update_system_config(
 
         config.scan_interval_minutes = update_data.scan_interval_minutes
 
+    if update_data.retention_enabled is not None:
+        config.retention_enabled = update_data.retention_enabled
+
+    if update_data.violation_retention_days is not None:
+
+        if not (1 <= update_data.violation_retention_days <= 3650):
+            raise HTTPException(
+                status_code=400,
+                detail="Retention must be between 1 and 3650 days"
+            )
+
+        config.violation_retention_days = update_data.violation_retention_days
+
+    if update_data.archive_before_delete is not None:
+        config.archive_before_delete = update_data.archive_before_delete
+
     db.commit()
     db.refresh(config)
 
-    return config
\ No newline at end of file
+    return config
+
+
+# ─────────────────────────────────────────────
+# RUN RETENTION NOW
+# ─────────────────────────────────────────────
+@router.post("/retention/run")
+def run_retention(db: Session = Depends(get_db)):
+    get_or_create_config(db)
+    return apply_retention(db, force=True)
+
+
+# ─────────────────────────────────────────────
+# LIST COLD ARCHIVES
+# ─────────────────────────────────────────────
+@router.get("/archives", response_model=List[ViolationArchiveResponse])
+def list_archives(db: Session = Depends(get_db)):
+    return (
+        db.query(ViolationArchive)
+        .order_by(ViolationArchive.archived_at.desc())
+        .limit(100)
+        .all()
+    )
+
+
+# ─────────────────────────────────────────────
+# SCHEDULER LEADER / LAG
+# ─────────────────────────────────────────────
+@router.get("/scheduler")
+def get_scheduler_status():
+    return scheduler_status()
+
+
+# ─────────────────────────────────────────────
+# APP DATABASE POOL (sizing against real load)
+# ─────────────────────────────────────────────
+@router.get("/pool")
+def get_pool_status():
+    return {
+        "sync": pool_status(engine, POOL_SETTINGS),
+        "async": pool_status(async_engine.sync_engine if async_engine is not None else None),
+    }
+
+
+# ─────────────────────────────────────────────
+# REQUEST PROFILES (token-guarded)
+# ─────────────────────────────────────────────
+def require_profiling_token(x_profile_token: Optional[str] = Header(default=None)):
+    if not profiling_available():
+        raise HTTPException(404, "Request profiling is not enabled")
+
+    if not token_matches(x_profile_token):
+        raise HTTPException(403, "Invalid profiling token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_profiling_token)])
+def get_profiles():
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+def download_profile(profile_id: str):
+
+    profile = get_profile(profile_id)
+
+    if profile is None:
+        raise HTTPException(404, "Profile not found")
+
+    return FileResponse(
+        path=profile["file_path"],
+        filename=profile["file_name"],
+        media_type="application/octet-stream" if profile["mode"] == "cprofile" else "text/plain"
+    )
+
+
+@router.delete("/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+def remove_profile(profile_id: str):
+
+    if not delete_profile(profile_id):
+        raise HTTPException(404, "Profile not found")
+
+    return {"message": "Profile deleted"}
@@ -0,0 +1,253 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.database import get_db, TARGET_DRIVERS
+from app.models.change_capture import ChangeCaptureState
+from app.models.policy import Policy
+from app.models.rule import Rule
+from app.models.scan_history import ScanHistory
+from app.models.targetdb import TargetDatabase
+from app.schemas.target_schema import TargetCreate, TargetUpdate, TargetResponse
+from app.services.change_capture import capture_status, install_capture, non_integer_ids, remove_capture
+from app.services.scan_engine import introspect_schema
+from app.services.target_scanner import dispose_target_engine, get_target_engine
+
+router = APIRouter(prefix="/targets", tags=["Targets"])
+
+
+# ─────────────────────────────────────────────
+# Helper: Validate Settings
+# ─────────────────────────────────────────────
+def _validate(db: Session, values: dict):
+
+    # Present but null would clear it: build_target_url() needs a type
+    db_type = values.get("db_type")
+    if "db_type" in values and (db_type is None or db_type.lower() not in TARGET_DRIVERS):
+        raise HTTPException(
+            400, f"Unsupported db_type. Supported: {', '.join(sorted(TARGET_DRIVERS))}"
+        )
+
+    policy_id = values.get("policy_id")
+    if policy_id is not None and db.get(Policy, policy_id) is None:
+        raise HTTPException(404, "Policy not found")
+
+    interval = values.get("scan_interval_minutes")
+    if interval is not None and not (1 <= interval <= 1440):
+        raise HTTPException(400, "Interval must be between 1 and 1440 minutes")
+
+    concurrency = values.get("max_concurrency")
+    if concurrency is not None and not (1 <= concurrency <= 32):
+        raise HTTPException(400, "max_concurrency must be between 1 and 32")
+
+
+def _get_target(db: Session, target_id: int) -> TargetDatabase:
+    target = db.get(TargetDatabase, target_id)
+
+    if not target:
+        raise HTTPException(404, "Target database not found")
+
+    return target
+
+
+def _target_engine(target: TargetDatabase):
+    try:
+        return get_target_engine(target)
+    except ValueError as e:
+        # Stored before db_type was validated
+        raise HTTPException(400, str(e))
+
+
+# ─────────────────────────────────────────────
+# LIST / GET
+# ─────────────────────────────────────────────
+@router.get("", response_model=List[TargetResponse])
+def list_targets(db: Session = Depends(get_db)):
+    return db.query(TargetDatabase).order_by(TargetDatabase.id).all()
+
+
+@router.get("/{target_id}", response_model=TargetResponse)
+def get_target(target_id: int, db: Session = Depends(get_db)):
+    return _get_target(db, target_id)
+
+
+# ─────────────────────────────────────────────
+# CREATE
+# ─────────────────────────────────────────────
+@router.post("", response_model=TargetResponse, status_code=201)
+def create_target(payload: TargetCreate, db: Session = Depends(get_db)):
+
+    values = payload.model_dump()
+    _validate(db, values)
+
+    target = TargetDatabase(**values)
+    db.add(target)
+    db.commit()
+    db.refresh(target)
+
+    return target
+
+
+# ─────────────────────────────────────────────
+# UPDATE (Partial)
+# ─────────────────────────────────────────────
+@router.patch("/{target_id}", response_model=TargetResponse)
+def update_target(target_id: int, payload: TargetUpdate, db: Session = Depends(get_db)):
+
+    target = _get_target(db, target_id)
+
+    values = payload.model_dump(exclude_unset=True)
+    _validate(db, values)
+
+    for field, value in values.items():
+        setattr(target, field, value)
+
+    db.commit()
+    db.refresh(target)
+
+    # Connection settings or pool size may have changed
+    dispose_target_engine(target_id)
+
+    return target
+
+
+# ─────────────────────────────────────────────
+# DELETE
+# ─────────────────────────────────────────────
+@router.delete("/{target_id}", status_code=204)
+def delete_target(target_id: int, db: Session = Depends(get_db)):
+
+    target = _get_target(db, target_id)
+    state = db.get(ChangeCaptureState, target_id)
+
+    # Don't leave triggers and an ever-growing change log on the target
+    if state is not None:
+        engine = _target_engine(target)
+
+        try:
+            remove_capture(engine, state.tables)
+        except Exception as e:
+            raise HTTPException(
+                502, f"Removing change capture failed, target not deleted: {e}"
+            )
+
+    # Keep the scan history, just unlink it
+    db.query(ScanHistory).filter(ScanHistory.target_db_id == target_id).update(
+        {"target_db_id": None}, synchronize_session=False
+    )
+    db.query(ChangeCaptureState).filter(ChangeCaptureState.target_db_id == target_id).delete()
+    db.delete(target)
+    db.commit()
+
+    dispose_target_engine(target_id)
+
+
+# ─────────────────────────────────────────────
+# SCAN NOW (picked up on the scheduler's next tick)
+# ─────────────────────────────────────────────
+@router.post("/{target_id}/scan", response_model=TargetResponse)
+def queue_target_scan(target_id: int, db: Session = Depends(get_db)):
+
+    target = _get_target(db, target_id)
+
+    if target.policy_id is None:
+        raise HTTPException(400, "Target has no policy to scan with")
+
+    target.next_scan_at = None
+    db.commit()
+    db.refresh(target)
+
+    return target
+
+
+# ─────────────────────────────────────────────
+# CHANGE CAPTURE (triggers + micro-batch evaluation)
+# ─────────────────────────────────────────────
+@router.get("/{target_id}/capture")
+def get_capture(target_id: int, db: Session = Depends(get_db)):
+    return capture_status(db, _get_target(db, target_id))
+
+
+@router.post("/{target_id}/capture")
+def enable_capture(target_id: int, db: Session = Depends(get_db)):
+    """
+    Install change-log triggers on every table the target's policy has
+    rules for. Re-running picks up tables added to the policy since.
+    """
+
+    target = _get_target(db, target_id)
+
+    if target.policy_id is None:
+        raise HTTPException(400, "Target has no policy to scan with")
+
+    engine = _target_engine(target)
+
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        raise HTTPException(400, "Change capture supports SQLite and PostgreSQL targets")
+
+    try:
+        schema = introspect_schema(engine)
+    except Exception as e:
+        raise HTTPException(502, f"Target database unreachable: {e}")
+
+    rule_tables = {
+        table for (table,) in
+        db.query(Rule.table_name).filter(Rule.policy_id == target.policy_id).distinct().all()
+    }
+
+    # The first column is the record id, as in a full scan
+    tables = {table: schema[table][0] for table in sorted(rule_tables) if schema.get(table)}
+
+    if not tables:
+        raise HTTPException(400, "None of the policy's tables exist on the target")
+
+    try:
+        skipped = non_integer_ids(engine, tables)
+    except Exception as e:
+        raise HTTPException(502, f"Target database unreachable: {e}")
+
+    # The change log keeps BIGINT ids; other id types would break writes on the target
+    tables = {table: column for table, column in tables.items() if table not in skipped}
+
+    if not tables:
+        raise HTTPException(
+            400, f"Change capture needs an integer record id column; none on: {', '.join(skipped)}"
+        )
+
+    try:
+        install_capture(engine, tables)
+    except Exception as e:
+        raise HTTPException(502, f"Installing triggers failed: {e}")
+
+    state = db.get(ChangeCaptureState, target_id)
+
+    if state is None:
+        state = ChangeCaptureState(target_db_id=target_id, tables=tables)
+        db.add(state)
+    else:
+        state.tables = tables
+        state.enabled = True
+
+    db.commit()
+
+    return {**capture_status(db, target), "skipped_tables": skipped}
+
+
+@router.delete("/{target_id}/capture", status_code=204)
+def disable_capture(target_id: int, db: Session = Depends(get_db)):
+
+    target = _get_target(db, target_id)
+    state = db.get(ChangeCaptureState, target_id)
+
+    if state is None:
+        raise HTTPException(404, "Change capture isn't installed on this target")
+
+    engine = _target_engine(target)
+
+    try:
+        remove_capture(engine, state.tables)
+    except Exception as e:
+        raise HTTPException(502, f"Removing triggers failed: {e}")
+
+    db.delete(state)
+    db.commit()
@@ -0,0 +1,417 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from datetime import datetime
+from itertools import chain
+from typing import Literal, Optional
+import base64
+import json
+
+from app.core.database import get_db, get_read_db, run_read
+from app.models.rule import Rule
+from app.models.violation import Violation
+from app.models.violation_record_set import ViolationRecordSet
+from app.schemas.violation_schema import ViolationPage
+from app.services.export_service import (
+    EXPORT_FORMATS, export_stream, iter_batches, iter_record_set_batches, parquet_available
+)
+from app.services.record_set import EMPTY_SET, contains, decode_array, diff_counts
+from app.services.scan_engine import is_compact_scan
+
+router = APIRouter(prefix="/violations", tags=["Violations"])
+
+
+# Sort key per order mode; the listing is newest-first on (key, id)
+ORDER_KEYS = {
+    "scan": Violation.scan_id,
+    "time": Violation.created_at,
+}
+
+
+# ─────────────────────────────────────────────
+# Cursor Encoding (opaque to clients)
+# ─────────────────────────────────────────────
+def encode_cursor(order: str, key, last_id: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+
+    raw = json.dumps([order, key, last_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_order, key, last_id = json.loads(base64.urlsafe_b64decode(padded))
+
+        if cursor_order != order:
+            raise HTTPException(400, "Cursor was issued for a different order")
+
+        key = datetime.fromisoformat(key) if order == "time" else int(key)
+        last_id = int(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+    return key, last_id
+
+
+# ─────────────────────────────────────────────
+# Shared Filters (also used by the export endpoint)
+# ─────────────────────────────────────────────
+def apply_violation_filters(
+    query,
+    scan_id: Optional[int] = None,
+    rule_id: Optional[int] = None,
+    table_name: Optional[str] = None,
+    record_id: Optional[int] = None,
+    min_risk: Optional[int] = None,
+    max_risk: Optional[int] = None
+):
+    if scan_id is not None:
+        query = query.filter(Violation.scan_id == scan_id)
+    if rule_id is not None:
+        query = query.filter(Violation.rule_id == rule_id)
+    if table_name is not None:
+        query = query.filter(Violation.table_name == table_name)
+    if record_id is not None:
+        query = query.filter(Violation.record_id == record_id)
+    if min_risk is not None:
+        query = query.filter(Violation.risk_value >= min_risk)
+    if max_risk is not None:
+        query = query.filter(Violation.risk_value <= max_risk)
+
+    return query
+
+
+def apply_record_set_filters(
+    query,
+    scan_id: Optional[int] = None,
+    rule_id: Optional[int] = None,
+    table_name: Optional[str] = None,
+    record_id: Optional[int] = None,
+    min_risk: Optional[int] = None,
+    max_risk: Optional[int] = None
+):
+    """Same filters on compact record sets; record_id only narrows to sets whose range holds it."""
+
+    if scan_id is not None:
+        query = query.filter(ViolationRecordSet.scan_id == scan_id)
+    if rule_id is not None:
+        query = query.filter(ViolationRecordSet.rule_id == rule_id)
+    if table_name is not None:
+        query = query.filter(ViolationRecordSet.table_name == table_name)
+    if record_id is not None:
+        query = query.filter(
+            ViolationRecordSet.min_record_id <= record_id,
+            ViolationRecordSet.max_record_id >= record_id
+        )
+    if min_risk is not None:
+        query = query.filter(ViolationRecordSet.risk_value >= min_risk)
+    if max_risk is not None:
+        query = query.filter(ViolationRecordSet.risk_value <= max_risk)
+
+    return query
+
+
+# ─────────────────────────────────────────────
+# LIST VIOLATIONS (keyset pagination)
+# ─────────────────────────────────────────────
+@router.get("", response_model=ViolationPage)
+async def list_violations(
+    scan_id: int | None = Query(default=None),
+    rule_id: int | None = Query(default=None),
+    table_name: str | None = Query(default=None),
+    record_id: int | None = Query(default=None),
+    min_risk: int | None = Query(default=None),
+    max_risk: int | None = Query(default=None),
+    order: Literal["scan", "time"] = Query(default="scan"),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    db=Depends(get_read_db)
+):
+
+    return await run_read(
+        db, violation_page,
+        scan_id, rule_id, table_name, record_id, min_risk, max_risk, order, limit, cursor
+    )
+
+
+def violation_page(
+    db: Session,
+    scan_id: Optional[int],
+    rule_id: Optional[int],
+    table_name: Optional[str],
+    record_id: Optional[int],
+    min_risk: Optional[int],
+    max_risk: Optional[int],
+    order: str,
+    limit: int,
+    cursor: Optional[str]
+) -> dict:
+
+    # Record sets have no per-violation ids to page on; unscoped listings
+    # cover row-stored scans only
+    if scan_id is not None and is_compact_scan(db, scan_id):
+        raise HTTPException(
+            409, f"Scan {scan_id} uses compact storage; see /violations/sets?scan_id={scan_id}"
+        )
+
+    sort_key = ORDER_KEYS[order]
+
+    # Column projection: no ORM objects, no lazy loads
+    query = (
+        db.query(
+            Violation.id,
+            Violation.scan_id,
+            Violation.rule_id,
+            Violation.table_name,
+            Violation.record_id,
+            Violation.field_name,
+            Violation.actual_value,
+            Violation.expected_condition,
+            Violation.risk_value,
+            Rule.severity,
+            Violation.created_at
+        )
+        .outerjoin(Rule, Rule.id == Violation.rule_id)
+        # Rows without a sort key can't be positioned by a cursor
+        .filter(sort_key.isnot(None))
+    )
+
+    query = apply_violation_filters(
+        query, scan_id, rule_id, table_name, record_id, min_risk, max_risk
+    )
+
+    # Seek past the last row of the previous page instead of OFFSET,
+    # so page N costs the same index range scan as page 1
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, order)
+        query = query.filter(
+            or_(
+                sort_key < last_key,
+                and_(sort_key == last_key, Violation.id < last_id)
+            )
+        )
+
+    rows = (
+        query
+        .order_by(sort_key.desc(), Violation.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            order, last.scan_id if order == "scan" else last.created_at, last.id
+        )
+
+    return {
+        "items": [row._asdict() for row in rows],
+        "next_cursor": next_cursor,
+        "limit": limit
+    }
+
+
+# ─────────────────────────────────────────────
+# BULK EXPORT (streamed from a server-side cursor)
+# ─────────────────────────────────────────────
+EXPORT_COLUMNS = [
+    Violation.id,
+    Violation.scan_id,
+    Violation.rule_id,
+    Violation.table_name,
+    Violation.record_id,
+    Violation.field_name,
+    Violation.actual_value,
+    Violation.expected_condition,
+    Violation.risk_value,
+    Rule.severity,
+    Violation.remediation,
+    Violation.created_at,
+]
+
+# Compact record sets in the same layout; the rest come out as None
+RECORD_SET_EXPORT_COLUMNS = [
+    ViolationRecordSet.scan_id,
+    ViolationRecordSet.rule_id,
+    ViolationRecordSet.table_name,
+    ViolationRecordSet.field_name,
+    ViolationRecordSet.expected_condition,
+    ViolationRecordSet.risk_value,
+    Rule.severity,
+    ViolationRecordSet.created_at,
+    ViolationRecordSet.record_ids,
+]
+
+
+@router.get("/export")
+def export_violations(
+    format: Literal["csv", "ndjson", "parquet"] = Query(default="csv"),
+    gzip: bool = Query(default=False),
+    scan_id: int | None = Query(default=None),
+    rule_id: int | None = Query(default=None),
+    table_name: str | None = Query(default=None),
+    record_id: int | None = Query(default=None),
+    min_risk: int | None = Query(default=None),
+    max_risk: int | None = Query(default=None)
+):
+
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(400, "Parquet export requires pyarrow to be installed")
+
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(Rule, Rule.id == Violation.rule_id)
+    )
+
+    stmt = apply_violation_filters(
+        stmt, scan_id, rule_id, table_name, record_id, min_risk, max_risk
+    )
+
+    stmt = stmt.order_by(Violation.scan_id, Violation.id)
+
+    set_stmt = (
+        select(*RECORD_SET_EXPORT_COLUMNS)
+        .outerjoin(Rule, Rule.id == ViolationRecordSet.rule_id)
+    )
+
+    set_stmt = apply_record_set_filters(
+        set_stmt, scan_id, rule_id, table_name, record_id, min_risk, max_risk
+    ).order_by(ViolationRecordSet.scan_id, ViolationRecordSet.rule_id)
+
+    columns = [column.key for column in EXPORT_COLUMNS]
+
+    # Row-stored violations first, then compact-stored ones
+    batches = chain(
+        iter_batches(stmt),
+        iter_record_set_batches(set_stmt, columns, record_id)
+    )
+    media_type, extension = EXPORT_FORMATS[format]
+
+    filename = f"violations_scan_{scan_id}" if scan_id is not None else "violations"
+    filename = f"{filename}.{extension}"
+
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        export_stream(stmt, columns, format, gzip=gzip, batches=batches),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ─────────────────────────────────────────────
+# COMPACT RECORD SETS (VIOLATION_STORAGE_MODE=compact)
+# ─────────────────────────────────────────────
+def _record_set_info(record_set: ViolationRecordSet) -> dict:
+    return {
+        "id": record_set.id,
+        "scan_id": record_set.scan_id,
+        "rule_id": record_set.rule_id,
+        "table_name": record_set.table_name,
+        "field_name": record_set.field_name,
+        "expected_condition": record_set.expected_condition,
+        "risk_value": record_set.risk_value,
+        "record_count": record_set.record_count,
+        "min_record_id": record_set.min_record_id,
+        "max_record_id": record_set.max_record_id,
+        "encoded_bytes": len(record_set.record_ids),
+    }
+
+
+def _record_sets(db: Session, scan_id: int) -> dict:
+    return {
+        record_set.rule_id: record_set
+        for record_set in
+        db.query(ViolationRecordSet).filter(ViolationRecordSet.scan_id == scan_id).all()
+    }
+
+
+@router.get("/sets")
+def list_record_sets(
+    scan_id: int = Query(...),
+    db: Session = Depends(get_db)
+):
+    return [_record_set_info(record_set) for record_set in _record_sets(db, scan_id).values()]
+
+
+@router.get("/sets/contains")
+def record_set_contains(
+    scan_id: int = Query(...),
+    rule_id: int = Query(...),
+    record_id: int = Query(...),
+    db: Session = Depends(get_db)
+):
+
+    record_set = _record_sets(db, scan_id).get(rule_id)
+
+    found = (
+        record_set is not None
+        and record_set.min_record_id <= record_id <= record_set.max_record_id
+        and contains(record_set.record_ids, record_id)
+    )
+
+    return {"scan_id": scan_id, "rule_id": rule_id, "record_id": record_id, "violated": found}
+
+
+@router.get("/sets/diff")
+def diff_record_sets(
+    base_scan_id: int = Query(...),
+    scan_id: int = Query(...),
+    db: Session = Depends(get_db)
+):
+
+    before = _record_sets(db, base_scan_id)
+    after = _record_sets(db, scan_id)
+
+    rules = []
+
+    for rule_id in sorted(set(before) | set(after), key=lambda r: (r is None, r)):
+        old = before.get(rule_id)
+        new = after.get(rule_id)
+
+        rules.append({
+            "rule_id": rule_id,
+            "table_name": (new or old).table_name,
+            **diff_counts(
+                old.record_ids if old else EMPTY_SET,
+                new.record_ids if new else EMPTY_SET
+            )
+        })
+
+    totals = {
+        key: sum(rule[key] for rule in rules)
+        for key in ("new", "resolved", "persisting")
+    }
+
+    return {"base_scan_id": base_scan_id, "scan_id": scan_id, "totals": totals, "rules": rules}
+
+
+@router.get("/sets/{set_id}/records")
+def record_set_records(
+    set_id: int,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=1000, ge=1, le=100000),
+    db: Session = Depends(get_db)
+):
+
+    record_set = db.get(ViolationRecordSet, set_id)
+
+    if not record_set:
+        raise HTTPException(404, "Record set not found")
+
+    ids = decode_array(record_set.record_ids)
+
+    return {
+        **_record_set_info(record_set),
+        "offset": offset,
+        "record_ids": ids[offset:offset + limit].tolist()
+    }
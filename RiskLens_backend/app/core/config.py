@@ -5,6 +5,24 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# App database connection pool. Pre-ping: "always" (every checkout),
+# "idle" (only connections idle longer than DB_POOL_PING_IDLE_SECONDS)
+# or "never"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds, -1 = never
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+DB_POOL_PING_IDLE_SECONDS = float(os.getenv("DB_POOL_PING_IDLE_SECONDS", 30))
+
+# Async read path (asyncpg / aiosqlite) for the read-heavy endpoints.
+# URL defaults to DATABASE_URL with the async driver swapped in
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "false").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or None
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 10))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 10))
+ASYNC_DB_POOL_TIMEOUT = int(os.getenv("ASYNC_DB_POOL_TIMEOUT", 30))
+
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
@@ -14,6 +32,100 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# LLM provider (Groq or any OpenAI-compatible endpoint, e.g. tools/mock_llm_server.py)
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+RULE_EXTRACTION_MODEL = os.getenv("RULE_EXTRACTION_MODEL", "llama-3.3-70b-versatile")
+REMEDIATION_MODEL = os.getenv("REMEDIATION_MODEL", "llama3-70b-8192")
+REMEDIATION_BATCH_SIZE = int(os.getenv("REMEDIATION_BATCH_SIZE", 20))
+
+# PDF text extraction
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 40))
+PDF_MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", os.cpu_count() or 1))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join("cache", "pdf_text"))
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", 500))  # least recently used evicted first
+
+# Uploads
+MAX_POLICY_UPLOAD_MB = int(os.getenv("MAX_POLICY_UPLOAD_MB", 50))
+MAX_DATASET_UPLOAD_MB = int(os.getenv("MAX_DATASET_UPLOAD_MB", 500))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+# Analytics response cache
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", 512))
+ANALYTICS_GENERATION_TTL_SECONDS = float(os.getenv("ANALYTICS_GENERATION_TTL_SECONDS", 1.0))
+
+# Risk trend rollups (week buckets are kept indefinitely)
+TREND_HOURLY_RETENTION_DAYS = int(os.getenv("TREND_HOURLY_RETENTION_DAYS", 14))
+TREND_DAILY_RETENTION_DAYS = int(os.getenv("TREND_DAILY_RETENTION_DAYS", 365))
+
+# Bulk violation export (rows fetched per server-side cursor batch)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+
+# Generated report artifacts (least recently downloaded evicted first)
+REPORT_DIR = os.getenv("REPORT_DIR", "reports")
+REPORT_STORE_MAX_MB = int(os.getenv("REPORT_STORE_MAX_MB", 200))
+REPORT_STORE_MAX_FILES = int(os.getenv("REPORT_STORE_MAX_FILES", 100))
+
+# Report jobs heartbeat while rendering; one silent for longer than the
+# stale limit died with its worker and is failed by whoever notices
+REPORT_JOB_HEARTBEAT_SECONDS = int(os.getenv("REPORT_JOB_HEARTBEAT_SECONDS", 15))
+REPORT_JOB_STALE_SECONDS = int(os.getenv("REPORT_JOB_STALE_SECONDS", 120))
+
+# Audit report detail section (highest-risk rows listed, fetched per query)
+AUDIT_DETAIL_LIMIT = int(os.getenv("AUDIT_DETAIL_LIMIT", 1000))
+AUDIT_DETAIL_BATCH_SIZE = int(os.getenv("AUDIT_DETAIL_BATCH_SIZE", 250))
+
+# Violation retention / cold archival
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("archive", "violations"))
+RETENTION_DELETE_BATCH_SIZE = int(os.getenv("RETENTION_DELETE_BATCH_SIZE", 5000))
+
+# Scheduler leader election (one worker runs scheduled jobs)
+SCHEDULER_LEASE_TTL_SECONDS = int(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", 30))
+SCHEDULER_HEARTBEAT_SECONDS = int(os.getenv("SCHEDULER_HEARTBEAT_SECONDS", 10))
+SCHEDULER_TICK_SECONDS = int(os.getenv("SCHEDULER_TICK_SECONDS", 5))
+
+# Auto-scan fan-out over registered target databases
+AUTO_SCAN_MAX_WORKERS = int(os.getenv("AUTO_SCAN_MAX_WORKERS", 4))
+
+# Skip tables whose fingerprint hasn't changed since the last auto-scan
+AUTO_SCAN_CHANGE_DETECTION = os.getenv("AUTO_SCAN_CHANGE_DETECTION", "true").lower() in ("1", "true", "yes")
+# Re-evaluate a table after this many hours of being skipped, whatever
+# its fingerprint says (0 = no limit)
+AUTO_SCAN_MAX_SKIP_HOURS = float(os.getenv("AUTO_SCAN_MAX_SKIP_HOURS", 24))
+
+# Checkpointed scans: record-id range per shard, and how long a
+# PROCESSING scan may go without a checkpoint before it counts as dead
+SCAN_SHARD_SIZE = int(os.getenv("SCAN_SHARD_SIZE", 50000))
+# Upper bound on shards per table, however sparse its ids
+SCAN_MAX_SHARDS = int(os.getenv("SCAN_MAX_SHARDS", 1000))
+SCAN_STALE_SECONDS = int(os.getenv("SCAN_STALE_SECONDS", 900))
+
+# On-demand request profiling: with PROFILING_ENABLED and a token set,
+# a request carrying X-Profile-Token plus X-Profile: sample|cprofile
+# (or ?profile=sample|cprofile) is profiled and the result kept in PROFILE_DIR
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") or None
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))
+PROFILE_MAX_MB = int(os.getenv("PROFILE_MAX_MB", 100))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", 600))
+
+# Change capture (triggers on target tables feed a change log)
+CDC_BATCH_SIZE = int(os.getenv("CDC_BATCH_SIZE", 1000))
+CDC_POLL_SECONDS = float(os.getenv("CDC_POLL_SECONDS", 0.5))
+CDC_NOTIFY_CHANNEL = os.getenv("CDC_NOTIFY_CHANNEL", "risklens_changes")
+
+# "rows": one violations row per finding. "compact": one violation_record_sets
+# row per (scan, rule) holding the offending record ids (no actual_value kept)
+VIOLATION_STORAGE_MODE = os.getenv("VIOLATION_STORAGE_MODE", "rows").lower()
+
+if VIOLATION_STORAGE_MODE not in ("rows", "compact"):
+    raise ValueError("VIOLATION_STORAGE_MODE must be 'rows' or 'compact'")
+
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in environment variables")
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "").split(",")
\ No newline at end of file
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "").split(",")
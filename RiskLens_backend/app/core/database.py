@@ -1,12 +1,55 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
-
-# Main application database engine
-engine = create_engine(
+from app.core.config import (
+    ASYNC_DATABASE_URL,
+    ASYNC_DB_ENABLED,
+    ASYNC_DB_MAX_OVERFLOW,
+    ASYNC_DB_POOL_SIZE,
+    ASYNC_DB_POOL_TIMEOUT,
     DATABASE_URL,
-    pool_pre_ping=True
+    DB_MAX_OVERFLOW,
+    DB_POOL_PING_IDLE_SECONDS,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
 )
+from app.core.db_pool import InstrumentedQueuePool, install_idle_ping
+
+
+# Main application database engine
+def _app_pool_options() -> dict:
+    url = make_url(DATABASE_URL)
+
+    # In-memory SQLite keeps its single-connection pool
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {"pool_pre_ping": DB_POOL_PRE_PING == "always"}
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING == "always",
+    }
+
+
+engine = create_engine(DATABASE_URL, **_app_pool_options())
+
+if DB_POOL_PRE_PING == "idle":
+    install_idle_ping(engine, DB_POOL_PING_IDLE_SECONDS)
+
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pre_ping": DB_POOL_PRE_PING,
+    "ping_idle_seconds": DB_POOL_PING_IDLE_SECONDS,
+}
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -26,9 +69,126 @@ def get_db():
         db.close()
 
 
+# ─────────────────────────────────────────────
+# Async Engine (read-heavy endpoints, opt-in)
+# ─────────────────────────────────────────────
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(db_url: str) -> str:
+    url = make_url(db_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()}; set ASYNC_DATABASE_URL")
+
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_DB_ENABLED:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL or async_database_url(DATABASE_URL),
+        pool_pre_ping=True,
+        pool_size=ASYNC_DB_POOL_SIZE,
+        max_overflow=ASYNC_DB_MAX_OVERFLOW,
+        pool_timeout=ASYNC_DB_POOL_TIMEOUT
+    )
+
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+async def get_read_db():
+    """
+    Session for read-only endpoints: an AsyncSession when ASYNC_DB_ENABLED,
+    otherwise the usual sync Session. Use with run_read().
+    """
+
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def run_read(db, fn, *args, **kwargs):
+    """
+    Call fn(session, ...) written against the sync Session API. On an
+    AsyncSession it runs via run_sync(): the queries await the async
+    driver, so a slow aggregate doesn't hold a threadpool worker. On a
+    sync Session it runs in the threadpool as before.
+
+    Under run_sync() everything else fn does (building ORM rows, the
+    response dict, the ETag from params + generation) runs on the event
+    loop thread. That's acceptable only because the ported endpoints
+    (history, dashboard, risk, violations) return bounded payloads:
+    aggregates, at most 50 scans or a 500-row page. Their cost sits in
+    the query, which is awaited. Don't pass fn anything CPU-bound or
+    unbounded.
+
+    Not ported, for that reason:
+      - auth: bcrypt hashing is deliberately slow CPU work, and
+        register writes.
+      - report: rendering is CPU-bound and runs as a background job;
+        the job-status and download endpoints are single-row lookups
+        plus file I/O.
+    Those stay plain def endpoints in the threadpool.
+    """
+
+    if AsyncSessionLocal is not None:
+        return await db.run_sync(fn, *args, **kwargs)
+
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
 # 🔥 IMPORTANT: Dynamic engine for external databases
-def create_dynamic_engine(db_url: str):
+def create_dynamic_engine(db_url: str, **pool_options):
     return create_engine(
         db_url,
-        pool_pre_ping=True
-    )
\ No newline at end of file
+        pool_pre_ping=True,
+        **pool_options
+    )
+
+
+# Driver names for registered target databases
+TARGET_DRIVERS = {
+    "postgres": "postgresql+psycopg2",
+    "postgresql": "postgresql+psycopg2",
+    "mysql": "mysql+pymysql",
+    "sqlite": "sqlite",
+}
+
+
+def build_target_url(target) -> URL:
+    driver = TARGET_DRIVERS.get((target.db_type or "").lower())
+
+    if driver is None:
+        raise ValueError(f"Unsupported target database type: {target.db_type}")
+
+    if driver == "sqlite":
+        return URL.create(driver, database=target.db_name)
+
+    return URL.create(
+        driver,
+        username=target.username,
+        password=target.password,
+        host=target.host,
+        port=target.port,
+        database=target.db_name
+    )
@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+
+# Checkout wait histogram bucket bounds (seconds), Prometheus-style cumulative
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout's wait for a free connection
+    (_do_get covers both a pooled connection and opening a new one) and
+    counts checkout timeouts, i.e. pool exhaustion.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # QueuePool._do_get retries by calling itself; time the outer call only
+        self._in_get = threading.local()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connects": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "wait_buckets": [0] * len(WAIT_BUCKETS),
+            "pings": 0,
+            "ping_failures": 0,
+        }
+
+    def _do_get(self):
+        if getattr(self._in_get, "active", False):
+            return super()._do_get()
+
+        self._in_get.active = True
+        started = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.count("timeouts")
+            raise
+        finally:
+            self._in_get.active = False
+            self._record_wait(time.perf_counter() - started)
+
+    def _record_wait(self, waited: float):
+        with self._stats_lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.stats["wait_buckets"][i] += 1
+
+    def _create_connection(self):
+        self.count("connects")
+        return super()._create_connection()
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> Dict:
+        with self._stats_lock:
+            return {**self.stats, "wait_buckets": list(self.stats["wait_buckets"])}
+
+
+# ─────────────────────────────────────────────
+# Pre-ping Only After Idle
+# ─────────────────────────────────────────────
+def install_idle_ping(engine: Engine, idle_seconds: float):
+    """
+    Ping a connection on checkout only if it sat in the pool longer than
+    idle_seconds; a busy pool skips the extra round-trip. A failed ping
+    raises DisconnectionError, which makes the pool retry with a fresh
+    connection.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _checked_in(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checked_out(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.count("pings")
+
+        cursor = dbapi_connection.cursor()
+
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            if isinstance(pool, InstrumentedQueuePool):
+                pool.count("ping_failures")
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+# ─────────────────────────────────────────────
+# Status (GET /system/pool)
+# ─────────────────────────────────────────────
+def pool_status(engine: Optional[Engine], settings: Optional[Dict] = None) -> Optional[Dict]:
+    if engine is None:
+        return None
+
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__, "settings": settings or {}}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # Negative while the base pool isn't full yet
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+
+    if isinstance(pool, InstrumentedQueuePool):
+        stats = pool.snapshot()
+        checkouts = stats["checkouts"]
+
+        status["checkout_wait"] = {
+            "checkouts": checkouts,
+            "timeouts": stats["timeouts"],
+            "avg_ms": round(stats["wait_seconds_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+            "max_ms": round(stats["wait_seconds_max"] * 1000, 3),
+            "buckets_ms": {
+                f"le_{bound * 1000:g}": count
+                for bound, count in zip(WAIT_BUCKETS, stats["wait_buckets"])
+            },
+        }
+        status["connects"] = stats["connects"]
+        status["pings"] = stats["pings"]
+        status["ping_failures"] = stats["ping_failures"]
+
+    return status
@@ -0,0 +1,94 @@
+from typing import List
+
+from sqlalchemy import Column, inspect, literal, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import Base
+
+
+# Indexes the models no longer declare (each a prefix of one they do);
+# dropped from older databases so inserts stop maintaining them
+DROPPED_INDEXES = {
+    "violations": (
+        "idx_violation_scan_id",
+        "idx_violation_created_id",
+        "ix_violations_created_at",
+        "ix_violations_table_name",
+    ),
+}
+
+
+def _column_ddl(column: Column, dialect) -> str:
+    """
+    Column clause for ALTER TABLE ... ADD COLUMN. A scalar model default
+    becomes a DEFAULT so existing rows get it too; NOT NULL is only kept
+    when there's a default to fill existing rows with.
+    """
+
+    preparer = dialect.identifier_preparer
+    ddl = f"{preparer.format_column(column)} {column.type.compile(dialect=dialect)}"
+
+    default = None
+
+    if column.server_default is not None:
+        default = str(column.server_default.arg)
+    elif column.default is not None and column.default.is_scalar:
+        default = str(
+            literal(column.default.arg, type_=column.type)
+            .compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        )
+
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+
+        if not column.nullable:
+            ddl += " NOT NULL"
+
+    return ddl
+
+
+def upgrade_schema(bind: Engine) -> List[str]:
+    """
+    create_all() creates missing tables but never alters existing ones.
+    Add the model columns and indexes an older database is missing, and
+    drop the ones in DROPPED_INDEXES. Idempotent; returns what changed.
+
+    Foreign keys on added columns are not created (SQLite can't add
+    them to an existing table); the ORM relationships don't need them.
+    """
+
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    quote_table = bind.dialect.identifier_preparer.format_table
+
+    changes = []
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+
+            columns = {col["name"] for col in inspector.get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+
+                conn.execute(text(
+                    f"ALTER TABLE {quote_table(table)} ADD COLUMN {_column_ddl(column, bind.dialect)}"
+                ))
+                changes.append(f"added {table.name}.{column.name}")
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    changes.append(f"added {index.name}")
+
+            for name in DROPPED_INDEXES.get(table.name, ()):
+                if name in indexes:
+                    conn.execute(text(f"DROP INDEX {bind.dialect.identifier_preparer.quote(name)}"))
+                    changes.append(f"dropped {name}")
+
+    return changes
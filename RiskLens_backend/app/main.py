@@ -1,10 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.core.database import Base, engine
-from app.core.config import CORS_ORIGINS
-from app.api import auth, scan, dashboard, system, history, risk, report
-from app.services.scheduler import start_scheduler
+from app.core.database import Base, engine, SessionLocal, async_engine
+from app.core.schema_upgrade import upgrade_schema
+from app.core.config import CORS_ORIGINS, MAX_POLICY_UPLOAD_MB, MAX_DATASET_UPLOAD_MB
+from app.api import auth, scan, dashboard, system, history, risk, report, policy, violations, targets, metrics
+from app.services.report_store import enforce_store_limits, fail_interrupted_jobs
+from app.services.request_profiler import profiling_available, requested_mode, start_profile, token_matches
+from app.services.scheduler import start_scheduler, stop_scheduler
 
 
 # ─────────────────────────────────────────────
@@ -24,6 +29,10 @@ app = FastAPI(
 # ─────────────────────────────────────────────
 Base.metadata.create_all(bind=engine)
 
+# Columns / indexes added to (or dropped from) tables an older database already has
+for change in upgrade_schema(engine):
+    print("Schema upgrade:", change)
+
 
 # ─────────────────────────────────────────────
 # CORS Configuration (Loaded from .env)
@@ -37,6 +46,73 @@ app.add_middleware(
 )
 
 
+# ─────────────────────────────────────────────
+# Upload Size Guard
+# Rejects oversized bodies from Content-Length before
+# the multipart form is received and parsed
+# ─────────────────────────────────────────────
+MAX_REQUEST_BYTES = (MAX_POLICY_UPLOAD_MB + MAX_DATASET_UPLOAD_MB + 1) * 1024 * 1024
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        return JSONResponse(status_code=413, content={"detail": "Request body too large"})
+
+    return await call_next(request)
+
+
+# ─────────────────────────────────────────────
+# On-demand Request Profiling
+# Opt-in per request (X-Profile header or ?profile=), token-guarded;
+# the profile covers the handler and a streamed body, and is listed
+# under /system/profiles
+# ─────────────────────────────────────────────
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    if not profiling_available():
+        return await call_next(request)
+
+    mode = requested_mode(request.headers.get("x-profile") or request.query_params.get("profile"))
+
+    if mode is None:
+        return await call_next(request)
+
+    if not token_matches(request.headers.get("x-profile-token")):
+        return JSONResponse(status_code=403, content={"detail": "Invalid profiling token"})
+
+    profile = start_profile(mode, request.method, request.url.path)
+
+    if profile is None:
+        response = await call_next(request)
+        response.headers["X-Profile-Skipped"] = "another request is being profiled"
+        return response
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        profile.stop()
+        await run_in_threadpool(profile.save, 500)
+        raise
+
+    body = response.body_iterator
+
+    async def profiled_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            profile.stop()
+            await run_in_threadpool(profile.save, response.status_code)
+
+    response.body_iterator = profiled_body()
+    response.headers["X-Profile-Id"] = profile.id
+
+    return response
+
+
 # ─────────────────────────────────────────────
 # Include Routers
 # ─────────────────────────────────────────────
@@ -47,6 +123,10 @@ app.include_router(history.router)
 app.include_router(system.router)
 app.include_router(risk.router)
 app.include_router(report.router)
+app.include_router(policy.router)
+app.include_router(violations.router)
+app.include_router(targets.router)
+app.include_router(metrics.router)
 
 
 # ─────────────────────────────────────────────
@@ -65,8 +145,30 @@ def root():
 # ─────────────────────────────────────────────
 @app.on_event("startup")
 async def startup_event():
+    # Rollup / trend backfill runs in the scheduler, on the leader only
+    try:
+        with SessionLocal() as db:
+            fail_interrupted_jobs(db)
+            evicted = enforce_store_limits(db)
+        if evicted:
+            print(f"Removed {evicted} stale report artifacts")
+    except Exception as e:
+        print("Report store cleanup failed:", e)
+
     try:
         start_scheduler()
         print("Scheduler started successfully")
     except Exception as e:
-        print("Scheduler failed to start:", e)
\ No newline at end of file
+        print("Scheduler failed to start:", e)
+
+
+# ─────────────────────────────────────────────
+# Shutdown Event
+# Hand the scheduler lease over instead of waiting for it to expire
+# ─────────────────────────────────────────────
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_scheduler()
+
+    if async_engine is not None:
+        await async_engine.dispose()
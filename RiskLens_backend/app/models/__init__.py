@@ -4,4 +4,19 @@ from .violation import Violation
 from .scan_history import ScanHistory
 from .system_config import SystemConfig
 from .auth_users import AuthUser
-from .targetdb import TargetDatabase
\ No newline at end of file
+from .targetdb import TargetDatabase
+from .remediation_cache import RemediationCache
+from .scan_summary import ScanSummary
+from .scan_summary_group import ScanSummaryGroup
+from .data_generation import DataGeneration
+from .risk_trend_bucket import RiskTrendBucket
+from .report_job import ReportJob
+from .violation_archive import ViolationArchive
+from .violation_record_set import ViolationRecordSet
+from .scan_diff import ScanDiff
+from .scheduler_lease import SchedulerLease
+from .table_fingerprint import TableFingerprint
+from .change_capture import ChangeCaptureState
+from .scan_checkpoint import ScanCheckpoint
+from .violation_record_part import ViolationRecordPart
+from .metric_sample import MetricSample
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, BigInteger, Boolean, Float, DateTime, ForeignKey, JSON
+from datetime import datetime
+from app.core.database import Base
+
+
+class ChangeCaptureState(Base):
+    __tablename__ = "change_capture_state"
+
+    # One row per target with change capture installed
+    target_db_id = Column(Integer, ForeignKey("target_databases.id", ondelete="CASCADE"), primary_key=True)
+
+    enabled = Column(Boolean, default=True)
+    tables = Column(JSON, nullable=False)  # {table: record id column} with triggers
+    installed_at = Column(DateTime, default=datetime.utcnow)
+
+    # Highest change-log id already evaluated on the target
+    last_change_id = Column(BigInteger, default=0)
+
+    batches = Column(Integer, default=0)
+    changes_processed = Column(Integer, default=0)
+    violations_found = Column(Integer, default=0)
+    last_batch_at = Column(DateTime, nullable=True)
+
+    # Change committed on the target -> violations persisted here
+    last_latency_ms = Column(Float, nullable=True)  # mean over the last batch
+    max_latency_ms = Column(Float, nullable=True)   # worst in the last batch
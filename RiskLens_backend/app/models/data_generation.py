@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class DataGeneration(Base):
+    __tablename__ = "data_generation"
+
+    # Singleton row; bumped in the same transaction as every scan commit
+    id = Column(Integer, primary_key=True)
+
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
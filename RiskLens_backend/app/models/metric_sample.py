@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, Index
+from app.core.database import Base
+
+
+class MetricSample(Base):
+    """
+    One cumulative Prometheus sample (counter or histogram bucket/sum/count).
+    Kept in the app database so every worker process adds to, and every
+    scrape reads, the same series.
+    """
+
+    __tablename__ = "metric_samples"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    name = Column(String, nullable=False)             # e.g. policyguard_scans_total
+    labels = Column(String, nullable=False, default="")  # rendered, e.g. {mode="file"}
+
+    value = Column(Float, nullable=False, default=0.0)
+
+
+Index("idx_metric_sample_name_labels", MetricSample.name, MetricSample.labels, unique=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -9,6 +9,13 @@ class Policy(Base):
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String, nullable=False)
     extracted_text = Column(Text, nullable=True)
+
+    # Extraction stats
+    content_hash = Column(String(64), nullable=True, index=True)
+    page_count = Column(Integer, nullable=True)
+    pages_from_cache = Column(Integer, nullable=True)
+    extraction_seconds = Column(Float, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
     rules = relationship("Rule", back_populates="policy", cascade="all, delete-orphan")
\ No newline at end of file
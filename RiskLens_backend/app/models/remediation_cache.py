@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class RemediationCache(Base):
+    __tablename__ = "remediation_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # sha256 of the (table, field, operator, value) rule template
+    template_hash = Column(String(64), unique=True, index=True, nullable=False)
+
+    table_name = Column(String, nullable=False)
+    field_name = Column(String, nullable=False)
+    operator = Column(String, nullable=False)
+    value = Column(String, nullable=True)
+
+    remediation = Column(Text, nullable=False)
+    model = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index, text
+from datetime import datetime
+from app.core.database import Base
+
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid hex
+
+    # Cache key: same scan, type and data generation -> same artifact
+    scan_id = Column(Integer, nullable=True)  # None = all scans
+    report_type = Column(String, nullable=False)
+    generation = Column(Integer, nullable=False)
+
+    # "<scan_id or all>:<report_type>:<generation>"; unique among open jobs
+    job_key = Column(String, nullable=True)
+
+    status = Column(String, nullable=False, default="PENDING")  # PENDING / RUNNING / COMPLETED / FAILED / EVICTED
+    error = Column(Text, nullable=True)
+
+    # Worker rendering the job, and its last sign of life
+    owner = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    file_path = Column(String, nullable=True)
+    file_size = Column(Integer, nullable=True)
+    render_seconds = Column(Float, nullable=True)
+    # High-water RSS of the rendering worker process at the end of the
+    # render: covers everything it ran before, not this render alone
+    process_peak_rss_bytes = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_report_job_key", "scan_id", "report_type", "generation"),
+        Index("idx_report_job_lru", "status", "last_accessed_at"),
+        # Identical concurrent requests: only one open job per key
+        Index(
+            "idx_report_job_open_key", "job_key", unique=True,
+            sqlite_where=text("status IN ('PENDING', 'RUNNING')"),
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')")
+        ),
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from app.core.database import Base
+
+
+class RiskTrendBucket(Base):
+    __tablename__ = "risk_trend_buckets"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    granularity = Column(String(8), nullable=False)  # hour / day / week
+    bucket_start = Column(DateTime, nullable=False)
+
+    table_name = Column(String, nullable=False)
+    rule_id = Column(Integer, nullable=False, default=0)  # 0 = no rule
+
+    violation_count = Column(Integer, nullable=False, default=0)
+    risk_sum = Column(Integer, nullable=False, default=0)
+    scan_count = Column(Integer, nullable=False, default=0)
+
+
+Index(
+    "idx_trend_bucket_grain",
+    RiskTrendBucket.granularity,
+    RiskTrendBucket.bucket_start,
+    RiskTrendBucket.table_name,
+    RiskTrendBucket.rule_id,
+    unique=True
+)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from app.core.database import Base
+
+
+class ScanCheckpoint(Base):
+    __tablename__ = "scan_checkpoints"
+
+    # One unit of a scan's work: a rule over one record-id range of its
+    # table. Planned up front as PENDING, committed DONE together with
+    # that shard's violations.
+    id = Column(Integer, primary_key=True, index=True)
+
+    scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), nullable=False)
+    rule_id = Column(Integer, ForeignKey("rules.id", ondelete="SET NULL"), nullable=True)
+
+    table_name = Column(String, nullable=False)
+    record_column = Column(String, nullable=False)
+    shard_index = Column(Integer, nullable=False)
+
+    # [range_start, range_end); None = unbounded on that side
+    range_start = Column(BigInteger, nullable=True)
+    range_end = Column(BigInteger, nullable=True)
+
+    status = Column(String, default="PENDING")  # PENDING / DONE
+    violation_count = Column(Integer, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+
+Index("idx_checkpoint_scan_status", ScanCheckpoint.scan_id, ScanCheckpoint.status)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, JSON, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class ScanDiff(Base):
+    __tablename__ = "scan_diffs"
+
+    # Cached diff summary per (base, scan) pair; scans don't change once
+    # completed, so an entry stays valid (even after archival)
+    id = Column(Integer, primary_key=True, index=True)
+
+    base_scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), nullable=False)
+    scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), nullable=False)
+
+    summary = Column(JSON, nullable=False)
+    compute_ms = Column(Float, nullable=True)
+
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
+Index("idx_scan_diff_pair", ScanDiff.base_scan_id, ScanDiff.scan_id, unique=True)
@@ -1,26 +1,75 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, timedelta
+from app.core.config import SCAN_STALE_SECONDS
 from app.core.database import Base
 
+
+# Scans whose violations may still be incomplete (no rollups yet)
+UNFINISHED_STATUSES = ("PROCESSING", "INTERRUPTED", "CANCELLED")
+
+
 class ScanHistory(Base):
     __tablename__ = "scan_history"
 
     id = Column(Integer, primary_key=True, index=True)
 
     target_db_id = Column(Integer, ForeignKey("target_databases.id"), nullable=True)
+    policy_id = Column(Integer, ForeignKey("policies.id", ondelete="SET NULL"), nullable=True, index=True)
 
-    scan_mode = Column(String, nullable=False)  # database / file
+    scan_mode = Column(String, nullable=False)  # database / file / cdc
     input_format = Column(String, nullable=True)  # csv, json, xlsx, sql, xml
     file_name = Column(String, nullable=True)
+    source_hash = Column(String(64), nullable=True)  # sha256 of uploaded dataset
+
+    # Set once the scan's violations have been moved out of the violations table;
+    # its rollups (scan_summary, trend buckets) are kept
+    archive_id = Column(Integer, ForeignKey("violation_archives.id", ondelete="SET NULL"), nullable=True, index=True)
 
     total_rules = Column(Integer)
     violations = relationship("Violation", back_populates="scan",cascade="all, delete-orphan")
     total_violations = Column(Integer)
 
+    # Change detection: tables / rules not re-evaluated because the
+    # table's fingerprint matched the previous scan
+    tables_checked = Column(Integer, nullable=True)
+    skipped_tables = Column(Integer, nullable=True)
+    skipped_rules = Column(Integer, nullable=True)
+
+    # Checkpoints: one per (rule, record-id range shard), committed as
+    # each finishes so an interrupted scan resumes from where it stopped
+    shards_total = Column(Integer, nullable=True)
+    shards_done = Column(Integer, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+    last_checkpoint_at = Column(DateTime, nullable=True)
+
     status = Column(String, default="Completed")
     duration_seconds = Column(Float, default=0.0)
 
+    # Where the time went: seconds per pipeline phase, per-rule query
+    # time and rows fetched (see scan_metrics.ScanTimer)
+    phase_timings = Column(JSON, nullable=True)
+
     scanned_at = Column(DateTime, default=datetime.utcnow)
 
-    target_db = relationship("TargetDatabase")
\ No newline at end of file
+    target_db = relationship("TargetDatabase")
+
+    @property
+    def stalled(self) -> bool:
+        """Still PROCESSING, but no checkpoint for longer than a live run would take."""
+
+        if self.status != "PROCESSING" or self.shards_total is None:
+            return False
+
+        last = self.last_checkpoint_at or self.scanned_at
+        return last is not None and last < datetime.utcnow() - timedelta(seconds=SCAN_STALE_SECONDS)
+
+    @property
+    def resumable(self) -> bool:
+        # Only registered targets: an upload or ad-hoc db_uri isn't kept
+        return (
+            self.target_db_id is not None
+            and self.shards_total is not None
+            and (self.shards_done or 0) < self.shards_total
+            and (self.status in ("INTERRUPTED", "CANCELLED") or self.stalled)
+        )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey
+from datetime import datetime
+from app.core.database import Base
+
+
+class ScanSummary(Base):
+    __tablename__ = "scan_summary"
+
+    # One row per scan, written when the scan completes
+    scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), primary_key=True)
+
+    total_violations = Column(Integer, nullable=False, default=0)
+    total_risk = Column(Integer, nullable=False, default=0)
+    min_risk = Column(Integer, nullable=True)
+    max_risk = Column(Integer, nullable=True)
+    distinct_rules = Column(Integer, nullable=False, default=0)
+
+    # Whether this scan has been added into risk_trend_buckets
+    trend_applied = Column(Boolean, nullable=False, default=False)
+
+    computed_at = Column(DateTime, default=datetime.utcnow)
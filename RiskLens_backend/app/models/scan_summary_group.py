@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.core.database import Base
+
+
+class ScanSummaryGroup(Base):
+    __tablename__ = "scan_summary_groups"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), nullable=False)
+
+    # Grain: (scan, table, rule, risk_value)
+    table_name = Column(String, nullable=False)
+    rule_id = Column(Integer, nullable=True)
+    risk_value = Column(Integer, nullable=False)
+
+    violation_count = Column(Integer, nullable=False)
+    risk_sum = Column(Integer, nullable=False)
+
+
+Index(
+    "idx_summary_group_grain",
+    ScanSummaryGroup.scan_id,
+    ScanSummaryGroup.table_name,
+    ScanSummaryGroup.rule_id,
+    ScanSummaryGroup.risk_value,
+    unique=True
+)
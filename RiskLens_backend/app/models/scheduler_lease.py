@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Float, DateTime
+from app.core.database import Base
+
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_lease"
+
+    # One row per scheduled job name; whoever holds it runs the job
+    name = Column(String, primary_key=True)
+
+    holder = Column(String, nullable=True)  # host:pid:nonce of the leader
+    acquired_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+    # Schedule state survives leader changes
+    next_run_at = Column(DateTime, nullable=True)
+    last_run_started_at = Column(DateTime, nullable=True)
+    last_run_finished_at = Column(DateTime, nullable=True)
+    last_run_lag_seconds = Column(Float, nullable=True)  # started_at - next_run_at
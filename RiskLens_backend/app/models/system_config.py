@@ -7,4 +7,9 @@ class SystemConfig(Base):
     id = Column(Integer, primary_key=True)
 
     auto_scan_enabled = Column(Boolean, default=True)
-    scan_interval_minutes = Column(Integer, default=5)
\ No newline at end of file
+    scan_interval_minutes = Column(Integer, default=5)
+
+    # Violation retention: scans older than this are archived, then removed
+    retention_enabled = Column(Boolean, default=False)
+    violation_retention_days = Column(Integer, default=90)
+    archive_before_delete = Column(Boolean, default=True)
\ No newline at end of file
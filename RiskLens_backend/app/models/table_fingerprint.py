@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class TableFingerprint(Base):
+    __tablename__ = "table_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    target_db_id = Column(Integer, ForeignKey("target_databases.id", ondelete="CASCADE"), nullable=False)
+    table_name = Column(String, nullable=False)
+
+    # Rules the last evaluation used; a policy change forces a rescan
+    policy_id = Column(Integer, nullable=True)
+
+    fingerprint = Column(String(64), nullable=False)
+
+    # Database-wide state when checked (SQLite file mtime/size); if it
+    # hasn't moved, no table needs to be queried at all
+    source_state = Column(String(64), nullable=True)
+
+    # Latest scan holding this table's violations (evaluated or carried forward)
+    last_scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="SET NULL"), nullable=True)
+
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+    # When the rules last actually ran against the table (not carried forward)
+    evaluated_at = Column(DateTime, nullable=True)
+
+
+Index("idx_fingerprint_target_table", TableFingerprint.target_db_id, TableFingerprint.table_name, unique=True)
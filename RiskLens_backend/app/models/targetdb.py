@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
 from app.core.database import Base
 
 class TargetDatabase(Base):
@@ -11,4 +11,15 @@ class TargetDatabase(Base):
     port = Column(Integer, nullable=False)
     username = Column(String, nullable=False)
     password = Column(String, nullable=False)
-    db_name = Column(String, nullable=False)
\ No newline at end of file
+    db_name = Column(String, nullable=False)
+
+    # Auto-scan: which policy's rules run here, and how often
+    policy_id = Column(Integer, ForeignKey("policies.id", ondelete="SET NULL"), nullable=True)
+    auto_scan_enabled = Column(Boolean, default=True)
+    scan_interval_minutes = Column(Integer, nullable=True)  # None = system interval
+
+    # Rules evaluated at once against this target (= its connection pool size)
+    max_concurrency = Column(Integer, default=2)
+
+    last_scanned_at = Column(DateTime, nullable=True)
+    next_scan_at = Column(DateTime, nullable=True)  # None = due now
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -16,7 +16,7 @@ class Violation(Base):
     scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"))
 
     # Where violation occurred
-    table_name = Column(String, nullable=False, index=True)
+    table_name = Column(String, nullable=False)
     record_id = Column(Integer, nullable=False, index=True)
 
     # Detailed info
@@ -24,11 +24,12 @@ class Violation(Base):
     actual_value = Column(String, nullable=True)
     expected_condition = Column(String, nullable=True)
     explanation = Column(String)
+    remediation = Column(Text, nullable=True)
 
     # 🔥 Numeric risk model
     risk_value = Column(Integer, nullable=False, default=1, index=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
     rule = relationship("Rule", back_populates="violations")
@@ -36,4 +37,27 @@ class Violation(Base):
 
 
 # Optional: Composite index for faster analytics
-Index("idx_scan_risk", Violation.scan_id, Violation.risk_value)
\ No newline at end of file
+Index("idx_scan_risk", Violation.scan_id, Violation.risk_value)
+
+# Keyset pagination: each filter column followed by the sort key.
+# Without the rule / table ones, a rule_id or table_name filter walks
+# idx_violation_scan_id_risk from the newest row and checks every table
+# row it passes (SQLite: "USING INDEX idx_violation_scan_id_risk
+# (scan_id>?)"), i.e. the whole table for a rare rule; with them it's a
+# covering range "(rule_id=? AND scan_id>?)". They also serve the plain
+# table_name lookups the old single-column index did.
+Index("idx_violation_rule_scan_id", Violation.rule_id, Violation.scan_id, Violation.id)
+Index("idx_violation_table_scan_id", Violation.table_name, Violation.scan_id, Violation.id)
+Index("idx_violation_scan_created_id", Violation.scan_id, Violation.created_at, Violation.id)
+
+# Risk range filter: a range can't lead a keyset index, so risk_value
+# trails the sort key and is checked in the index while walking it.
+# Unfiltered scan / time pages use these too (their prefixes)
+Index("idx_violation_scan_id_risk", Violation.scan_id, Violation.id, Violation.risk_value)
+Index("idx_violation_created_id_risk", Violation.created_at, Violation.id, Violation.risk_value)
+
+# Scan diff: EXISTS probe on (rule, table, record) within one scan, index-only
+Index(
+    "idx_violation_diff",
+    Violation.scan_id, Violation.rule_id, Violation.table_name, Violation.record_id
+)
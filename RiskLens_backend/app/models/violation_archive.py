@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class ViolationArchive(Base):
+    __tablename__ = "violation_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Calendar month (YYYY-MM) of the archived scans' scanned_at
+    period = Column(String(7), nullable=False, index=True)
+
+    format = Column(String, nullable=False)  # parquet / ndjson.gz / purged (deleted without a file)
+    file_path = Column(String, nullable=True)
+    file_size = Column(Integer, nullable=True)
+
+    scan_count = Column(Integer, nullable=False, default=0)
+    row_count = Column(Integer, nullable=False, default=0)
+
+    archived_at = Column(DateTime, default=datetime.utcnow)
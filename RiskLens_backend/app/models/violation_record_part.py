@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class ViolationRecordPart(Base):
+    __tablename__ = "violation_record_parts"
+
+    # Compact storage while a scan runs: one row per (shard, rule),
+    # committed with its checkpoint. Merged into one ViolationRecordSet
+    # per (scan, rule) when the scan is finalized, then deleted.
+    id = Column(Integer, primary_key=True, index=True)
+
+    scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), nullable=False)
+    rule_id = Column(Integer, ForeignKey("rules.id", ondelete="CASCADE"), nullable=True)
+
+    table_name = Column(String, nullable=False)
+    field_name = Column(String, nullable=False)
+    expected_condition = Column(String, nullable=True)
+    risk_value = Column(Integer, nullable=False, default=1)
+
+    # Same encoding as ViolationRecordSet.record_ids
+    record_ids = Column(LargeBinary, nullable=False)
+    record_count = Column(Integer, nullable=False)
+    min_record_id = Column(Integer, nullable=True)
+    max_record_id = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+Index("idx_record_part_scan_rule", ViolationRecordPart.scan_id, ViolationRecordPart.rule_id)
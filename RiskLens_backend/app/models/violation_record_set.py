@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class ViolationRecordSet(Base):
+    __tablename__ = "violation_record_sets"
+
+    # Compact storage: one row per (scan, rule) instead of one per violation
+    id = Column(Integer, primary_key=True, index=True)
+
+    scan_id = Column(Integer, ForeignKey("scan_history.id", ondelete="CASCADE"), nullable=False)
+    rule_id = Column(Integer, ForeignKey("rules.id", ondelete="CASCADE"), nullable=True)
+
+    # Constant for every violation of one rule in one scan
+    table_name = Column(String, nullable=False)
+    field_name = Column(String, nullable=False)
+    expected_condition = Column(String, nullable=True)
+    risk_value = Column(Integer, nullable=False, default=1)
+
+    # Offending record ids, see app/services/record_set.py
+    record_ids = Column(LargeBinary, nullable=False)
+    record_count = Column(Integer, nullable=False)
+    min_record_id = Column(Integer, nullable=True)
+    max_record_id = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+Index("idx_record_set_scan_rule", ViolationRecordSet.scan_id, ViolationRecordSet.rule_id, unique=True)
@@ -6,7 +6,22 @@ class PolicyResponse(BaseModel):
     id: int
     file_name: str
     extracted_text: Optional[str]
+    content_hash: Optional[str] = None
+    page_count: Optional[int] = None
+    pages_from_cache: Optional[int] = None
+    extraction_seconds: Optional[float] = None
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PolicySummary(BaseModel):
+    id: int
+    file_name: str
+    page_count: Optional[int]
+    extraction_seconds: Optional[float]
+    rule_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,17 +1,28 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 class ScanHistoryResponse(BaseModel):
     id: int
+    policy_id: Optional[int] = None
+    archive_id: Optional[int] = None
     scan_mode: str
     input_format: Optional[str]
     file_name: Optional[str]
     total_rules: Optional[int]
     total_violations: Optional[int]
+    tables_checked: Optional[int] = None
+    skipped_tables: Optional[int] = None
+    skipped_rules: Optional[int] = None
+    shards_total: Optional[int] = None
+    shards_done: Optional[int] = None
+    cancel_requested: Optional[bool] = None
+    last_checkpoint_at: Optional[datetime] = None
+    resumable: bool = False
     status: str
     duration_seconds: float
+    phase_timings: Optional[Dict[str, Any]] = None
     scanned_at: datetime
 
     class Config:
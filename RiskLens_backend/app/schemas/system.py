@@ -1,10 +1,14 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Optional
 
 class SystemConfigResponse(BaseModel):
     id: int
     auto_scan_enabled: bool
     scan_interval_minutes: int
+    retention_enabled: Optional[bool] = False
+    violation_retention_days: Optional[int] = 90
+    archive_before_delete: Optional[bool] = True
 
     class Config:
         from_attributes = True
@@ -12,4 +16,21 @@ class SystemConfigResponse(BaseModel):
 
 class SystemConfigUpdate(BaseModel):
     auto_scan_enabled: Optional[bool] = None
-    scan_interval_minutes: Optional[int] = None
\ No newline at end of file
+    scan_interval_minutes: Optional[int] = None
+    retention_enabled: Optional[bool] = None
+    violation_retention_days: Optional[int] = None
+    archive_before_delete: Optional[bool] = None
+
+
+class ViolationArchiveResponse(BaseModel):
+    id: int
+    period: str
+    format: str
+    file_path: Optional[str]
+    file_size: Optional[int]
+    scan_count: int
+    row_count: int
+    archived_at: datetime
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
@@ -0,0 +1,51 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class TargetCreate(BaseModel):
+    name: str
+    db_type: str
+    host: str = ""
+    port: int = 0
+    username: str = ""
+    password: str = ""
+    db_name: str
+    policy_id: Optional[int] = None
+    auto_scan_enabled: bool = True
+    scan_interval_minutes: Optional[int] = None
+    max_concurrency: int = 2
+
+
+class TargetUpdate(BaseModel):
+    name: Optional[str] = None
+    db_type: Optional[str] = None
+    host: Optional[str] = None
+    port: Optional[int] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+    db_name: Optional[str] = None
+    policy_id: Optional[int] = None
+    auto_scan_enabled: Optional[bool] = None
+    scan_interval_minutes: Optional[int] = None
+    max_concurrency: Optional[int] = None
+
+
+# Password is write-only
+class TargetResponse(BaseModel):
+    id: int
+    name: str
+    db_type: str
+    host: str
+    port: int
+    username: str
+    db_name: str
+    policy_id: Optional[int]
+    auto_scan_enabled: Optional[bool]
+    scan_interval_minutes: Optional[int]
+    max_concurrency: Optional[int]
+    last_scanned_at: Optional[datetime]
+    next_scan_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class ViolationResponse(BaseModel):
     id: int
@@ -11,4 +12,23 @@ class ViolationResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ViolationListItem(BaseModel):
+    id: int
+    scan_id: Optional[int]
+    rule_id: Optional[int]
+    table_name: str
+    record_id: int
+    field_name: str
+    actual_value: Optional[str]
+    expected_condition: Optional[str]
+    risk_value: int
+    severity: Optional[str]
+    created_at: datetime
+
+
+class ViolationPage(BaseModel):
+    items: List[ViolationListItem]
+    next_cursor: Optional[str]
+    limit: int
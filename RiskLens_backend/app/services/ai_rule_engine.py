@@ -1,12 +1,8 @@
-from groq import Groq
-import os
 import json
-from dotenv import load_dotenv
 from typing import List, Dict, Any
 
-load_dotenv()
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from app.core.config import RULE_EXTRACTION_MODEL
+from app.services.llm_client import get_llm_client
 
 ALLOWED_OPERATORS = {"=", "==", "!=", "<", ">", "<=", ">="}
 
@@ -14,7 +10,7 @@ ALLOWED_OPERATORS = {"=", "==", "!=", "<", ">", "<=", ">="}
 def extract_rules_with_ai(
     text: str,
     schema: Dict[str, List[str]],
-    model: str = "llama-3.3-70b-versatile",
+    model: str = RULE_EXTRACTION_MODEL,
     max_retries: int = 2
 ) -> List[Dict[str, Any]]:
     """
@@ -31,6 +27,12 @@ def extract_rules_with_ai(
     if not schema:
         return []
 
+    client = get_llm_client()
+
+    if client is None:
+        print("LLM client not configured (set GROQ_API_KEY or LLM_BASE_URL)")
+        return []
+
     schema_string = json.dumps(schema, indent=2, ensure_ascii=False)
 
     prompt = f"""
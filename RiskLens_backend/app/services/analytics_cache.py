@@ -0,0 +1,150 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import ANALYTICS_CACHE_MAX_ENTRIES, ANALYTICS_GENERATION_TTL_SECONDS
+from app.models.data_generation import DataGeneration
+
+
+_lock = threading.Lock()
+
+# (endpoint, params) -> (generation, etag, body)
+_responses: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Last generation read from the DB, and when
+_generation = {"value": None, "read_at": 0.0}
+
+stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+
+# ─────────────────────────────────────────────
+# Data Generation Counter
+# ─────────────────────────────────────────────
+def bump_data_generation(db: Session):
+    """
+    Invalidate every cached analytics response. Call inside the
+    transaction that writes scan data so readers never see the new
+    generation before the new data.
+    """
+
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+
+        # One statement, so two first scans on a fresh DB can't both INSERT id=1
+        db.execute(
+            upsert(DataGeneration)
+            .values(id=1, generation=1, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=["id"],
+                set_={"generation": DataGeneration.generation + 1, "updated_at": now}
+            )
+        )
+
+    else:
+        result = db.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == 1)
+            .values(generation=DataGeneration.generation + 1, updated_at=now)
+        )
+
+        if not result.rowcount:
+            db.add(DataGeneration(id=1, generation=1))
+            db.flush()
+
+    # This worker knows the data changed; don't wait for the TTL
+    with _lock:
+        _generation["value"] = None
+
+
+def current_generation(db: Session) -> int:
+    now = time.monotonic()
+
+    with _lock:
+        if (
+            _generation["value"] is not None
+            and now - _generation["read_at"] < ANALYTICS_GENERATION_TTL_SECONDS
+        ):
+            return _generation["value"]
+
+    value = db.query(DataGeneration.generation).filter(DataGeneration.id == 1).scalar() or 0
+
+    with _lock:
+        _generation["value"] = value
+        _generation["read_at"] = now
+
+    return value
+
+
+# ─────────────────────────────────────────────
+# Cached JSON Response with ETag
+# ─────────────────────────────────────────────
+def _etag(endpoint: str, params: Dict[str, Any], generation: int) -> str:
+    raw = json.dumps([endpoint, params, generation], sort_keys=True, default=str)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_response(
+    request: Request,
+    db: Session,
+    endpoint: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any]
+) -> Response:
+    """
+    Serve an analytics payload keyed by (endpoint, params, data generation).
+
+    304 when the client's If-None-Match is current, the stored body when
+    this worker already computed it for the current generation, otherwise
+    compute() once and store the result.
+    """
+
+    generation = current_generation(db)
+    etag = _etag(endpoint, params, generation)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        with _lock:
+            stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+
+    key = (endpoint, json.dumps(params, sort_keys=True, default=str))
+
+    with _lock:
+        entry = _responses.get(key)
+        if entry is not None and entry[0] == generation:
+            _responses.move_to_end(key)
+            stats["hits"] += 1
+            return Response(content=entry[2], media_type="application/json", headers=headers)
+
+    body = json.dumps(jsonable_encoder(compute())).encode("utf-8")
+
+    with _lock:
+        stats["misses"] += 1
+        _responses[key] = (generation, etag, body)
+        _responses.move_to_end(key)
+        while len(_responses) > ANALYTICS_CACHE_MAX_ENTRIES:
+            _responses.popitem(last=False)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,478 @@
+import select
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, bindparam, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import CDC_BATCH_SIZE, CDC_NOTIFY_CHANNEL
+from app.core.database import SessionLocal, build_target_url, create_dynamic_engine
+from app.models.change_capture import ChangeCaptureState
+from app.models.rule import Rule
+from app.models.scan_history import ScanHistory
+from app.models.targetdb import TargetDatabase
+from app.services.rollup_service import finalize_scan
+from app.services.scan_engine import (
+    CompiledRule,
+    compile_rules,
+    evaluate_rules,
+    introspect_schema,
+    persist_violations,
+)
+from app.services.scan_metrics import ScanTimer, observe_scan
+from app.services.target_scanner import get_target_engine
+
+
+CHANGE_LOG_TABLE = "risklens_change_log"
+TRIGGER_PREFIX = "risklens_cdc"
+
+# Largest IN (...) list sent to the target per query
+MAX_IDS_PER_QUERY = 500
+
+# Column lists are re-read at most this often per target
+SCHEMA_TTL_SECONDS = 60
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# ─────────────────────────────────────────────
+# Trigger DDL (per dialect)
+# ─────────────────────────────────────────────
+def _sqlite_install(conn, quote, tables: Dict[str, str]):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "  # ids never reused after pruning
+        "table_name TEXT NOT NULL, "
+        "record_id BIGINT, "
+        "op TEXT NOT NULL, "
+        "changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')))"
+    ))
+
+    for table, column in tables.items():
+        for op, event, row in (("I", "INSERT", "NEW"), ("U", "UPDATE", "NEW"), ("D", "DELETE", "OLD")):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {quote(f'{TRIGGER_PREFIX}_{table}_{op}')}"))
+            conn.execute(text(
+                f"CREATE TRIGGER {quote(f'{TRIGGER_PREFIX}_{table}_{op}')} "
+                f"AFTER {event} ON {quote(table)} BEGIN "
+                f"INSERT INTO {CHANGE_LOG_TABLE} (table_name, record_id, op) "
+                f"VALUES ({_literal(table)}, {row}.{quote(column)}, '{op}'); END"
+            ))
+
+
+def _postgres_install(conn, quote, tables: Dict[str, str]):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} ("
+        "id BIGSERIAL PRIMARY KEY, "
+        "table_name TEXT NOT NULL, "
+        "record_id BIGINT, "
+        "op CHAR(1) NOT NULL, "
+        "changed_at TIMESTAMP NOT NULL DEFAULT (clock_timestamp() AT TIME ZONE 'UTC'))"
+    ))
+
+    # One function for every table; the record id column comes in as TG_ARGV[0]
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {TRIGGER_PREFIX}_capture() RETURNS trigger AS $$
+        DECLARE
+            changed RECORD;
+            changed_id BIGINT;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN changed = OLD; ELSE changed = NEW; END IF;
+
+            EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) INTO changed_id USING changed;
+
+            INSERT INTO {CHANGE_LOG_TABLE} (table_name, record_id, op)
+            VALUES (TG_TABLE_NAME, changed_id, left(TG_OP, 1));
+
+            PERFORM pg_notify({_literal(CDC_NOTIFY_CHANNEL)}, TG_TABLE_NAME);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+
+    for table, column in tables.items():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX} ON {quote(table)}"))
+        conn.execute(text(
+            f"CREATE TRIGGER {TRIGGER_PREFIX} AFTER INSERT OR UPDATE OR DELETE ON {quote(table)} "
+            f"FOR EACH ROW EXECUTE FUNCTION {TRIGGER_PREFIX}_capture({_literal(column)})"
+        ))
+
+
+def non_integer_ids(engine: Engine, tables: Dict[str, str]) -> List[str]:
+    """
+    Tables whose record id column isn't an integer type. The change log
+    stores ids as BIGINT, so a trigger on one of these would fail every
+    write the target's own application makes to it.
+    """
+
+    inspector = inspect(engine)
+    rejected = []
+
+    for table, column in tables.items():
+        types = {col["name"]: col["type"] for col in inspector.get_columns(table)}
+
+        if not isinstance(types.get(column), Integer):
+            rejected.append(table)
+
+    return rejected
+
+
+def install_capture(engine: Engine, tables: Dict[str, str]):
+    """Create the change log and row triggers for {table: record id column}."""
+
+    rejected = non_integer_ids(engine, tables)
+    if rejected:
+        raise ValueError(f"Record id column isn't an integer on: {', '.join(rejected)}")
+
+    quote = engine.dialect.identifier_preparer.quote
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            _sqlite_install(conn, quote, tables)
+        elif engine.dialect.name == "postgresql":
+            _postgres_install(conn, quote, tables)
+        else:
+            raise ValueError(f"Change capture isn't supported on {engine.dialect.name}")
+
+
+def remove_capture(engine: Engine, tables: Dict[str, str]):
+    quote = engine.dialect.identifier_preparer.quote
+
+    with engine.begin() as conn:
+        for table in tables:
+            if engine.dialect.name == "sqlite":
+                for op in ("I", "U", "D"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {quote(f'{TRIGGER_PREFIX}_{table}_{op}')}"))
+            else:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX} ON {quote(table)}"))
+
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(f"DROP FUNCTION IF EXISTS {TRIGGER_PREFIX}_capture()"))
+
+        conn.execute(text(f"DROP TABLE IF EXISTS {CHANGE_LOG_TABLE}"))
+
+
+def pending_changes(engine: Engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {CHANGE_LOG_TABLE}")).scalar()
+
+
+# ─────────────────────────────────────────────
+# Evaluation of Changed Rows Only
+# ─────────────────────────────────────────────
+_schemas: Dict[int, tuple] = {}
+
+
+def _target_schema(target_id: int, engine: Engine) -> Dict[str, List[str]]:
+    cached = _schemas.get(target_id)
+
+    if cached is None or time.time() - cached[0] > SCHEMA_TTL_SECONDS:
+        cached = (time.time(), introspect_schema(engine))
+        _schemas[target_id] = cached
+
+    return cached[1]
+
+
+def restrict_to_records(
+    compiled: CompiledRule,
+    engine: Engine,
+    column: str,
+    record_ids: List[int]
+) -> CompiledRule:
+    """Same rule, evaluated only on the given record ids."""
+
+    quote = engine.dialect.identifier_preparer.quote
+
+    query = text(f"""
+        SELECT * FROM {quote(compiled.rule.table_name)}
+        WHERE {quote(column)} IN :record_ids
+        AND NOT ({quote(compiled.field)} {compiled.operator} :value)
+    """).bindparams(bindparam("record_ids", value=record_ids, expanding=True))
+
+    return CompiledRule(compiled.rule, query, compiled.field, compiled.operator, compiled.value)
+
+
+def _prune(engine: Engine, change_ids: List[int]):
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE id IN :ids").bindparams(
+                bindparam("ids", value=change_ids, expanding=True)
+            )
+        )
+
+
+def _as_utc(value) -> datetime:
+    # SQLite hands back the trigger's text timestamp
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+# ─────────────────────────────────────────────
+# Micro-batch Consumer
+# ─────────────────────────────────────────────
+_latencies: Dict[int, deque] = {}
+
+
+def consume_target(target_id: int, batch_size: int = CDC_BATCH_SIZE) -> int:
+    """
+    Evaluate the target's rules against the rows changed since the last
+    batch, as one scan_mode="cdc" scan. Returns the changes consumed.
+
+    Consumed log rows are deleted on the target only after the scan has
+    committed here: delivery is at-least-once, and a transaction that
+    commits late with a lower id is still picked up next batch.
+    """
+
+    db = SessionLocal()
+
+    try:
+        state = db.get(ChangeCaptureState, target_id)
+        target = db.get(TargetDatabase, target_id)
+
+        if state is None or not state.enabled or target is None or target.policy_id is None:
+            return 0
+
+        engine = get_target_engine(target)
+
+        with engine.connect() as conn:
+            changes = conn.execute(
+                text(
+                    f"SELECT id, table_name, record_id, changed_at FROM {CHANGE_LOG_TABLE} "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"limit": batch_size}
+            ).all()
+
+        if not changes:
+            return 0
+
+        started = time.time()
+
+        changed: Dict[str, set] = {}
+        for change in changes:
+            if change.table_name in state.tables and change.record_id is not None:
+                changed.setdefault(change.table_name, set()).add(change.record_id)
+
+        rules = (
+            db.query(Rule)
+            .filter(Rule.policy_id == target.policy_id, Rule.table_name.in_(list(changed)))
+            .all()
+        )
+        compiled = compile_rules(rules, _target_schema(target_id, engine), engine)
+
+        if not compiled:
+            # Only tables no rule reads changed
+            _prune(engine, [change.id for change in changes])
+            return len(changes)
+
+        log = ScanHistory(
+            target_db_id=target.id,
+            policy_id=target.policy_id,
+            scan_mode="cdc",
+            input_format="sql",
+            total_rules=len(compiled),
+            total_violations=0,
+            status="PROCESSING"
+        )
+        db.add(log)
+        db.flush()
+
+        violations = []
+        timer = ScanTimer()
+
+        with engine.connect() as conn:
+            for c in compiled:
+                record_ids = sorted(changed[c.rule.table_name])
+                column = state.tables[c.rule.table_name]
+
+                for i in range(0, len(record_ids), MAX_IDS_PER_QUERY):
+                    restricted = restrict_to_records(c, engine, column, record_ids[i:i + MAX_IDS_PER_QUERY])
+                    violations.extend(evaluate_rules(conn, [restricted], log.id, timer))
+
+        persist_started = time.perf_counter()
+        persist_violations(db, violations)
+        timer.persisted(time.perf_counter() - persist_started, len(violations))
+
+        with timer.phase("rollup"):
+            finalize_scan(db, log.id)
+
+        now = datetime.utcnow()
+        latencies = [(now - _as_utc(change.changed_at)).total_seconds() * 1000 for change in changes]
+
+        log.total_violations = len(violations)
+        log.status = "CDC_SUCCESS"
+        log.duration_seconds = time.time() - started
+        log.phase_timings = timer.merged_into(None)
+
+        state.last_change_id = max(state.last_change_id or 0, changes[-1].id)
+        state.batches = (state.batches or 0) + 1
+        state.changes_processed = (state.changes_processed or 0) + len(changes)
+        state.violations_found = (state.violations_found or 0) + len(violations)
+        state.last_batch_at = now
+        state.last_latency_ms = round(sum(latencies) / len(latencies), 3)
+        state.max_latency_ms = round(max(latencies), 3)
+
+        observe_scan(db, log.scan_mode, log.status, timer, log.duration_seconds)
+        db.commit()
+        _latencies.setdefault(target_id, deque(maxlen=1000)).extend(latencies)
+
+        _prune(engine, [change.id for change in changes])
+
+        return len(changes)
+
+    except Exception as e:
+        db.rollback()
+        print(f"Change capture error (target {target_id}):", e)
+        return 0
+
+    finally:
+        db.close()
+
+
+def consume_changes(batch_size: int = CDC_BATCH_SIZE) -> int:
+    with SessionLocal() as db:
+        target_ids = [
+            target_id for (target_id,) in
+            db.query(ChangeCaptureState.target_db_id).filter(ChangeCaptureState.enabled.is_(True)).all()
+        ]
+
+    listener.sync(target_ids)
+
+    return sum(consume_target(target_id, batch_size) for target_id in target_ids)
+
+
+def latency_percentiles(target_id: int) -> Optional[dict]:
+    window = sorted(_latencies.get(target_id, ()))
+
+    if not window:
+        return None
+
+    def pick(p):
+        return round(window[min(len(window) - 1, int(p * len(window)))], 3)
+
+    return {"samples": len(window), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "max_ms": window[-1]}
+
+
+# ─────────────────────────────────────────────
+# Wake-ups (LISTEN on PostgreSQL, polling elsewhere)
+# ─────────────────────────────────────────────
+class ChangeListener:
+    """
+    Holds one LISTEN connection per PostgreSQL target so the consumer
+    wakes as soon as a change commits instead of at the next poll.
+    Dedicated unpooled connections: they're held open indefinitely and
+    mustn't take a slot from the target's scan pool.
+    """
+
+    def __init__(self):
+        self._conns: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _listen(self, target: TargetDatabase):
+        engine = create_dynamic_engine(build_target_url(target), poolclass=NullPool)
+        raw = engine.raw_connection()
+
+        conn = raw.driver_connection
+        conn.autocommit = True
+        conn.cursor().execute(f'LISTEN "{CDC_NOTIFY_CHANNEL}"')
+
+        return engine, raw
+
+    def _drop(self, target_id: int):
+        entry = self._conns.pop(target_id, None)
+
+        if entry is not None:
+            try:
+                entry[1].close()
+            except Exception:
+                pass
+            entry[0].dispose()
+
+    def sync(self, target_ids: List[int]):
+        with self._lock:
+            for target_id in set(self._conns) - set(target_ids):
+                self._drop(target_id)
+
+            missing = [t for t in target_ids if t not in self._conns]
+
+            if not missing:
+                return
+
+            with SessionLocal() as db:
+                for target in db.query(TargetDatabase).filter(TargetDatabase.id.in_(missing)).all():
+                    if (target.db_type or "").lower() not in ("postgres", "postgresql"):
+                        continue
+
+                    try:
+                        self._conns[target.id] = self._listen(target)
+                    except Exception as e:
+                        print(f"Change capture LISTEN failed (target {target.id}):", e)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a notification arrives or timeout passes."""
+
+        with self._lock:
+            conns = {entry[1].driver_connection: target_id for target_id, entry in self._conns.items()}
+
+        if not conns:
+            time.sleep(timeout)
+            return False
+
+        try:
+            ready, _, _ = select.select(list(conns), [], [], timeout)
+        except (OSError, ValueError):
+            ready = []
+
+        for conn in ready:
+            try:
+                conn.poll()
+                conn.notifies.clear()
+            except Exception:
+                with self._lock:
+                    self._drop(conns[conn])
+
+        return bool(ready)
+
+    def close(self):
+        with self._lock:
+            for target_id in list(self._conns):
+                self._drop(target_id)
+
+
+listener = ChangeListener()
+
+
+# ─────────────────────────────────────────────
+# Status
+# ─────────────────────────────────────────────
+def capture_status(db, target: TargetDatabase) -> dict:
+    state = db.get(ChangeCaptureState, target.id)
+
+    if state is None:
+        return {"target_id": target.id, "installed": False}
+
+    try:
+        pending = pending_changes(get_target_engine(target))
+    except Exception:
+        pending = None
+
+    return {
+        "target_id": target.id,
+        "installed": True,
+        "enabled": state.enabled,
+        "tables": state.tables,
+        "installed_at": state.installed_at,
+        "pending_changes": pending,
+        "last_change_id": state.last_change_id,
+        "batches": state.batches,
+        "changes_processed": state.changes_processed,
+        "violations_found": state.violations_found,
+        "last_batch_at": state.last_batch_at,
+        "last_batch_latency_ms": state.last_latency_ms,
+        "last_batch_max_latency_ms": state.max_latency_ms,
+        "latency_window": latency_percentiles(target.id),
+    }
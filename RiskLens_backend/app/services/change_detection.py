@@ -0,0 +1,284 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, literal, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import AUTO_SCAN_MAX_SKIP_HOURS
+from app.models.scan_history import ScanHistory
+from app.models.table_fingerprint import TableFingerprint
+from app.models.violation import Violation
+from app.models.violation_record_set import ViolationRecordSet
+
+
+# Columns that, when present, catch in-place updates count + max(pk) would miss
+UPDATED_AT_COLUMNS = ("updated_at", "modified_at", "last_modified", "updated")
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────────────────────────
+# Fingerprints (one cheap query per dialect or table)
+# ─────────────────────────────────────────────
+def _postgres_fingerprints(engine: Engine, tables: Set[str]) -> Dict[str, str]:
+    """
+    Cumulative insert/update/delete counters from the statistics
+    collector: one catalog query for all tables, no table reads.
+    """
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT relname, n_tup_ins, n_tup_upd, n_tup_del "
+            "FROM pg_stat_user_tables WHERE schemaname = current_schema()"
+        )).all()
+
+    return {
+        name: _digest("pgstat", ins, upd, dele)
+        for name, ins, upd, dele in rows
+        if name in tables
+    }
+
+
+def source_state(engine: Engine) -> Optional[str]:
+    """Database-wide change marker, where one is available without queries."""
+
+    if engine.dialect.name != "sqlite":
+        return None
+
+    path = engine.url.database
+
+    if not path or path == ":memory:" or not os.path.exists(path):
+        return None
+
+    # WAL-mode writes land in the -wal file until a checkpoint
+    parts = []
+    for candidate in (path, path + "-wal"):
+        if os.path.exists(candidate):
+            stat = os.stat(candidate)
+            parts.extend((stat.st_mtime_ns, stat.st_size))
+
+    return _digest("file", *parts)
+
+
+def _update_markers(columns: List[str]) -> List[str]:
+    return [column for column in columns if column.lower() in UPDATED_AT_COLUMNS]
+
+
+def _generic_fingerprint(conn, engine: Engine, table: str, columns: List[str]) -> str:
+    quote = engine.dialect.identifier_preparer.quote
+
+    # evaluate_rules() takes the first column as the record id
+    expressions = ["COUNT(*)", f"MAX({quote(columns[0])})"]
+    expressions.extend(f"MAX({quote(column)})" for column in _update_markers(columns))
+
+    row = conn.execute(text(f"SELECT {', '.join(expressions)} FROM {quote(table)}")).one()
+
+    return _digest("generic", *row)
+
+
+def fingerprint_tables(
+    engine: Engine,
+    schema: Dict[str, List[str]],
+    tables: Iterable[str]
+) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    ({table: fingerprint}, blind tables). PostgreSQL reads
+    pg_stat_user_tables; other databases (and tables missing from the
+    stats view) use count + max(pk) + max(updated_at). Generic tables
+    with no updated_at-like column are blind: an in-place UPDATE leaves
+    their fingerprint as it was.
+    """
+
+    tables = {t for t in tables if schema.get(t)}
+    fingerprints = {}
+
+    if engine.dialect.name == "postgresql":
+        fingerprints = _postgres_fingerprints(engine, tables)
+
+    remaining = tables - set(fingerprints)
+
+    if remaining:
+        with engine.connect() as conn:
+            for table in remaining:
+                fingerprints[table] = _generic_fingerprint(conn, engine, table, schema[table])
+
+    blind = {table for table in remaining if not _update_markers(schema[table])}
+
+    return fingerprints, blind
+
+
+# ─────────────────────────────────────────────
+# Stored State
+# ─────────────────────────────────────────────
+def previous_fingerprints(db: Session, target_db_id: int) -> Dict[str, TableFingerprint]:
+    return {
+        row.table_name: row
+        for row in
+        db.query(TableFingerprint).filter(TableFingerprint.target_db_id == target_db_id).all()
+    }
+
+
+def unchanged_tables(
+    db: Session,
+    previous: Dict[str, TableFingerprint],
+    current: Dict[str, str],
+    policy_id: int,
+    blind: Set[str] = frozenset(),
+    max_skip_hours: float = AUTO_SCAN_MAX_SKIP_HOURS
+) -> Set[str]:
+    """
+    Tables safe to skip: same fingerprint, same policy, a fingerprint
+    that can see updates, evaluated within max_skip_hours, and the scan
+    holding their last result still has its raw violations.
+    """
+
+    evaluated_since = (
+        datetime.utcnow() - timedelta(hours=max_skip_hours) if max_skip_hours > 0 else None
+    )
+
+    candidates = {
+        table for table, fingerprint in current.items()
+        if table in previous
+        and table not in blind
+        and previous[table].fingerprint == fingerprint
+        and previous[table].policy_id == policy_id
+        and previous[table].last_scan_id is not None
+        and (
+            evaluated_since is None
+            or (previous[table].evaluated_at is not None
+                and previous[table].evaluated_at >= evaluated_since)
+        )
+    }
+
+    if not candidates:
+        return set()
+
+    usable_scans = {
+        scan_id for (scan_id,) in
+        db.query(ScanHistory.id)
+        .filter(
+            ScanHistory.id.in_({previous[t].last_scan_id for t in candidates}),
+            ScanHistory.archive_id.is_(None)
+        )
+        .all()
+    }
+
+    return {t for t in candidates if previous[t].last_scan_id in usable_scans}
+
+
+def detect_changes(
+    db: Session,
+    engine: Engine,
+    schema: Dict[str, List[str]],
+    tables: Iterable[str],
+    target_db_id: int,
+    policy_id: int
+) -> dict:
+    """
+    Fingerprint the tables a target's rules read and split them into
+    changed and unchanged. An unmoved SQLite file short-circuits to the
+    stored fingerprints without opening a connection; since nothing in
+    the file was written, even blind tables are safe to skip then.
+    """
+
+    tables = set(tables)
+    previous = previous_fingerprints(db, target_db_id)
+    state = source_state(engine)
+
+    if (
+        state is not None
+        and tables
+        and all(t in previous and previous[t].source_state == state for t in tables)
+    ):
+        current = {t: previous[t].fingerprint for t in tables}
+        blind = set()
+    else:
+        current, blind = fingerprint_tables(engine, schema, tables)
+
+    unchanged = unchanged_tables(db, previous, current, policy_id, blind)
+
+    return {
+        "previous": previous,
+        "current": current,
+        "source_state": state,
+        "unchanged": unchanged,
+        "carry_from": {t: previous[t].last_scan_id for t in unchanged},
+    }
+
+
+def record_fingerprints(
+    db: Session,
+    target_db_id: int,
+    policy_id: int,
+    plan: dict,
+    scan_id: Optional[int]
+):
+    now = datetime.utcnow()
+    previous = plan["previous"]
+
+    for table, fingerprint in plan["current"].items():
+        row = previous.get(table)
+
+        if row is None:
+            row = TableFingerprint(target_db_id=target_db_id, table_name=table)
+            db.add(row)
+
+        if row.fingerprint != fingerprint or row.policy_id != policy_id:
+            row.changed_at = now
+
+        row.fingerprint = fingerprint
+        row.source_state = plan["source_state"]
+        row.policy_id = policy_id
+        row.checked_at = now
+
+        if scan_id is not None:
+            row.last_scan_id = scan_id
+
+            if table not in plan["unchanged"]:
+                row.evaluated_at = now
+
+
+# ─────────────────────────────────────────────
+# Carry Forward (keeps partially skipped scans complete)
+# ─────────────────────────────────────────────
+def carry_forward_violations(
+    db: Session,
+    table_scans: Dict[str, int],
+    to_scan_id: int
+) -> int:
+    """
+    Copy unchanged tables' violations from the scan that last evaluated
+    them into the new scan, inside the database (INSERT ... SELECT).
+    """
+
+    copied = 0
+
+    by_scan: Dict[int, List[str]] = {}
+    for table, scan_id in table_scans.items():
+        by_scan.setdefault(scan_id, []).append(table)
+
+    for model, columns in (
+        (Violation, [
+            "rule_id", "table_name", "record_id", "field_name", "actual_value",
+            "expected_condition", "explanation", "remediation", "risk_value"
+        ]),
+        (ViolationRecordSet, [
+            "rule_id", "table_name", "field_name", "expected_condition", "risk_value",
+            "record_ids", "record_count", "min_record_id", "max_record_id"
+        ]),
+    ):
+        for from_scan_id, tables in by_scan.items():
+            source = (
+                select(literal(to_scan_id), *(getattr(model, c) for c in columns))
+                .where(model.scan_id == from_scan_id, model.table_name.in_(tables))
+            )
+
+            result = db.execute(insert(model).from_select(["scan_id", *columns], source))
+            copied += result.rowcount or 0
+
+    return copied
@@ -0,0 +1,423 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, insert, or_, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import SCAN_MAX_SHARDS, SCAN_SHARD_SIZE, SCAN_STALE_SECONDS
+from app.core.database import SessionLocal
+from app.models.rule import Rule
+from app.models.scan_checkpoint import ScanCheckpoint
+from app.models.scan_history import ScanHistory
+from app.models.targetdb import TargetDatabase
+from app.services.diff_service import drop_cached_diffs
+from app.services.rollup_service import finalize_scan
+from app.services.scan_metrics import ScanTimer, observe_scan
+from app.services.scan_engine import (
+    CompiledRule,
+    compile_rules,
+    evaluate_rules,
+    introspect_schema,
+    persist_violations,
+)
+
+
+# ─────────────────────────────────────────────
+# Shard Plan (record-id ranges per rule)
+# ─────────────────────────────────────────────
+def _shard_ranges(
+    low,
+    high,
+    row_count: int,
+    shard_size: int,
+    max_shards: int = SCAN_MAX_SHARDS
+) -> List[tuple]:
+    """
+    Equal-width ranges over [low, high]; the outer ones are open-ended
+    so rows inserted below or above during the scan are still covered.
+    The count follows the rows, not the id span: about row_count /
+    shard_size shards, never more than max_shards, so sparse or
+    snowflake-style ids can't explode the plan. Non-integer ids, or a
+    table smaller than one shard, get one shard.
+    """
+
+    if (
+        not isinstance(low, int) or not isinstance(high, int)
+        or isinstance(low, bool) or high - low < shard_size
+    ):
+        return [(None, None)]
+
+    shards = min(max_shards, -(-(row_count or 0) // shard_size))
+
+    if shards <= 1:
+        return [(None, None)]
+
+    # Ceiling division: the last shard ends past high
+    width = -(-(high - low + 1) // shards)
+    starts = list(range(low, high + 1, width))
+
+    return [
+        (None if i == 0 else start, None if i == len(starts) - 1 else start + width)
+        for i, start in enumerate(starts)
+    ]
+
+
+def plan_shards(
+    engine: Engine,
+    schema: Dict[str, List[str]],
+    compiled: List[CompiledRule],
+    shard_size: int = SCAN_SHARD_SIZE
+) -> List[dict]:
+    quote = engine.dialect.identifier_preparer.quote
+    bounds = {}
+
+    with engine.connect() as conn:
+        for table in {c.rule.table_name for c in compiled}:
+            # evaluate_rules() takes the first column as the record id
+            column = schema[table][0]
+            low, high, row_count = conn.execute(
+                text(f"SELECT MIN({quote(column)}), MAX({quote(column)}), COUNT(*) FROM {quote(table)}")
+            ).one()
+            bounds[table] = (column, _shard_ranges(low, high, row_count, shard_size))
+
+    plan = []
+
+    for c in compiled:
+        column, ranges = bounds[c.rule.table_name]
+
+        for index, (start, end) in enumerate(ranges):
+            plan.append({
+                "rule_id": c.rule.id,
+                "table_name": c.rule.table_name,
+                "record_column": column,
+                "shard_index": index,
+                "range_start": start,
+                "range_end": end,
+            })
+
+    return plan
+
+
+def create_checkpoints(db: Session, scan: ScanHistory, plan: List[dict]):
+    """Store the plan as PENDING checkpoints; commit it with the scan row."""
+
+    if plan:
+        db.execute(insert(ScanCheckpoint), [{"scan_id": scan.id, **shard} for shard in plan])
+
+    scan.shards_total = len(plan)
+    scan.shards_done = 0
+    scan.last_checkpoint_at = datetime.utcnow()
+
+
+def restrict_to_shard(compiled: CompiledRule, engine: Engine, checkpoint: ScanCheckpoint) -> CompiledRule:
+    if checkpoint.range_start is None and checkpoint.range_end is None:
+        return compiled
+
+    quote = engine.dialect.identifier_preparer.quote
+    column = quote(checkpoint.record_column)
+
+    bounds = []
+    if checkpoint.range_start is not None:
+        bounds.append(f"{column} >= :range_start")
+    if checkpoint.range_end is not None:
+        bounds.append(f"{column} < :range_end")
+
+    query = text(f"""
+        SELECT * FROM {quote(compiled.rule.table_name)}
+        WHERE {' AND '.join(bounds)}
+        AND NOT ({quote(compiled.field)} {compiled.operator} :value)
+    """).bindparams(
+        **{
+            name: value for name, value in
+            (("range_start", checkpoint.range_start), ("range_end", checkpoint.range_end))
+            if value is not None
+        }
+    )
+
+    return CompiledRule(compiled.rule, query, compiled.field, compiled.operator, compiled.value)
+
+
+# ─────────────────────────────────────────────
+# Running Checkpoints
+# ─────────────────────────────────────────────
+def _cancel_requested(scan_id: int) -> bool:
+    with SessionLocal() as db:
+        return bool(
+            db.query(ScanHistory.cancel_requested).filter(ScanHistory.id == scan_id).scalar()
+        )
+
+
+def run_checkpoints(
+    scan_id: int,
+    engine: Engine,
+    compiled: List[CompiledRule],
+    concurrency: int = 1,
+    timer: Optional[ScanTimer] = None
+) -> str:
+    """
+    Run the scan's PENDING checkpoints. Each shard's violations and its
+    DONE mark commit in one short transaction of their own, so a crash
+    loses at most the shards in flight and never duplicates rows.
+    Returns "DONE", or "CANCELLED" when a cancel was requested.
+    """
+
+    timer = timer or ScanTimer()
+
+    by_rule = {c.rule.id: c for c in compiled}
+
+    with SessionLocal() as db:
+        pending = (
+            db.query(ScanCheckpoint)
+            .filter(ScanCheckpoint.scan_id == scan_id, ScanCheckpoint.status == "PENDING")
+            .order_by(ScanCheckpoint.id)
+            .all()
+        )
+        db.expunge_all()
+
+    missing = {cp.rule_id for cp in pending} - set(by_rule)
+
+    if missing:
+        raise ValueError(f"Rules {sorted(missing, key=str)} no longer apply to this data source")
+
+    cancelled = threading.Event()
+
+    def run(checkpoint: ScanCheckpoint):
+        if cancelled.is_set():
+            return
+
+        if _cancel_requested(scan_id):
+            cancelled.set()
+            return
+
+        shard = restrict_to_shard(by_rule[checkpoint.rule_id], engine, checkpoint)
+
+        with engine.connect() as conn:
+            violations = evaluate_rules(conn, [shard], scan_id, timer)
+
+        now = datetime.utcnow()
+        persist_started = time.perf_counter()
+
+        with SessionLocal() as db:
+            persist_violations(db, violations)
+
+            db.execute(
+                update(ScanCheckpoint)
+                .where(ScanCheckpoint.id == checkpoint.id)
+                .values(status="DONE", violation_count=len(violations), completed_at=now)
+            )
+            db.execute(
+                update(ScanHistory)
+                .where(ScanHistory.id == scan_id)
+                .values(shards_done=ScanHistory.shards_done + 1, last_checkpoint_at=now)
+            )
+            db.commit()
+
+        timer.persisted(time.perf_counter() - persist_started, len(violations))
+
+    if concurrency <= 1 or len(pending) <= 1:
+        for checkpoint in pending:
+            run(checkpoint)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run, pending))
+
+    return "CANCELLED" if cancelled.is_set() else "DONE"
+
+
+def finish_checkpointed_scan(
+    db: Session,
+    scan_id: int,
+    outcome: str,
+    elapsed: float,
+    auto: bool = False,
+    timer: Optional[ScanTimer] = None
+) -> ScanHistory:
+    """Rollups and final status once every shard is done (or the scan was cancelled)."""
+
+    timer = timer or ScanTimer()
+
+    scan = db.get(ScanHistory, scan_id)
+    db.refresh(scan)
+
+    if outcome == "CANCELLED":
+        scan.status = "CANCELLED"
+    else:
+        with timer.phase("rollup"):
+            summary = finalize_scan(db, scan_id)
+
+        drop_cached_diffs(db, scan_id)
+        scan.total_violations = summary.total_violations
+
+        if auto:
+            scan.status = "AUTO_SUCCESS"
+        else:
+            scan.status = "SUCCESS" if summary.total_violations else "NO_VIOLATIONS"
+
+    scan.cancel_requested = False
+    scan.duration_seconds = round((scan.duration_seconds or 0.0) + elapsed, 4)
+    scan.phase_timings = timer.merged_into(scan.phase_timings)
+    observe_scan(db, scan.scan_mode, scan.status, timer, elapsed)
+    db.commit()
+
+    return scan
+
+
+def mark_interrupted(
+    db: Session,
+    scan_id: int,
+    elapsed: float,
+    failed_status: str = "FAILED",
+    timer: Optional[ScanTimer] = None
+) -> str:
+    """
+    After an error: INTERRUPTED if the scan can pick up again later,
+    otherwise the caller's failed status.
+    """
+
+    db.rollback()
+
+    scan = db.get(ScanHistory, scan_id)
+
+    if scan is None:
+        return failed_status
+
+    db.refresh(scan)
+    scan.status = "INTERRUPTED" if scan.target_db_id is not None and scan.shards_total is not None else failed_status
+    scan.duration_seconds = round((scan.duration_seconds or 0.0) + elapsed, 4)
+
+    if timer is not None:
+        scan.phase_timings = timer.merged_into(scan.phase_timings)
+
+    observe_scan(db, scan.scan_mode, scan.status, timer, elapsed)
+    db.commit()
+
+    return scan.status
+
+
+# ─────────────────────────────────────────────
+# Resume / Cancel
+# ─────────────────────────────────────────────
+def claim_for_resume(db: Session, scan_id: int) -> bool:
+    """
+    Compare-and-set back to PROCESSING, so two workers (or two clicks)
+    can't resume the same scan.
+    """
+
+    stale_before = datetime.utcnow() - timedelta(seconds=SCAN_STALE_SECONDS)
+
+    result = db.execute(
+        update(ScanHistory)
+        .where(
+            ScanHistory.id == scan_id,
+            or_(
+                ScanHistory.status.in_(("INTERRUPTED", "CANCELLED")),
+                and_(
+                    ScanHistory.status == "PROCESSING",
+                    func.coalesce(ScanHistory.last_checkpoint_at, ScanHistory.scanned_at) < stale_before
+                )
+            )
+        )
+        .values(status="PROCESSING", cancel_requested=False, last_checkpoint_at=datetime.utcnow())
+    )
+    db.commit()
+
+    return bool(result.rowcount)
+
+
+def resume_scan(scan_id: int):
+    """Run a claimed scan's remaining checkpoints against its registered target."""
+
+    # Avoid a cycle: target_scanner builds on this module
+    from app.services.target_scanner import get_target_engine
+
+    db = SessionLocal()
+    started = time.time()
+    timer = ScanTimer()
+
+    try:
+        scan = db.get(ScanHistory, scan_id)
+        target = db.get(TargetDatabase, scan.target_db_id)
+
+        if target is None:
+            raise ValueError("Target database no longer registered")
+
+        rule_ids = [
+            rule_id for (rule_id,) in
+            db.query(ScanCheckpoint.rule_id)
+            .filter(ScanCheckpoint.scan_id == scan_id, ScanCheckpoint.status == "PENDING")
+            .distinct()
+            .all()
+        ]
+        rules = db.query(Rule).filter(Rule.id.in_(rule_ids)).all()
+
+        engine = get_target_engine(target)
+
+        with timer.phase("schema_introspection"):
+            schema = introspect_schema(engine)
+
+        compiled = compile_rules(rules, schema, engine)
+        db.rollback()
+
+        outcome = run_checkpoints(scan_id, engine, compiled, max(1, target.max_concurrency or 1), timer)
+        finish_checkpointed_scan(db, scan_id, outcome, time.time() - started, timer=timer)
+
+    except Exception as e:
+        print(f"Scan resume error (scan {scan_id}):", e)
+        mark_interrupted(db, scan_id, time.time() - started, timer=timer)
+
+    finally:
+        db.close()
+
+
+def request_cancel(db: Session, scan: ScanHistory) -> str:
+    """
+    Ask a running scan to stop after its in-flight shards. A stalled
+    scan has no runner left to notice, so it's cancelled directly.
+    """
+
+    if scan.stalled:
+        scan.status = "CANCELLED"
+    else:
+        scan.cancel_requested = True
+
+    db.commit()
+
+    return scan.status if scan.status == "CANCELLED" else "CANCELLING"
+
+
+def checkpoint_progress(db: Session, scan_id: int) -> List[Dict]:
+    rows = (
+        db.query(
+            ScanCheckpoint.rule_id,
+            ScanCheckpoint.table_name,
+            func.count(),
+            func.sum(func.coalesce(ScanCheckpoint.violation_count, 0)),
+            func.max(ScanCheckpoint.completed_at)
+        )
+        .filter(ScanCheckpoint.scan_id == scan_id)
+        .group_by(ScanCheckpoint.rule_id, ScanCheckpoint.table_name)
+        .all()
+    )
+
+    done = dict(
+        db.query(ScanCheckpoint.rule_id, func.count())
+        .filter(ScanCheckpoint.scan_id == scan_id, ScanCheckpoint.status == "DONE")
+        .group_by(ScanCheckpoint.rule_id)
+        .all()
+    )
+
+    return [
+        {
+            "rule_id": rule_id,
+            "table_name": table,
+            "shards_total": total,
+            "shards_done": done.get(rule_id, 0),
+            "violations": int(violations or 0),
+            "last_completed_at": completed_at,
+        }
+        for rule_id, table, total, violations, completed_at in rows
+    ]
@@ -0,0 +1,297 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from app.models.scan_diff import ScanDiff
+from app.models.scan_history import ScanHistory, UNFINISHED_STATUSES
+from app.models.scan_summary_group import ScanSummaryGroup
+from app.models.violation import Violation
+from app.models.violation_record_set import ViolationRecordSet
+from app.services.record_set import EMPTY_SET, diff, encode_ids
+from app.services.scan_engine import is_compact_scan
+
+
+DIFF_KINDS = ("new", "resolved", "persisting")
+
+# No complete violation set to compare: still running / stopped part-way,
+# failed, or skipped as unchanged (nothing stored)
+NOT_DIFFABLE = UNFINISHED_STATUSES + ("FAILED", "AUTO_FAILED", "AUTO_UNCHANGED")
+
+
+# ─────────────────────────────────────────────
+# Which Scan to Compare Against
+# ─────────────────────────────────────────────
+def find_predecessor(db: Session, scan: ScanHistory) -> Optional[int]:
+    """
+    Latest earlier completed scan of the same target database, or of the
+    same policy when the scan wasn't against a registered target.
+    """
+
+    query = db.query(ScanHistory.id).filter(
+        ScanHistory.id < scan.id,
+        ScanHistory.status.notin_(NOT_DIFFABLE),
+        # Change-capture batches only cover the rows that changed
+        ScanHistory.scan_mode != "cdc"
+    )
+
+    if scan.target_db_id is not None:
+        query = query.filter(ScanHistory.target_db_id == scan.target_db_id)
+    elif scan.policy_id is not None:
+        query = query.filter(ScanHistory.policy_id == scan.policy_id)
+    else:
+        return None
+
+    return query.order_by(ScanHistory.id.desc()).limit(1).scalar()
+
+
+# ─────────────────────────────────────────────
+# Row Storage: one EXISTS pass in SQL
+# ─────────────────────────────────────────────
+def _rollup_counts(db: Session, scan_id: int) -> Dict[Tuple, int]:
+    rows = (
+        db.query(
+            ScanSummaryGroup.rule_id,
+            ScanSummaryGroup.table_name,
+            func.sum(ScanSummaryGroup.violation_count)
+        )
+        .filter(ScanSummaryGroup.scan_id == scan_id)
+        .group_by(ScanSummaryGroup.rule_id, ScanSummaryGroup.table_name)
+        .all()
+    )
+
+    return {(rule_id, table): int(count) for rule_id, table, count in rows}
+
+
+def _sql_diff(db: Session, base_scan_id: int, scan_id: int) -> List[Dict[str, Any]]:
+    """
+    Only the persisting count needs a join: per (rule, table) it's a
+    semi-join of the new scan against the base on (rule_id, table_name,
+    record_id), answered from idx_violation_diff. Both scans' totals
+    come from the rollups, so new = total - persisting and
+    resolved = base total - persisting.
+    """
+
+    current = aliased(Violation)
+    base = aliased(Violation)
+
+    in_base = (
+        select(base.id)
+        .where(
+            base.scan_id == base_scan_id,
+            base.rule_id == current.rule_id,
+            base.table_name == current.table_name,
+            base.record_id == current.record_id
+        )
+        .exists()
+    )
+
+    persisting = {
+        (rule_id, table): int(count)
+        for rule_id, table, count in
+        db.query(current.rule_id, current.table_name, func.count())
+        .filter(current.scan_id == scan_id, in_base)
+        .group_by(current.rule_id, current.table_name)
+        .all()
+    }
+
+    before = _rollup_counts(db, base_scan_id)
+    after = _rollup_counts(db, scan_id)
+
+    groups = []
+
+    for key in set(before) | set(after):
+        both = persisting.get(key, 0)
+        groups.append({
+            "rule_id": key[0],
+            "table_name": key[1],
+            "new": after.get(key, 0) - both,
+            "resolved": before.get(key, 0) - both,
+            "persisting": both,
+        })
+
+    return groups
+
+
+# ─────────────────────────────────────────────
+# Compact Storage: set operations on decoded id arrays
+# ─────────────────────────────────────────────
+def _id_sets(db: Session, scan_id: int) -> Dict[Tuple, bytes]:
+    record_sets = (
+        db.query(ViolationRecordSet.rule_id, ViolationRecordSet.table_name, ViolationRecordSet.record_ids)
+        .filter(ViolationRecordSet.scan_id == scan_id)
+        .all()
+    )
+
+    if record_sets:
+        return {(rule_id, table): blob for rule_id, table, blob in record_sets}
+
+    # Row-stored scan compared with a compact one
+    ids: Dict[Tuple, List[int]] = {}
+    for rule_id, table, record_id in (
+        db.query(Violation.rule_id, Violation.table_name, Violation.record_id)
+        .filter(Violation.scan_id == scan_id)
+        .yield_per(10000)
+    ):
+        ids.setdefault((rule_id, table), []).append(record_id)
+
+    return {key: encode_ids(values) for key, values in ids.items()}
+
+
+def _set_diff(db: Session, base_scan_id: int, scan_id: int) -> List[Dict[str, Any]]:
+    before = _id_sets(db, base_scan_id)
+    after = _id_sets(db, scan_id)
+
+    groups = []
+
+    for key in set(before) | set(after):
+        added, resolved, persisting = diff(before.get(key, EMPTY_SET), after.get(key, EMPTY_SET))
+        groups.append({
+            "rule_id": key[0],
+            "table_name": key[1],
+            "new": int(added.size),
+            "resolved": int(resolved.size),
+            "persisting": int(persisting.size),
+        })
+
+    return groups
+
+
+# ─────────────────────────────────────────────
+# Cached Summary
+# ─────────────────────────────────────────────
+def _require_raw_data(db: Session, *scan_ids: int):
+    incomplete = (
+        db.query(ScanHistory.id, ScanHistory.status)
+        .filter(ScanHistory.id.in_(scan_ids), ScanHistory.status.in_(NOT_DIFFABLE))
+        .first()
+    )
+
+    if incomplete:
+        raise HTTPException(
+            409, f"Scan {incomplete[0]} is {incomplete[1]}; it has no complete set of violations to diff"
+        )
+
+    archived = (
+        db.query(ScanHistory.id)
+        .filter(ScanHistory.id.in_(scan_ids), ScanHistory.archive_id.isnot(None))
+        .all()
+    )
+
+    if archived:
+        raise HTTPException(
+            409, f"Scan {archived[0][0]} was archived; its violations are no longer available to diff"
+        )
+
+
+def drop_cached_diffs(db: Session, scan_id: int):
+    """A scan's violations changed (e.g. it finished after a resume); its diffs are stale."""
+
+    db.query(ScanDiff).filter(
+        (ScanDiff.scan_id == scan_id) | (ScanDiff.base_scan_id == scan_id)
+    ).delete(synchronize_session=False)
+
+
+def diff_summary(db: Session, base_scan_id: int, scan_id: int, refresh: bool = False) -> Dict[str, Any]:
+    # Checked before the cache too: nothing unfinished is served or stored
+    _require_raw_data(db, base_scan_id, scan_id)
+
+    cached = (
+        db.query(ScanDiff)
+        .filter(ScanDiff.base_scan_id == base_scan_id, ScanDiff.scan_id == scan_id)
+        .first()
+    )
+
+    if cached is not None and not refresh:
+        return {**cached.summary, "cached": True, "compute_ms": cached.compute_ms}
+
+    started = time.perf_counter()
+
+    if is_compact_scan(db, base_scan_id) or is_compact_scan(db, scan_id):
+        groups = _set_diff(db, base_scan_id, scan_id)
+    else:
+        groups = _sql_diff(db, base_scan_id, scan_id)
+
+    groups.sort(key=lambda g: (g["rule_id"] is None, g["rule_id"] or 0, g["table_name"]))
+
+    summary = {
+        "base_scan_id": base_scan_id,
+        "scan_id": scan_id,
+        "totals": {kind: sum(g[kind] for g in groups) for kind in DIFF_KINDS},
+        "groups": groups,
+    }
+
+    compute_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    if cached is None:
+        db.add(ScanDiff(base_scan_id=base_scan_id, scan_id=scan_id, summary=summary, compute_ms=compute_ms))
+    else:
+        cached.summary = summary
+        cached.compute_ms = compute_ms
+
+    db.commit()
+
+    return {**summary, "cached": False, "compute_ms": compute_ms}
+
+
+# ─────────────────────────────────────────────
+# Record Ids for One Bucket (keyset on record_id)
+# ─────────────────────────────────────────────
+def diff_records(
+    db: Session,
+    base_scan_id: int,
+    scan_id: int,
+    kind: str,
+    rule_id: int,
+    table_name: str,
+    after_record_id: Optional[int] = None,
+    limit: int = 1000
+) -> List[int]:
+
+    _require_raw_data(db, base_scan_id, scan_id)
+
+    key = (rule_id, table_name)
+
+    if is_compact_scan(db, base_scan_id) or is_compact_scan(db, scan_id):
+        before = _id_sets(db, base_scan_id).get(key, EMPTY_SET)
+        after = _id_sets(db, scan_id).get(key, EMPTY_SET)
+        ids = diff(before, after)[DIFF_KINDS.index(kind)]
+
+        if after_record_id is not None:
+            ids = ids[ids > after_record_id]
+
+        return ids[:limit].tolist()
+
+    # Resolved rows live in the base scan; new / persisting in the current one
+    source_scan, other_scan = (base_scan_id, scan_id) if kind == "resolved" else (scan_id, base_scan_id)
+
+    source = aliased(Violation)
+    other = aliased(Violation)
+
+    match = (
+        select(other.id)
+        .where(
+            other.scan_id == other_scan,
+            other.rule_id == source.rule_id,
+            other.table_name == source.table_name,
+            other.record_id == source.record_id
+        )
+        .exists()
+    )
+
+    query = db.query(source.record_id).filter(
+        source.scan_id == source_scan,
+        source.rule_id == rule_id,
+        source.table_name == table_name,
+        match if kind == "persisting" else ~match
+    )
+
+    if after_record_id is not None:
+        query = query.filter(source.record_id > after_record_id)
+
+    return [
+        record_id for (record_id,) in
+        query.order_by(source.record_id).limit(limit).all()
+    ]
@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy.sql import Select
+
+from app.core.config import EXPORT_BATCH_SIZE
+from app.core.database import SessionLocal
+from app.services.record_set import decode_array
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+# ─────────────────────────────────────────────
+# Server-side Cursor
+# ─────────────────────────────────────────────
+def iter_batches(stmt: Select, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[tuple]]:
+    """
+    Yield result rows in batches of batch_size from a server-side cursor.
+
+    Opens its own session: the generator outlives the request handler,
+    so it can't borrow the request-scoped one from get_db.
+    """
+
+    db = SessionLocal()
+
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+    finally:
+        db.close()
+
+
+def iter_record_set_batches(
+    stmt: Select,
+    columns: Sequence[str],
+    record_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[List[tuple]]:
+    """
+    Compact-stored violations as rows of columns: one row per record id
+    of every record set stmt selects (it must select record_ids). Columns
+    a record set doesn't keep (id, actual_value, ...) come out as None.
+    """
+
+    position = list(columns).index("record_id")
+
+    db = SessionLocal()
+
+    try:
+        batch = []
+
+        # Few rows, but each blob can hold millions of ids
+        for row in db.execute(stmt.execution_options(yield_per=16)).mappings():
+            ids = decode_array(row["record_ids"])
+
+            if record_id is not None:
+                ids = ids[ids == record_id]
+
+            values = [row.get(column) for column in columns]
+
+            for value in ids.tolist():
+                values[position] = value
+                batch.append(tuple(values))
+
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    finally:
+        db.close()
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# ─────────────────────────────────────────────
+# Encoders (one output chunk per batch)
+# ─────────────────────────────────────────────
+def csv_chunks(columns: Sequence[str], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(columns: Sequence[str], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps(dict(zip(columns, map(_plain, row))))
+            for row in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file whose buffered bytes can be taken after each row
+    group. tell() keeps counting across drains so the Parquet footer
+    offsets stay correct.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(stmt: Select, columns: Sequence[str]):
+    import pyarrow as pa
+    from sqlalchemy import Boolean, DateTime, Float, Integer
+
+    fields = []
+
+    for name, column in zip(columns, stmt.selected_columns):
+        column_type = column.type
+
+        if isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+
+        fields.append(pa.field(name, arrow_type))
+
+    return pa.schema(fields)
+
+
+def parquet_chunks(
+    columns: Sequence[str],
+    batches: Iterable[List[tuple]],
+    schema
+) -> Iterator[bytes]:
+    # Optional dependency; checked by the caller before streaming starts
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    for batch in batches:
+        table = pa.Table.from_pydict(
+            {column: [row[i] for row in batch] for i, column in enumerate(columns)},
+            schema=schema
+        )
+
+        # One row group per batch
+        writer.write_table(table)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    # Sync-flush per chunk so each batch reaches the client right away
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
+
+
+def export_stream(
+    stmt: Select,
+    columns: Sequence[str],
+    fmt: str,
+    gzip: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    batches: Optional[Iterable[List[tuple]]] = None
+) -> Iterator[bytes]:
+    """
+    Encode stmt's rows as fmt, batch by batch. Memory is bounded by one
+    batch (plus one row group for Parquet), whatever the result size.
+    Pass batches to encode other rows in stmt's column layout.
+    """
+
+    if batches is None:
+        batches = iter_batches(stmt, batch_size)
+
+    if fmt == "parquet":
+        chunks = parquet_chunks(columns, batches, _arrow_schema(stmt, columns))
+    elif fmt == "ndjson":
+        chunks = ndjson_chunks(columns, batches)
+    else:
+        chunks = csv_chunks(columns, batches)
+
+    if gzip:
+        chunks = gzip_chunks(chunks)
+
+    return chunks
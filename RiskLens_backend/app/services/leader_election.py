@@ -0,0 +1,229 @@
+import hashlib
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, create_engine, or_, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import NullPool
+
+from app.core.config import DATABASE_URL, SCHEDULER_LEASE_TTL_SECONDS
+from app.core.database import SessionLocal, engine
+from app.models.scheduler_lease import SchedulerLease
+
+
+class LeaderLease:
+    """
+    Elects one process to run a named job.
+
+    PostgreSQL: a session-level pg_try_advisory_lock held on a dedicated
+    connection; the server frees it the moment that connection dies.
+    Elsewhere: compare-and-set on a scheduler_lease row with an expiry
+    that the leader keeps pushing forward via heartbeat().
+
+    The lease row is written in both modes so holder, heartbeat and
+    schedule state are visible to every worker.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int = SCHEDULER_LEASE_TTL_SECONDS):
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.backend = "advisory_lock" if engine.dialect.name == "postgresql" else "lease_row"
+
+        self._leader = threading.Event()
+        self._lock = threading.Lock()
+        self._lock_engine = None
+        self._lock_conn = None
+
+    @property
+    def advisory_key(self) -> int:
+        return int.from_bytes(hashlib.sha1(self.name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+    def is_leader(self) -> bool:
+        return self._leader.is_set()
+
+    # ─────────────────────────────────────────
+    # Acquire / Renew
+    # ─────────────────────────────────────────
+    def try_acquire(self) -> bool:
+        """Acquire the lease, or renew it if already held. Returns leadership."""
+
+        with self._lock:
+            try:
+                if self.backend == "advisory_lock":
+                    held = self._advisory_acquire()
+                else:
+                    held = self._row_acquire()
+            except Exception as e:
+                print(f"Leader lease '{self.name}' check failed:", e)
+                self._drop_advisory()
+                held = False
+
+            if held:
+                self._leader.set()
+            else:
+                self._leader.clear()
+
+            return held
+
+    heartbeat = try_acquire
+
+    def _row_acquire(self) -> bool:
+        now = datetime.utcnow()
+
+        with SessionLocal() as db:
+            result = db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(
+                        SchedulerLease.holder == self.holder_id,
+                        SchedulerLease.expires_at.is_(None),
+                        SchedulerLease.expires_at < now
+                    )
+                )
+                .values(
+                    holder=self.holder_id,
+                    acquired_at=case(
+                        (SchedulerLease.holder == self.holder_id, SchedulerLease.acquired_at),
+                        else_=now
+                    ),
+                    heartbeat_at=now,
+                    expires_at=now + self.ttl
+                )
+            )
+
+            if result.rowcount:
+                db.commit()
+                return True
+
+            if db.get(SchedulerLease, self.name) is not None:
+                db.rollback()
+                return False
+
+            try:
+                db.add(SchedulerLease(
+                    name=self.name,
+                    holder=self.holder_id,
+                    acquired_at=now,
+                    heartbeat_at=now,
+                    expires_at=now + self.ttl
+                ))
+                db.commit()
+                return True
+            except IntegrityError:
+                # Another worker created it first
+                db.rollback()
+                return False
+
+    def _advisory_acquire(self) -> bool:
+        if self._lock_conn is None:
+            if self._lock_engine is None:
+                # Own unpooled connection: closing it must really release the lock
+                self._lock_engine = create_engine(DATABASE_URL, poolclass=NullPool)
+
+            conn = self._lock_engine.connect()
+            got = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.advisory_key}
+            ).scalar()
+            conn.commit()
+
+            if not got:
+                conn.close()
+                return False
+
+            self._lock_conn = conn
+        else:
+            # Still connected means still locked
+            self._lock_conn.execute(text("SELECT 1"))
+            self._lock_conn.commit()
+
+        now = datetime.utcnow()
+
+        with SessionLocal() as db:
+            row = db.get(SchedulerLease, self.name)
+
+            if row is None:
+                row = SchedulerLease(name=self.name)
+                db.add(row)
+
+            if row.holder != self.holder_id:
+                row.holder = self.holder_id
+                row.acquired_at = now
+
+            row.heartbeat_at = now
+            row.expires_at = now + self.ttl
+            db.commit()
+
+        return True
+
+    # ─────────────────────────────────────────
+    # Release
+    # ─────────────────────────────────────────
+    def _drop_advisory(self):
+        if self._lock_conn is not None:
+            try:
+                self._lock_conn.close()
+            except Exception:
+                pass
+            self._lock_conn = None
+
+    def release(self):
+        """Step down so another worker can take over without waiting for the TTL."""
+
+        with self._lock:
+            was_leader = self._leader.is_set()
+            self._leader.clear()
+            self._drop_advisory()
+
+            if not was_leader:
+                return
+
+            try:
+                with SessionLocal() as db:
+                    db.execute(
+                        update(SchedulerLease)
+                        .where(
+                            SchedulerLease.name == self.name,
+                            SchedulerLease.holder == self.holder_id
+                        )
+                        .values(expires_at=datetime.utcnow())
+                    )
+                    db.commit()
+            except Exception as e:
+                print(f"Leader lease '{self.name}' release failed:", e)
+
+
+def lease_status(lease: LeaderLease, now: Optional[datetime] = None) -> dict:
+    now = now or datetime.utcnow()
+
+    with SessionLocal() as db:
+        row = db.get(SchedulerLease, lease.name)
+
+    if row is None:
+        return {"name": lease.name, "backend": lease.backend, "holder": None, "this_worker": lease.holder_id}
+
+    def age(ts):
+        return round((now - ts).total_seconds(), 3) if ts else None
+
+    return {
+        "name": lease.name,
+        "backend": lease.backend,
+        "holder": row.holder,
+        "this_worker": lease.holder_id,
+        "is_leader": lease.is_leader(),
+        "acquired_at": row.acquired_at,
+        "heartbeat_at": row.heartbeat_at,
+        "heartbeat_age_seconds": age(row.heartbeat_at),
+        "expires_at": row.expires_at,
+        "lease_expired": bool(row.expires_at and row.expires_at < now),
+        "next_run_at": row.next_run_at,
+        "lag_seconds": max(0.0, age(row.next_run_at)) if row.next_run_at else 0.0,
+        "last_run_started_at": row.last_run_started_at,
+        "last_run_finished_at": row.last_run_finished_at,
+        "last_run_lag_seconds": row.last_run_lag_seconds,
+    }
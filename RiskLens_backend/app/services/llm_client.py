@@ -0,0 +1,44 @@
+import threading
+from typing import Optional
+
+from groq import Groq
+
+from app.core.config import (
+    GROQ_API_KEY,
+    LLM_BASE_URL,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+)
+
+_client: Optional[Groq] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> Optional[Groq]:
+    """
+    Shared chat-completions client for all AI services.
+
+    Points at LLM_BASE_URL when set (local mock server, proxy, other
+    OpenAI-compatible provider), otherwise at Groq itself.
+    Returns None when no API key and no custom endpoint are configured.
+    """
+
+    global _client
+
+    if _client is not None:
+        return _client
+
+    if not GROQ_API_KEY and not LLM_BASE_URL:
+        return None
+
+    with _client_lock:
+        if _client is None:
+            _client = Groq(
+                # Local endpoints don't check the key, but the SDK requires one
+                api_key=GROQ_API_KEY or "local",
+                base_url=LLM_BASE_URL,
+                timeout=LLM_TIMEOUT_SECONDS,
+                max_retries=LLM_MAX_RETRIES,
+            )
+
+    return _client
@@ -1,9 +1,304 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Any
+
 from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
 from fastapi import HTTPException
 
+from app.core.config import PDF_PARALLEL_MIN_PAGES, PDF_MAX_WORKERS, PDF_CACHE_DIR, PDF_CACHE_MAX_MB
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # One long-lived pool; spinning workers up per upload would eat the gain
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_MAX_WORKERS)
+
+    return _pool
+
+
+# ─────────────────────────────────────────────
+# Text Cache (per document and per page)
+# ─────────────────────────────────────────────
+def _cache_path(kind: str, key: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, kind, key[:2], f"{key}.json")
+
+
+def _cache_get(kind: str, key: str) -> Optional[Dict[str, Any]]:
+    path = _cache_path(kind, key)
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            value = json.load(f)
+
+        # mtime doubles as last use for eviction
+        os.utime(path)
+        return value
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_put(kind: str, key: str, value: Dict[str, Any]):
+    path = _cache_path(kind, key)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    except OSError as e:
+        print("PDF cache write failed:", e)
+
+
+_evict_lock = threading.Lock()
+
+
+def enforce_cache_limit(max_bytes: int = PDF_CACHE_MAX_MB * 1024 * 1024) -> int:
+    """Delete least recently used cache entries until the cache fits. Returns files removed."""
+
+    if not os.path.isdir(PDF_CACHE_DIR):
+        return 0
+
+    with _evict_lock:
+        entries = []
+        total = 0
+
+        for root, _, names in os.walk(PDF_CACHE_DIR):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+
+                path = os.path.join(root, name)
+
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total -= size
+            removed += 1
+
+    return removed
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+# Bumped whenever what _page_hash covers changes, so old entries stop matching
+_PAGE_HASH_VERSION = b"page-v3;"
+
+# Deeper object graphs (or /Parent chains) aren't hashed; the page is
+# extracted every time instead of being cached
+_MAX_OBJECT_DEPTH = 64
+
+
+class _Unhashable(Exception):
+    """Page can't be fingerprinted (too deep, or a stream that won't decode)."""
+
+
+def _object_digest(obj, memo: dict, active: set, depth: int = 0) -> Tuple[bytes, frozenset]:
+    """
+    SHA-256 of a PDF object graph: dictionaries in key order, streams by
+    their decoded bytes. Image data can't change extracted text and is
+    skipped; so are /Parent back-references.
+
+    Indirect objects are memoised in memo by (idnum, generation) for the
+    whole document, so fonts and XObjects shared by many pages are
+    hashed once. A digest that passes through a reference to an object
+    still being hashed (a cycle) depends on where the walk entered, so
+    it's returned with those open references and not memoised.
+    """
+
+    if depth > _MAX_OBJECT_DEPTH:
+        raise _Unhashable("object graph too deep")
+
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+
+        if key in memo:
+            return memo[key], frozenset()
+
+        if key in active:
+            return hashlib.sha256(f"@{obj.idnum} {obj.generation};".encode("utf-8")).digest(), frozenset([key])
+
+        active.add(key)
+        try:
+            digest, open_refs = _object_digest(obj.get_object(), memo, active, depth + 1)
+        finally:
+            active.discard(key)
+
+        open_refs = open_refs - {key}
+        if not open_refs:
+            memo[key] = digest
+
+        return digest, open_refs
+
+    digest = hashlib.sha256()
+    open_refs = set()
+
+    if isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+
+        for key in sorted(obj):
+            if key == "/Parent":
+                continue
+
+            child, refs = _object_digest(obj.raw_get(key), memo, active, depth + 1)
+            digest.update(f"{key} ".encode("utf-8"))
+            digest.update(child)
+            open_refs.update(refs)
+
+        digest.update(b">>")
+
+        if isinstance(obj, StreamObject) and obj.get("/Subtype") != "/Image":
+            try:
+                digest.update(obj.get_data())
+            except Exception as e:
+                raise _Unhashable(f"stream won't decode: {e}")
+
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+
+        for item in obj:
+            child, refs = _object_digest(item, memo, active, depth + 1)
+            digest.update(child)
+            open_refs.update(refs)
+
+        digest.update(b"]")
+
+    else:
+        digest.update(f"{obj!r};".encode("utf-8"))
+
+    return digest.digest(), frozenset(open_refs)
+
+
+def _inherited(page, key: str):
+    """
+    A page attribute, looked up through the /Pages tree the way the
+    spec lets /Resources be inherited from an ancestor node.
+    """
+
+    node = page
+
+    for _ in range(_MAX_OBJECT_DEPTH):
+        if node is None:
+            return None
+
+        if key in node:
+            return node.raw_get(key)
+
+        node = node.get("/Parent")
+
+    raise _Unhashable("/Parent chain too deep")
+
+
+def _page_hash(page, memo: dict) -> Optional[str]:
+    """
+    Fingerprint of everything extract_text() reads for a page: its
+    content stream plus the whole resource tree (its own or inherited),
+    i.e. fonts with their /Encoding, /ToUnicode and widths, and Form
+    XObjects (drawn with /Do) with their own resources. Unchanged pages
+    of a revised PDF hash equal; pages that only differ inside a form
+    don't. Pass the same memo for every page of a document. None if the
+    page can't be fingerprinted.
+    """
+
+    digest = hashlib.sha256(_PAGE_HASH_VERSION)
 
-def extract_text_from_pdf(file_path: str) -> str:
     try:
+        contents = page.get_contents()
+        if contents is not None:
+            digest.update(contents.get_data())
+
+        digest.update(b"|resources|")
+        resources, _ = _object_digest(_inherited(page, "/Resources"), memo, set())
+        digest.update(resources)
+
+    except _Unhashable:
+        return None
+
+    return digest.hexdigest()
+
+
+# ─────────────────────────────────────────────
+# Worker (runs in the process pool)
+# ─────────────────────────────────────────────
+def _extract_pages(file_path: str, indices: List[int]) -> List[Tuple[int, str]]:
+    reader = PdfReader(file_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in indices]
+
+
+def _chunks(items: List[int], count: int) -> List[List[int]]:
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ─────────────────────────────────────────────
+# Extraction
+# ─────────────────────────────────────────────
+def extract_pdf(file_path: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract text from a PDF, reusing cached work where possible.
+
+    Whole documents are cached by content hash; pages are cached by page
+    fingerprint so a revised upload only re-extracts the pages that
+    changed. Large documents are extracted on a process pool.
+
+    Returns text plus stats: page_count, pages_from_cache,
+    extraction_seconds and content_hash.
+    """
+
+    started = time.perf_counter()
+
+    try:
+        content_hash = content_hash or file_sha256(file_path)
+
+        cached_doc = _cache_get("doc", content_hash)
+        if cached_doc is not None:
+            return {
+                "text": cached_doc["text"],
+                "page_count": cached_doc["page_count"],
+                "pages_from_cache": cached_doc["page_count"],
+                "extraction_seconds": round(time.perf_counter() - started, 4),
+                "content_hash": content_hash,
+            }
+
         reader = PdfReader(file_path)
 
         if reader.is_encrypted:
@@ -12,14 +307,39 @@ def extract_text_from_pdf(file_path: str) -> str:
                 detail="Encrypted PDFs are not supported"
             )
 
-        text_parts = []
+        page_count = len(reader.pages)
+        memo: dict = {}
+        page_hashes = [_page_hash(page, memo) for page in reader.pages]
+
+        page_texts: Dict[int, str] = {}
+
+        for i, h in enumerate(page_hashes):
+            cached_page = _cache_get("page", h) if h is not None else None
+            if cached_page is not None:
+                page_texts[i] = cached_page["text"]
+
+        pages_from_cache = len(page_texts)
+        pending = [i for i in range(page_count) if i not in page_texts]
+
+        if len(pending) >= PDF_PARALLEL_MIN_PAGES and PDF_MAX_WORKERS > 1:
+            pool = _get_pool()
+            futures = [
+                pool.submit(_extract_pages, file_path, chunk)
+                for chunk in _chunks(pending, PDF_MAX_WORKERS * 4)
+            ]
+            extracted = [pair for future in futures for pair in future.result()]
+        else:
+            extracted = [(i, reader.pages[i].extract_text() or "") for i in pending]
 
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
+        for i, page_text in extracted:
+            page_texts[i] = page_text
 
-        full_text = "\n".join(text_parts).strip()
+            if page_hashes[i] is not None:
+                _cache_put("page", page_hashes[i], {"text": page_text})
+
+        full_text = "\n".join(
+            page_texts[i] for i in range(page_count) if page_texts[i]
+        ).strip()
 
         if not full_text:
             raise HTTPException(
@@ -27,10 +347,26 @@ def extract_text_from_pdf(file_path: str) -> str:
                 detail="No readable text found in PDF"
             )
 
-        return full_text
+        _cache_put("doc", content_hash, {"text": full_text, "page_count": page_count})
+        enforce_cache_limit()
+
+        return {
+            "text": full_text,
+            "page_count": page_count,
+            "pages_from_cache": pages_from_cache,
+            "extraction_seconds": round(time.perf_counter() - started, 4),
+            "content_hash": content_hash,
+        }
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to extract PDF text: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    return extract_pdf(file_path)["text"]
@@ -0,0 +1,109 @@
+import zlib
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+# Blob layout: 1 header byte (delta width in bytes) + zlib(deltas).
+# Ids are sorted and de-duplicated, then stored as zigzag-encoded deltas
+# in the narrowest unsigned width that fits, so dense id ranges shrink
+# to a few bits per record before zlib runs.
+_WIDTHS = {1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64}
+
+
+def encode_ids(record_ids: Iterable[int]) -> bytes:
+    if isinstance(record_ids, np.ndarray):
+        ids = np.unique(record_ids.astype(np.int64, copy=False))
+    else:
+        ids = np.unique(np.fromiter(record_ids, dtype=np.int64))
+
+    if ids.size == 0:
+        return bytes([1]) + zlib.compress(b"")
+
+    deltas = np.diff(ids, prepend=0)
+
+    # Only the first delta can be negative; zigzag keeps it unsigned
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+    peak = int(zigzag.max())
+    width = 1 if peak < 1 << 8 else 2 if peak < 1 << 16 else 4 if peak < 1 << 32 else 8
+
+    return bytes([width]) + zlib.compress(zigzag.astype(_WIDTHS[width]).tobytes(), 6)
+
+
+EMPTY_SET = encode_ids([])
+
+
+def decode_array(blob: bytes) -> np.ndarray:
+    width = blob[0]
+    zigzag = np.frombuffer(zlib.decompress(blob[1:]), dtype=_WIDTHS[width]).astype(np.uint64)
+
+    deltas = (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+
+    return np.cumsum(deltas)
+
+
+def decode_ids(blob: bytes) -> List[int]:
+    return decode_array(blob).tolist()
+
+
+# ─────────────────────────────────────────────
+# Set Operations
+# ─────────────────────────────────────────────
+def contains(blob: bytes, record_id: int) -> bool:
+    ids = decode_array(blob)
+    position = np.searchsorted(ids, record_id)
+    return bool(position < ids.size and ids[position] == record_id)
+
+
+def diff(before: bytes, after: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(new, resolved, persisting) record ids going from before to after."""
+
+    old = decode_array(before)
+    new = decode_array(after)
+
+    return (
+        np.setdiff1d(new, old, assume_unique=True),
+        np.setdiff1d(old, new, assume_unique=True),
+        np.intersect1d(old, new, assume_unique=True),
+    )
+
+
+def diff_counts(before: bytes, after: bytes) -> dict:
+    added, resolved, persisting = diff(before, after)
+    return {"new": int(added.size), "resolved": int(resolved.size), "persisting": int(persisting.size)}
+
+
+def build_record_sets(violations: Sequence[dict]) -> List[dict]:
+    """Group evaluate_rules() rows into one record-set row per (scan, rule)."""
+
+    groups = {}
+
+    for v in violations:
+        key = (v["scan_id"], v["rule_id"])
+        group = groups.get(key)
+
+        if group is None:
+            group = groups[key] = {
+                "scan_id": v["scan_id"],
+                "rule_id": v["rule_id"],
+                "table_name": v["table_name"],
+                "field_name": v["field_name"],
+                "expected_condition": v["expected_condition"],
+                "risk_value": v["risk_value"],
+                "ids": [],
+            }
+
+        group["ids"].append(int(v["record_id"]))
+
+    rows = []
+
+    for group in groups.values():
+        ids = group.pop("ids")
+        group["record_ids"] = encode_ids(ids)
+        group["record_count"] = len(set(ids))
+        group["min_record_id"] = min(ids)
+        group["max_record_id"] = max(ids)
+        rows.append(group)
+
+    return rows
@@ -1,11 +1,16 @@
-from groq import Groq
-import os
-from dotenv import load_dotenv
+import hashlib
+import json
+from typing import Dict, List, Any
 
-load_dotenv()
+from sqlalchemy import case, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+from app.core.config import REMEDIATION_MODEL, REMEDIATION_BATCH_SIZE
+from app.models.remediation_cache import RemediationCache
+from app.models.rule import Rule
+from app.models.violation import Violation
+from app.services.llm_client import get_llm_client
 
 
 def generate_remediation(message: str) -> str:
@@ -14,12 +19,14 @@ def generate_remediation(message: str) -> str:
     Stable + cost-safe version.
     """
 
+    client = get_llm_client()
+
     if client is None:
         return _fallback_remediation()
 
     try:
         response = client.chat.completions.create(
-            model="llama3-70b-8192",  # fast + powerful
+            model=REMEDIATION_MODEL,
             messages=[
                 {
                     "role": "system",
@@ -58,4 +65,242 @@ def _fallback_remediation():
         "1. Review the affected record.\n"
         "2. Correct the field to meet policy requirements.\n"
         "3. Re-run compliance scan."
-    )
\ No newline at end of file
+    )
+
+
+# ─────────────────────────────────────────────
+# Batched + Cached Remediation
+# ─────────────────────────────────────────────
+def rule_template(rule: Rule) -> Dict[str, Any]:
+    """
+    Remediation depends only on what the rule checks, not on which record
+    broke it, so every violation of the same template shares one text.
+    """
+
+    condition = rule.condition_json or {}
+
+    template = {
+        "table_name": rule.table_name,
+        "field": condition.get("field"),
+        "operator": condition.get("operator"),
+        "value": condition.get("value"),
+    }
+
+    template["hash"] = hashlib.sha256(
+        json.dumps(template, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+    return template
+
+
+def generate_remediation_batch(templates: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    One LLM call for many rule templates.
+
+    Returns {template_hash: remediation}. Templates the model skipped or
+    answered badly are left out so the caller can fall back for them.
+    """
+
+    client = get_llm_client()
+
+    if client is None or not templates:
+        return {}
+
+    numbered = [
+        {
+            "id": str(i),
+            "table": t["table_name"],
+            "rule": f"{t['field']} {t['operator']} {t['value']}",
+        }
+        for i, t in enumerate(templates, start=1)
+    ]
+
+    prompt = f"""
+Each item below is a compliance rule that database records are violating.
+
+For EVERY item provide ONLY 2-3 concise remediation steps.
+Plain text only.
+No markdown.
+
+Return ONLY a JSON object mapping each item "id" to its remediation text.
+
+Violation templates (JSON):
+{json.dumps(numbered, ensure_ascii=False)}
+"""
+
+    try:
+        response = client.chat.completions.create(
+            model=REMEDIATION_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a strict compliance assistant."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.2,
+            max_tokens=150 * len(templates)
+        )
+
+        content = response.choices[0].message.content.strip()
+
+        if content.startswith("```"):
+            parts = content.split("```")
+            if len(parts) >= 2:
+                content = parts[1].strip()
+                if content.startswith("json"):
+                    content = content[4:]
+
+        answers = json.loads(content.strip("` \n\r"))
+
+    except Exception as e:
+        print("Groq Batch Remediation Error:", e)
+        return {}
+
+    if not isinstance(answers, dict):
+        return {}
+
+    results = {}
+
+    for i, t in enumerate(templates, start=1):
+        text = answers.get(str(i))
+
+        if isinstance(text, str) and len(text.strip()) >= 10:
+            results[t["hash"]] = text.strip()
+
+    return results
+
+
+def _cache_remediation(db: Session, row: Dict[str, Any]):
+    """
+    Insert one cache row; if another worker cached the same template
+    first, keep theirs (it's as good as ours). Only this row is skipped,
+    never the rest of the caller's transaction.
+    """
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+
+        db.execute(
+            upsert(RemediationCache)
+            .values(**row)
+            .on_conflict_do_nothing(index_elements=["template_hash"])
+        )
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(RemediationCache(**row))
+    except IntegrityError:
+        pass
+
+
+def remediate_scan(
+    db: Session,
+    scan_id: int,
+    batch_size: int = REMEDIATION_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Fill remediation text for every violation of a scan.
+
+    Violations are deduplicated to their rule templates, templates are
+    looked up in the persistent cache, the misses are sent to the LLM in
+    batches, and the text is written back with a single UPDATE.
+    """
+
+    rule_ids = [
+        rule_id for (rule_id,) in
+        db.query(Violation.rule_id)
+        .filter(
+            Violation.scan_id == scan_id,
+            Violation.remediation.is_(None)
+        )
+        .distinct()
+        .all()
+    ]
+
+    stats = {
+        "templates": 0,
+        "cache_hits": 0,
+        "generated": 0,
+        "fallbacks": 0,
+        "llm_calls": 0,
+        "violations_updated": 0,
+    }
+
+    if not rule_ids:
+        return stats
+
+    rules = db.query(Rule).filter(Rule.id.in_(rule_ids)).all()
+    rule_templates = {rule.id: rule_template(rule) for rule in rules}
+
+    templates = {t["hash"]: t for t in rule_templates.values()}
+    stats["templates"] = len(templates)
+
+    # ───────────── Cache Lookup ─────────────
+    remediations = dict(
+        db.query(RemediationCache.template_hash, RemediationCache.remediation)
+        .filter(RemediationCache.template_hash.in_(list(templates)))
+        .all()
+    )
+    stats["cache_hits"] = len(remediations)
+
+    # ───────────── Batched Generation ─────────────
+    missing = [t for h, t in templates.items() if h not in remediations]
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        generated = generate_remediation_batch(batch)
+        stats["llm_calls"] += 1
+
+        for h, text in generated.items():
+            remediations[h] = text
+            t = templates[h]
+            _cache_remediation(db, {
+                "template_hash": h,
+                "table_name": t["table_name"],
+                "field_name": str(t["field"]),
+                "operator": str(t["operator"]),
+                "value": None if t["value"] is None else str(t["value"]),
+                "remediation": text,
+                "model": REMEDIATION_MODEL,
+            })
+
+        stats["generated"] += len(generated)
+
+    # Fallback text is not cached so a later run can still get a real answer
+    for h in templates:
+        if h not in remediations:
+            remediations[h] = _fallback_remediation()
+            stats["fallbacks"] += 1
+
+    # ───────────── Single Bulk Update ─────────────
+    by_rule = {
+        rule_id: remediations[t["hash"]]
+        for rule_id, t in rule_templates.items()
+    }
+
+    result = db.execute(
+        update(Violation)
+        .where(
+            Violation.scan_id == scan_id,
+            Violation.rule_id.in_(list(by_rule)),
+            Violation.remediation.is_(None)
+        )
+        .values(remediation=case(by_rule, value=Violation.rule_id))
+        .execution_options(synchronize_session=False)
+    )
+
+    db.commit()
+
+    stats["violations_updated"] = result.rowcount or 0
+
+    return stats
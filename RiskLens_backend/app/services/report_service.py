@@ -1,4 +1,9 @@
+import sys
+import time
 from datetime import datetime
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional
+
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer,
     Table, TableStyle, PageBreak
@@ -7,70 +12,318 @@ from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import enums
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
 
+from app.core.config import AUDIT_DETAIL_LIMIT, AUDIT_DETAIL_BATCH_SIZE
+from app.models.rule import Rule
+from app.models.scan_summary_group import ScanSummaryGroup
+from app.models.violation import Violation
+from app.models.violation_record_set import ViolationRecordSet
+from app.services.record_set import decode_array
+from app.services.rollup_service import summary_totals, top_tables, top_rules
 
-def generate_audit_report(file_path, risk_data, violations):
 
-    doc = SimpleDocTemplate(file_path)
-    elements = []
+SEVERITY_ORDER = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
 
-    styles = getSampleStyleSheet()
 
-    title_style = styles["Title"]
-    heading_style = styles["Heading2"]
-    normal_style = styles["Normal"]
+def _peak_rss_bytes() -> Optional[int]:
+    """
+    High-water RSS of the whole process (not just this render), read
+    for free from getrusage. None where the resource module is missing.
+    """
 
-    # ===============================
-    # 🔥 TITLE PAGE
-    # ===============================
+    try:
+        import resource
+    except ImportError:
+        return None
 
-    elements.append(Paragraph("PolicyGuard Compliance Audit Report", title_style))
-    elements.append(Spacer(1, 0.5 * inch))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
 
-    generated_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-    elements.append(Paragraph(f"Generated on: {generated_time}", normal_style))
-    elements.append(Spacer(1, 0.5 * inch))
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ===============================
+# Shared styles (built once, not per violation)
+# ===============================
+_styles = getSampleStyleSheet()
+
+TITLE_STYLE = _styles["Title"]
+HEADING_STYLE = _styles["Heading2"]
+NORMAL_STYLE = _styles["Normal"]
 
-    # Big compliance score
-    score_style = ParagraphStyle(
-        name="ScoreStyle",
-        parent=styles["Heading1"],
-        alignment=enums.TA_CENTER,
-        textColor=colors.darkblue
+SCORE_STYLE = ParagraphStyle(
+    name="ScoreStyle",
+    parent=_styles["Heading1"],
+    alignment=enums.TA_CENTER,
+    textColor=colors.darkblue
+)
+
+CELL_STYLE = ParagraphStyle(name="AuditCell", parent=NORMAL_STYLE, fontSize=8, leading=10)
+
+SEVERITY_COLORS = {
+    "CRITICAL": colors.red,
+    "HIGH": colors.orange,
+}
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+])
+
+DETAIL_TABLE_COMMANDS = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.darkgrey),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+]
+
+DETAIL_COLUMNS = ["Rule", "Table", "Record", "Severity", "Risk", "Finding"]
+DETAIL_WIDTHS = [130, 70, 45, 50, 30, 165]
+
+
+def _risk_level(total_risk: int) -> str:
+    if total_risk >= 200:
+        return "CRITICAL"
+    if total_risk >= 100:
+        return "HIGH"
+    if total_risk >= 40:
+        return "MEDIUM"
+    return "LOW"
+
+
+# ===============================
+# SQL aggregates (rollups, no raw violation scan)
+# ===============================
+def severity_counts(db: Session, scan_id: Optional[int] = None) -> Dict[str, int]:
+    severity = func.upper(func.coalesce(Rule.severity, "MEDIUM"))
+
+    query = (
+        db.query(severity, func.sum(ScanSummaryGroup.violation_count))
+        .select_from(ScanSummaryGroup)
+        .outerjoin(Rule, Rule.id == ScanSummaryGroup.rule_id)
     )
 
-    elements.append(
-        Paragraph(f"Compliance Score: {risk_data['risk_score']}%", score_style)
+    if scan_id is not None:
+        query = query.filter(ScanSummaryGroup.scan_id == scan_id)
+
+    counts = {level: 0 for level in SEVERITY_ORDER}
+
+    for level, count in query.group_by(severity).all():
+        counts[level] = counts.get(level, 0) + int(count)
+
+    return counts
+
+
+# ===============================
+# Detail rows (keyset batches, columns joined, no lazy loads)
+# ===============================
+def iter_detail_batches(
+    db: Session,
+    scan_id: Optional[int],
+    limit: int,
+    batch_size: int = AUDIT_DETAIL_BATCH_SIZE
+) -> Iterator[List[tuple]]:
+    """Highest-risk violations first, at most limit rows, batch_size per query."""
+
+    fetched = 0
+    last = None
+
+    while fetched < limit:
+        query = (
+            db.query(
+                Violation.id,
+                Violation.risk_value,
+                Rule.description,
+                Rule.severity,
+                Violation.table_name,
+                Violation.record_id,
+                Violation.field_name,
+                Violation.actual_value,
+                Violation.expected_condition
+            )
+            .outerjoin(Rule, Rule.id == Violation.rule_id)
+        )
+
+        if scan_id is not None:
+            query = query.filter(Violation.scan_id == scan_id)
+
+        if last is not None:
+            last_risk, last_id = last
+            query = query.filter(
+                or_(
+                    Violation.risk_value < last_risk,
+                    and_(Violation.risk_value == last_risk, Violation.id > last_id)
+                )
+            )
+
+        rows = (
+            query
+            .order_by(Violation.risk_value.desc(), Violation.id)
+            .limit(min(batch_size, limit - fetched))
+            .all()
+        )
+
+        if not rows:
+            return
+
+        yield rows
+
+        fetched += len(rows)
+        last = (rows[-1].risk_value, rows[-1].id)
+
+
+DetailRow = namedtuple("DetailRow", [
+    "id", "risk_value", "description", "severity", "table_name",
+    "record_id", "field_name", "actual_value", "expected_condition",
+])
+
+
+def iter_record_set_detail_batches(
+    db: Session,
+    scan_id: Optional[int],
+    limit: int,
+    batch_size: int = AUDIT_DETAIL_BATCH_SIZE
+) -> Iterator[List[DetailRow]]:
+    """
+    Compact-stored violations, highest risk first, at most limit rows:
+    each record set expanded to one row per record id. Record sets
+    don't keep the offending value.
+    """
+
+    if limit <= 0:
+        return
+
+    query = (
+        db.query(
+            ViolationRecordSet.risk_value,
+            Rule.description,
+            Rule.severity,
+            ViolationRecordSet.table_name,
+            ViolationRecordSet.field_name,
+            ViolationRecordSet.expected_condition,
+            ViolationRecordSet.record_ids
+        )
+        .outerjoin(Rule, Rule.id == ViolationRecordSet.rule_id)
+        .order_by(ViolationRecordSet.risk_value.desc(), ViolationRecordSet.id)
     )
-    elements.append(Spacer(1, 0.3 * inch))
 
+    if scan_id is not None:
+        query = query.filter(ViolationRecordSet.scan_id == scan_id)
+
+    batch = []
+    fetched = 0
+
+    for row in query.yield_per(16):
+        for record_id in decode_array(row.record_ids)[:limit - fetched].tolist():
+            batch.append(DetailRow(
+                None, row.risk_value, row.description, row.severity, row.table_name,
+                record_id, row.field_name, "(not stored)", row.expected_condition
+            ))
+            fetched += 1
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if fetched >= limit:
+            break
+
+    if batch:
+        yield batch
+
+
+def _detail_table(rows: List[tuple]) -> Table:
+    data = [DETAIL_COLUMNS]
+    commands = list(DETAIL_TABLE_COMMANDS)
+
+    for offset, row in enumerate(rows, start=1):
+        severity = (row.severity or "Medium").upper()
+
+        data.append([
+            Paragraph(row.description or "N/A", CELL_STYLE),
+            Paragraph(row.table_name, CELL_STYLE),
+            str(row.record_id),
+            row.severity or "Medium",
+            str(row.risk_value),
+            Paragraph(
+                f"{row.field_name} = {row.actual_value}, expected {row.expected_condition}",
+                CELL_STYLE
+            ),
+        ])
+
+        if severity in SEVERITY_COLORS:
+            commands.append(("TEXTCOLOR", (3, offset), (3, offset), SEVERITY_COLORS[severity]))
+
+    table = Table(data, colWidths=DETAIL_WIDTHS, repeatRows=1)
+    table.setStyle(TableStyle(commands))
+
+    return table
+
+
+# ===============================
+# Report
+# ===============================
+def generate_audit_report(
+    db: Session,
+    file_path: str,
+    scan_id: Optional[int] = None,
+    detail_limit: int = AUDIT_DETAIL_LIMIT
+) -> Dict:
+    """
+    Render the audit PDF. Summary sections come from rollups; the detail
+    section lists at most detail_limit violations, highest risk first,
+    as one multi-row table per fetched batch.
+
+    Returns render stats: seconds, process peak RSS, detail rows.
+    """
+
+    started = time.perf_counter()
+
+    totals = summary_totals(db, scan_id)
+    total_violations = totals["total_violations"]
+    total_risk = totals["total_risk"]
+    avg_risk = round(total_risk / total_violations, 2) if total_violations else 0
+    risk_level = _risk_level(total_risk)
+
+    doc = SimpleDocTemplate(file_path)
+    elements = []
+
+    # ===============================
+    # 🔥 TITLE PAGE
+    # ===============================
+    elements.append(Paragraph("PolicyGuard Compliance Audit Report", TITLE_STYLE))
+    elements.append(Spacer(1, 0.5 * inch))
+
+    generated_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    elements.append(Paragraph(f"Generated on: {generated_time}", NORMAL_STYLE))
     elements.append(
-        Paragraph(f"Risk Level: {risk_data['risk_level']}", styles["Heading3"])
+        Paragraph(f"Scope: {'scan ' + str(scan_id) if scan_id is not None else 'all scans'}", NORMAL_STYLE)
     )
+    elements.append(Spacer(1, 0.5 * inch))
+
+    elements.append(Paragraph(f"Risk Level: {risk_level}", SCORE_STYLE))
 
     elements.append(PageBreak())
 
     # ===============================
     # 🔥 RISK SUMMARY SECTION
     # ===============================
-
-    elements.append(Paragraph("Risk Summary", heading_style))
+    elements.append(Paragraph("Risk Summary", HEADING_STYLE))
     elements.append(Spacer(1, 0.3 * inch))
 
-    summary_data = [
+    summary_table = Table([
         ["Metric", "Value"],
-        ["Total Violations", str(risk_data["total_violations"])],
-        ["Risk Score", f"{risk_data['risk_score']}%"],
-        ["Risk Level", risk_data["risk_level"]],
-    ]
-
-    summary_table = Table(summary_data, colWidths=[250, 200])
-    summary_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-    ]))
+        ["Total Violations", str(total_violations)],
+        ["Total Risk Score", str(total_risk)],
+        ["Average Risk", str(avg_risk)],
+        ["Risk Level", risk_level],
+    ], colWidths=[250, 200])
+    summary_table.setStyle(SUMMARY_TABLE_STYLE)
 
     elements.append(summary_table)
     elements.append(Spacer(1, 0.5 * inch))
@@ -78,75 +331,72 @@ def generate_audit_report(file_path, risk_data, violations):
     # ===============================
     # 🔥 SEVERITY DISTRIBUTION
     # ===============================
+    counts = severity_counts(db, scan_id)
 
-    critical_count = sum(1 for v in violations if v.severity.upper() == "CRITICAL")
-    high_count = sum(1 for v in violations if v.severity.upper() == "HIGH")
-    medium_count = sum(1 for v in violations if v.severity.upper() == "MEDIUM")
-
-    severity_data = [
-        ["Severity Level", "Count"],
-        ["Critical", str(critical_count)],
-        ["High", str(high_count)],
-        ["Medium", str(medium_count)],
-    ]
-
-    severity_table = Table(severity_data, colWidths=[250, 200])
-    severity_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.darkgrey),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-    ]))
+    severity_table = Table(
+        [["Severity Level", "Count"]]
+        + [[level.title(), str(count)] for level, count in counts.items()],
+        colWidths=[250, 200]
+    )
+    severity_table.setStyle(SUMMARY_TABLE_STYLE)
 
     elements.append(severity_table)
-    elements.append(PageBreak())
+    elements.append(Spacer(1, 0.5 * inch))
 
     # ===============================
-    # 🔥 VIOLATION DETAILS
+    # 🔥 TOP TABLES / RULES
     # ===============================
+    for heading, label, rows in (
+        ("Top Risky Tables", "Table", [(t["table_name"], t["total_risk"]) for t in top_tables(db, scan_id, limit=10)]),
+        ("Top Risky Rules", "Rule", [(f"Rule {r['rule_id']}", r["total_risk"]) for r in top_rules(db, scan_id, limit=10)]),
+    ):
+        elements.append(Paragraph(heading, HEADING_STYLE))
+        elements.append(Spacer(1, 0.2 * inch))
+
+        top_table = Table(
+            [[label, "Total Risk"]] + [[name, str(risk)] for name, risk in rows],
+            colWidths=[250, 200]
+        )
+        top_table.setStyle(SUMMARY_TABLE_STYLE)
 
-    elements.append(Paragraph("Violation Details", heading_style))
-    elements.append(Spacer(1, 0.3 * inch))
+        elements.append(top_table)
+        elements.append(Spacer(1, 0.3 * inch))
 
-    # Sort by severity priority
-    severity_order = {"CRITICAL": 1, "HIGH": 2, "MEDIUM": 3}
-    violations.sort(key=lambda v: severity_order.get(v.severity.upper(), 4))
+    elements.append(PageBreak())
 
-    for i, v in enumerate(violations):
+    # ===============================
+    # 🔥 VIOLATION DETAILS (bounded)
+    # ===============================
+    elements.append(Paragraph("Violation Details", HEADING_STYLE))
 
-        # Severity color
-        if v.severity.upper() == "CRITICAL":
-            severity_color = colors.red
-        elif v.severity.upper() == "HIGH":
-            severity_color = colors.orange
-        else:
-            severity_color = colors.black
+    if total_violations > detail_limit:
+        elements.append(Paragraph(
+            f"Showing the {detail_limit} highest-risk of {total_violations} violations. "
+            f"Use the violations export for the full list.",
+            NORMAL_STYLE
+        ))
 
-        severity_style = ParagraphStyle(
-            name=f"SeverityStyle_{i}",
-            parent=normal_style,
-            textColor=severity_color
-        )
+    elements.append(Spacer(1, 0.3 * inch))
+
+    detail_rows = 0
 
-        violation_data = [
-            ["Rule", getattr(v.rule, "description", "N/A")],
-            ["Table", v.table_name],
-            ["Record ID", str(v.record_id)],
-            ["Severity", v.severity],
-            ["Message", getattr(v, "explanation", v.message)],
-        ]
+    for batch in iter_detail_batches(db, scan_id, detail_limit):
+        elements.append(_detail_table(batch))
+        detail_rows += len(batch)
 
-        violation_table = Table(violation_data, colWidths=[150, 300])
-        violation_table.setStyle(TableStyle([
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-            ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
-        ]))
+    # Compact-stored scans (VIOLATION_STORAGE_MODE=compact)
+    for batch in iter_record_set_detail_batches(db, scan_id, detail_limit - detail_rows):
+        elements.append(_detail_table(batch))
+        detail_rows += len(batch)
 
-        elements.append(violation_table)
-        elements.append(Spacer(1, 0.4 * inch))
+    doc.build(elements)
 
-        # Page break every 10 violations for readability
-        if (i + 1) % 10 == 0:
-            elements.append(PageBreak())
+    # Process-wide, not the render's own footprint (see ReportJob)
+    process_peak_rss = _peak_rss_bytes()
 
-    doc.build(elements)
\ No newline at end of file
+    return {
+        "render_seconds": round(time.perf_counter() - started, 4),
+        "process_peak_rss_bytes": process_peak_rss,
+        "detail_rows": detail_rows,
+        "total_violations": total_violations,
+    }
@@ -0,0 +1,289 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    REPORT_DIR,
+    REPORT_JOB_HEARTBEAT_SECONDS,
+    REPORT_JOB_STALE_SECONDS,
+    REPORT_STORE_MAX_FILES,
+    REPORT_STORE_MAX_MB,
+)
+from app.core.database import SessionLocal
+from app.models.report_job import ReportJob
+
+
+# Serializes eviction; jobs for different keys still render concurrently
+_evict_lock = threading.Lock()
+
+ORPHAN_GRACE_SECONDS = 600
+
+# Owner recorded on the jobs this process renders
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+OPEN_STATUSES = ("PENDING", "RUNNING")
+
+
+def artifact_path(job_id: str) -> str:
+    return os.path.join(REPORT_DIR, f"report_{job_id}.pdf")
+
+
+def job_key(scan_id: Optional[int], report_type: str, generation: int) -> str:
+    return f"{'all' if scan_id is None else scan_id}:{report_type}:{generation}"
+
+
+# ─────────────────────────────────────────────
+# Job Lookup / Creation
+# ─────────────────────────────────────────────
+def find_reusable_job(
+    db: Session,
+    scan_id: Optional[int],
+    report_type: str,
+    generation: int
+) -> Optional[ReportJob]:
+    """
+    A completed artifact whose file still exists, or a job for the same
+    key that is already queued or running (and whose worker is alive).
+    """
+
+    fail_interrupted_jobs(db)
+
+    jobs = (
+        db.query(ReportJob)
+        .filter(
+            ReportJob.scan_id.is_(None) if scan_id is None else ReportJob.scan_id == scan_id,
+            ReportJob.report_type == report_type,
+            ReportJob.generation == generation,
+            ReportJob.status.in_(("COMPLETED",) + OPEN_STATUSES)
+        )
+        .order_by(ReportJob.created_at.desc())
+        .all()
+    )
+
+    for job in jobs:
+        if job.status != "COMPLETED":
+            return job
+
+        if job.file_path and os.path.exists(job.file_path):
+            return job
+
+        # File removed behind our back
+        job.status = "EVICTED"
+        job.file_path = None
+
+    db.commit()
+    return None
+
+
+def create_job(
+    db: Session,
+    scan_id: Optional[int],
+    report_type: str,
+    generation: int
+) -> Tuple[ReportJob, bool]:
+    """
+    Queue a job owned by this worker. Returns (job, created); when an
+    identical request got there first, its open job is returned instead.
+    """
+
+    now = datetime.utcnow()
+    key = job_key(scan_id, report_type, generation)
+
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        scan_id=scan_id,
+        report_type=report_type,
+        generation=generation,
+        job_key=key,
+        status="PENDING",
+        owner=WORKER_ID,
+        heartbeat_at=now
+    )
+    db.add(job)
+
+    try:
+        db.commit()
+        return job, True
+    except IntegrityError:
+        # Nothing else is pending here: find_reusable_job committed
+        db.rollback()
+
+    existing = (
+        db.query(ReportJob)
+        .filter(ReportJob.job_key == key, ReportJob.status.in_(OPEN_STATUSES))
+        .first()
+    )
+
+    if existing is None:
+        # The other job finished in between; it's reusable now or failed
+        return create_job(db, scan_id, report_type, generation)
+
+    return existing, False
+
+
+def fail_interrupted_jobs(db: Session) -> int:
+    """
+    Jobs run in the worker that queued them. Fail open jobs whose worker
+    stopped heartbeating; jobs a live worker is rendering are left alone.
+    """
+
+    stale_before = datetime.utcnow() - timedelta(seconds=REPORT_JOB_STALE_SECONDS)
+
+    count = (
+        db.query(ReportJob)
+        .filter(
+            ReportJob.status.in_(OPEN_STATUSES),
+            or_(ReportJob.heartbeat_at.is_(None), ReportJob.heartbeat_at < stale_before)
+        )
+        .update(
+            {"status": "FAILED", "error": "Interrupted: the worker rendering it stopped"},
+            synchronize_session=False
+        )
+    )
+    db.commit()
+
+    return count
+
+
+@contextmanager
+def job_heartbeat(job_id: str):
+    """Keep the job's heartbeat_at fresh from a side thread while the body renders."""
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(REPORT_JOB_HEARTBEAT_SECONDS):
+            try:
+                with SessionLocal() as db:
+                    db.execute(
+                        update(ReportJob)
+                        .where(ReportJob.id == job_id, ReportJob.status.in_(OPEN_STATUSES))
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    db.commit()
+            except Exception as e:
+                print("Report job heartbeat failed:", e)
+
+    thread = threading.Thread(target=beat, name=f"report-heartbeat-{job_id[:8]}", daemon=True)
+    thread.start()
+
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def touch(db: Session, job: ReportJob):
+    job.last_accessed_at = datetime.utcnow()
+    db.commit()
+
+
+def job_payload(job: ReportJob) -> Dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "scan_id": job.scan_id,
+        "report_type": job.report_type,
+        "generation": job.generation,
+        "file_size": job.file_size,
+        "render_seconds": job.render_seconds,
+        "process_peak_rss_bytes": job.process_peak_rss_bytes,
+        "error": job.error,
+        "created_at": job.created_at,
+        "completed_at": job.completed_at,
+        "status_url": f"/reports/jobs/{job.id}",
+        "download_url": f"/reports/jobs/{job.id}/download" if job.status == "COMPLETED" else None,
+    }
+
+
+# ─────────────────────────────────────────────
+# Size / Count Bounded Store (LRU by last download)
+# ─────────────────────────────────────────────
+def enforce_store_limits(
+    db: Session,
+    max_bytes: int = REPORT_STORE_MAX_MB * 1024 * 1024,
+    max_files: int = REPORT_STORE_MAX_FILES
+) -> int:
+    """
+    Evict least recently accessed artifacts until the store fits both
+    limits, then delete PDFs in REPORT_DIR that no job references
+    (left over from before jobs were tracked, or from crashed renders).
+    Returns the number of files removed.
+    """
+
+    removed = 0
+
+    with _evict_lock:
+        # Read before the completed set so a job finishing in between
+        # is in one of the two
+        in_flight = {
+            os.path.abspath(artifact_path(job_id))
+            for (job_id,) in
+            db.query(ReportJob.id)
+            .filter(ReportJob.status.in_(("PENDING", "RUNNING")))
+            .all()
+        }
+
+        completed = (
+            db.query(ReportJob)
+            .filter(ReportJob.status == "COMPLETED")
+            .order_by(ReportJob.last_accessed_at.desc())
+            .all()
+        )
+
+        kept_bytes = 0
+        kept_files = 0
+        referenced = set()
+
+        # Walk newest-first; everything past the budget is evicted
+        for job in completed:
+            size = job.file_size or 0
+
+            if kept_files + 1 <= max_files and kept_bytes + size <= max_bytes:
+                kept_files += 1
+                kept_bytes += size
+                if job.file_path:
+                    referenced.add(os.path.abspath(job.file_path))
+                continue
+
+            if job.file_path and _remove(job.file_path):
+                removed += 1
+
+            job.status = "EVICTED"
+            job.file_path = None
+
+        db.commit()
+
+        if os.path.isdir(REPORT_DIR):
+            for name in os.listdir(REPORT_DIR):
+                path = os.path.abspath(os.path.join(REPORT_DIR, name))
+
+                if not name.endswith(".pdf") or path in referenced or path in in_flight:
+                    continue
+
+                # Leave anything a job may have just started writing
+                if time.time() - os.path.getmtime(path) < ORPHAN_GRACE_SECONDS:
+                    continue
+
+                if _remove(path):
+                    removed += 1
+
+    return removed
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,364 @@
+import cProfile
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import (
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_MAX_MB,
+    PROFILE_MAX_SECONDS,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILING_ENABLED,
+    PROFILING_TOKEN,
+)
+
+
+MODES = ("sample", "cprofile")
+EXTENSIONS = {"sample": ".folded", "cprofile": ".prof"}
+
+# Innermost Python frames of a thread that's parked, not working.
+# Waiting on the app database pool is kept: that's a cost, not idling
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+}
+KEEP_WAITING_IN = {"_do_get"}
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# One profile at a time: cProfile hooks are per-interpreter-thread and
+# overlapping samplers would attribute each other's stacks
+_active = threading.Lock()
+_store_lock = threading.Lock()
+
+
+def profiling_available() -> bool:
+    return PROFILING_ENABLED and PROFILING_TOKEN is not None
+
+
+def token_matches(token: Optional[str]) -> bool:
+    return (
+        PROFILING_TOKEN is not None
+        and token is not None
+        and hmac.compare_digest(token.encode("utf-8"), PROFILING_TOKEN.encode("utf-8"))
+    )
+
+
+def requested_mode(flag: Optional[str]) -> Optional[str]:
+    """X-Profile / ?profile value -> mode; "1" / "true" mean the sampler."""
+
+    if not flag:
+        return None
+
+    flag = flag.strip().lower()
+
+    if flag in MODES:
+        return flag
+
+    return "sample" if flag in ("1", "true", "yes") else None
+
+
+# ─────────────────────────────────────────────
+# Sampling Profiler (every thread, folded stacks)
+# ─────────────────────────────────────────────
+class StackSampler:
+    """
+    Snapshots every thread's stack via sys._current_frames() on a timer
+    and counts them in folded form ("thread;outer;...;inner count"),
+    the input of flamegraph.pl and speedscope. Unlike cProfile it sees
+    threadpool work (sync endpoints, run_in_threadpool) as well as the
+    event loop. Other requests running at the same time are sampled too.
+    """
+
+    def __init__(self, interval_seconds: float, max_seconds: float):
+        self.interval = interval_seconds
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+
+                leaf = frame.f_code
+                idle = (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    idle = idle and code.co_name not in KEEP_WAITING_IN
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+
+                if idle:
+                    continue
+
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+            self.samples += 1
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# ─────────────────────────────────────────────
+# One Profiled Request
+# ─────────────────────────────────────────────
+class RequestProfile:
+    """
+    cProfile sees only the thread it was enabled on, i.e. the event
+    loop: async handlers, not sync endpoints or threadpool work. Use
+    the sampler for those.
+    """
+
+    def __init__(self, mode: str, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.created_at = datetime.utcnow()
+        self.duration_ms = None
+        self._started = time.perf_counter()
+        self._released = False
+
+        if mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000, PROFILE_MAX_SECONDS)
+            self._profiler.start()
+
+    @property
+    def expired(self) -> bool:
+        return time.perf_counter() - self._started > PROFILE_MAX_SECONDS
+
+    def stop(self):
+        """Call on the thread that started it (cProfile hooks are per thread)."""
+
+        if self.duration_ms is not None:
+            return
+
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+        if self.mode == "cprofile":
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+
+    def save(self, status_code: Optional[int]) -> Optional[Dict]:
+        """Write the profile to the store and free the slot for the next one."""
+
+        try:
+            return _store(self, status_code)
+        except OSError as e:
+            print("Profile write failed:", e)
+            return None
+        finally:
+            self._release()
+
+    def _release(self):
+        global _current
+
+        with _store_lock:
+            if self._released:
+                return
+
+            self._released = True
+
+            if _current is self:
+                _current = None
+
+        _active.release()
+
+
+_current: Optional[RequestProfile] = None
+
+
+def start_profile(mode: str, method: str, path: str) -> Optional[RequestProfile]:
+    """
+    None when another request is being profiled right now. A profile
+    whose response was never finished (client gone before the body was
+    streamed) is saved as-is once it's past PROFILE_MAX_SECONDS.
+    """
+
+    global _current
+
+    if not _active.acquire(blocking=False):
+        stale = _current
+
+        if stale is None or not stale.expired:
+            return None
+
+        stale.stop()
+        stale.save(None)
+
+        if not _active.acquire(blocking=False):
+            return None
+
+    try:
+        profile = RequestProfile(mode, method, path)
+    except BaseException:
+        _active.release()
+        raise
+
+    _current = profile
+
+    return profile
+
+
+# ─────────────────────────────────────────────
+# Profile Store (PROFILE_DIR, bounded by count and size)
+# ─────────────────────────────────────────────
+def _meta_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.json")
+
+
+def _store(profile: RequestProfile, status_code: Optional[int]) -> Dict:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    file_name = f"{profile.id}{EXTENSIONS[profile.mode]}"
+    data_path = os.path.join(PROFILE_DIR, file_name)
+
+    if profile.mode == "cprofile":
+        profile._profiler.dump_stats(data_path)
+    else:
+        profile._profiler.dump(data_path)
+
+    meta = {
+        "id": profile.id,
+        "mode": profile.mode,
+        "method": profile.method,
+        "path": profile.path,
+        "status_code": status_code,
+        "duration_ms": profile.duration_ms,
+        "created_at": profile.created_at.isoformat(),
+        "file_name": file_name,
+        "size_bytes": os.path.getsize(data_path),
+    }
+
+    if profile.mode == "sample":
+        meta["samples"] = profile._profiler.samples
+
+    # Metadata last: a listed profile always has its data file
+    tmp_path = f"{_meta_path(profile.id)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, _meta_path(profile.id))
+
+    enforce_profile_limits()
+
+    return meta
+
+
+def list_profiles() -> List[Dict]:
+    """Newest first."""
+
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+
+    profiles = []
+
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith(".json"):
+            continue
+
+        try:
+            with open(os.path.join(PROFILE_DIR, name), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    return sorted(profiles, key=lambda meta: meta.get("created_at") or "", reverse=True)
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+
+    try:
+        with open(_meta_path(profile_id), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    meta["file_path"] = os.path.join(PROFILE_DIR, meta["file_name"])
+
+    return meta if os.path.exists(meta["file_path"]) else None
+
+
+def delete_profile(profile_id: str) -> bool:
+    meta = get_profile(profile_id)
+
+    if meta is None:
+        return False
+
+    with _store_lock:
+        _remove(meta["file_path"])
+        _remove(_meta_path(profile_id))
+
+    return True
+
+
+def enforce_profile_limits(
+    max_files: int = PROFILE_MAX_FILES,
+    max_bytes: int = PROFILE_MAX_MB * 1024 * 1024
+) -> int:
+    """Delete the oldest profiles until the store fits both limits. Returns profiles removed."""
+
+    removed = 0
+
+    with _store_lock:
+        kept_files = 0
+        kept_bytes = 0
+
+        for meta in list_profiles():
+            size = meta.get("size_bytes") or 0
+
+            if kept_files + 1 <= max_files and kept_bytes + size <= max_bytes:
+                kept_files += 1
+                kept_bytes += size
+                continue
+
+            _remove(os.path.join(PROFILE_DIR, meta["file_name"]))
+            _remove(_meta_path(meta["id"]))
+            removed += 1
+
+    return removed
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,312 @@
+import os
+import re
+import uuid
+from collections import OrderedDict
+from itertools import chain
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import ARCHIVE_DIR, RETENTION_DELETE_BATCH_SIZE
+from app.models.scan_history import ScanHistory, UNFINISHED_STATUSES
+from app.models.system_config import SystemConfig
+from app.models.violation import Violation
+from app.models.violation_archive import ViolationArchive
+from app.models.violation_record_part import ViolationRecordPart
+from app.models.violation_record_set import ViolationRecordSet
+from app.services.analytics_cache import bump_data_generation
+from app.services.export_service import (
+    export_stream, iter_batches, iter_record_set_batches, parquet_available
+)
+
+
+# Raw table columns, so an archive can be loaded back as-is
+ARCHIVE_COLUMNS = list(Violation.__table__.columns)
+
+# Compact record sets are archived expanded to the same layout, one row
+# per record id (id, actual_value, ... are None)
+RECORD_SET_ARCHIVE_COLUMNS = [
+    ViolationRecordSet.scan_id,
+    ViolationRecordSet.rule_id,
+    ViolationRecordSet.table_name,
+    ViolationRecordSet.field_name,
+    ViolationRecordSet.expected_condition,
+    ViolationRecordSet.risk_value,
+    ViolationRecordSet.created_at,
+    ViolationRecordSet.record_ids,
+]
+
+
+def _period(ts: datetime) -> str:
+    return ts.strftime("%Y-%m")
+
+
+# ─────────────────────────────────────────────
+# Cold Archive Files
+# ─────────────────────────────────────────────
+def write_archive(scan_ids: List[int], period: str) -> Dict:
+    """
+    Stream the scans' violations to ARCHIVE_DIR as Parquet, or gzipped
+    NDJSON when pyarrow isn't installed. Written to a .part file and
+    renamed, so a crash never leaves a truncated archive behind.
+    """
+
+    fmt = "parquet" if parquet_available() else "ndjson"
+    extension = "parquet" if fmt == "parquet" else "ndjson.gz"
+
+    stmt = (
+        select(*ARCHIVE_COLUMNS)
+        .where(Violation.scan_id.in_(scan_ids))
+        .order_by(Violation.scan_id, Violation.id)
+    )
+
+    set_stmt = (
+        select(*RECORD_SET_ARCHIVE_COLUMNS)
+        .where(ViolationRecordSet.scan_id.in_(scan_ids))
+        .order_by(ViolationRecordSet.scan_id, ViolationRecordSet.rule_id)
+    )
+
+    columns = [c.name for c in ARCHIVE_COLUMNS]
+    batches = chain(iter_batches(stmt), iter_record_set_batches(set_stmt, columns))
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    file_path = os.path.join(ARCHIVE_DIR, f"violations_{period}_{uuid.uuid4().hex[:8]}.{extension}")
+    partial = file_path + ".part"
+
+    with open(partial, "wb") as f:
+        for chunk in export_stream(
+            stmt, columns, fmt, gzip=(fmt == "ndjson"), batches=batches
+        ):
+            f.write(chunk)
+
+    os.replace(partial, file_path)
+
+    return {
+        "format": extension,
+        "file_path": file_path,
+        "file_size": os.path.getsize(file_path),
+    }
+
+
+# ─────────────────────────────────────────────
+# PostgreSQL Native Partitions (monthly on created_at)
+# ─────────────────────────────────────────────
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+
+    return bool(db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass('violations')"
+    )).scalar())
+
+
+def ensure_partitions(db: Session, months_ahead: int = 2, now: Optional[datetime] = None) -> List[str]:
+    """
+    Create the current and next months_ahead monthly partitions when
+    violations is a partitioned table. Converting an existing plain
+    table is a migration step, not done here.
+    """
+
+    if not is_partitioned(db):
+        return []
+
+    month = (now or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    created = []
+
+    for _ in range(months_ahead + 1):
+        following = (month + timedelta(days=32)).replace(day=1)
+        name = f"violations_{month:%Y_%m}"
+
+        db.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF violations '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        ))
+        created.append(name)
+        month = following
+
+    db.commit()
+
+    return created
+
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def drop_archived_partitions(db: Session, cutoff: datetime) -> List[str]:
+    """
+    Drop whole partitions that end before cutoff and hold no rows of
+    unarchived scans; O(1) instead of deleting row by row.
+    """
+
+    if not is_partitioned(db):
+        return []
+
+    partitions = db.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('violations')"
+    )).all()
+
+    dropped = []
+
+    for name, bound in partitions:
+        match = _UPPER_BOUND.search(bound or "")
+        if not match or datetime.fromisoformat(match.group(1)) > cutoff:
+            continue
+
+        live = db.execute(text(
+            f'SELECT 1 FROM "{name}" v '
+            "LEFT JOIN scan_history s ON s.id = v.scan_id "
+            "WHERE s.archive_id IS NULL LIMIT 1"
+        )).scalar()
+
+        if live:
+            continue
+
+        db.execute(text(f'ALTER TABLE violations DETACH PARTITION "{name}"'))
+        db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+        dropped.append(name)
+
+    return dropped
+
+
+# ─────────────────────────────────────────────
+# Batched Deletes (any dialect)
+# ─────────────────────────────────────────────
+def purge_archived_violations(db: Session, batch_size: int = RETENTION_DELETE_BATCH_SIZE) -> int:
+    """
+    Delete violations of archived scans batch_size rows per transaction,
+    so the table is never locked for the whole purge. Also finishes a
+    purge interrupted by a crash. Returns violations removed, counting
+    every record id of a deleted compact record set.
+    """
+
+    archived = select(ScanHistory.id).where(ScanHistory.archive_id.isnot(None))
+    removed = 0
+
+    while True:
+        record_sets = (
+            db.query(ViolationRecordSet.id, ViolationRecordSet.record_count)
+            .filter(ViolationRecordSet.scan_id.in_(archived))
+            .limit(batch_size)
+            .all()
+        )
+
+        if not record_sets:
+            break
+
+        db.execute(delete(ViolationRecordSet).where(
+            ViolationRecordSet.id.in_([set_id for set_id, _ in record_sets])
+        ))
+        db.commit()
+        removed += sum(count for _, count in record_sets)
+
+    # Parts never consolidated: a failed scan's finished shards
+    db.execute(delete(ViolationRecordPart).where(ViolationRecordPart.scan_id.in_(archived)))
+    db.commit()
+
+    while True:
+        ids = [
+            violation_id for (violation_id,) in
+            db.query(Violation.id)
+            .filter(Violation.scan_id.in_(archived))
+            .limit(batch_size)
+            .all()
+        ]
+
+        if not ids:
+            return removed
+
+        db.execute(delete(Violation).where(Violation.id.in_(ids)))
+        db.commit()
+        removed += len(ids)
+
+
+# ─────────────────────────────────────────────
+# Retention Run
+# ─────────────────────────────────────────────
+def apply_retention(db: Session, force: bool = False, now: Optional[datetime] = None) -> Dict:
+    """
+    Archive scans older than the configured retention window, one file
+    per scanned_at month, then remove their raw violations. Rollups
+    (scan_summary, trend buckets) are untouched, so dashboards and
+    trends still cover archived scans.
+    """
+
+    config = db.query(SystemConfig).first()
+
+    if config is None or not (config.retention_enabled or force):
+        return {"enabled": False}
+
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=config.violation_retention_days or 90)
+
+    expired = (
+        db.query(ScanHistory.id, ScanHistory.scanned_at)
+        .filter(
+            ScanHistory.scanned_at < cutoff,
+            ScanHistory.archive_id.is_(None),
+            ScanHistory.status.notin_(UNFINISHED_STATUSES)
+        )
+        .order_by(ScanHistory.scanned_at)
+        .all()
+    )
+
+    periods: "OrderedDict[str, List[int]]" = OrderedDict()
+    for scan_id, scanned_at in expired:
+        periods.setdefault(_period(scanned_at), []).append(scan_id)
+
+    archives = []
+
+    for period, scan_ids in periods.items():
+        row_count = (
+            db.query(Violation.id)
+            .filter(Violation.scan_id.in_(scan_ids))
+            .count()
+        ) + (
+            db.query(func.coalesce(func.sum(ViolationRecordSet.record_count), 0))
+            .filter(ViolationRecordSet.scan_id.in_(scan_ids))
+            .scalar()
+        )
+
+        if config.archive_before_delete and row_count:
+            stored = write_archive(scan_ids, period)
+        else:
+            stored = {"format": "purged", "file_path": None, "file_size": None}
+
+        archive = ViolationArchive(
+            period=period,
+            scan_count=len(scan_ids),
+            row_count=row_count,
+            **stored
+        )
+        db.add(archive)
+        db.flush()
+
+        db.execute(
+            update(ScanHistory)
+            .where(ScanHistory.id.in_(scan_ids))
+            .values(archive_id=archive.id)
+        )
+        db.commit()
+
+        archives.append({"period": period, "scans": len(scan_ids), "rows": row_count, **stored})
+
+    dropped = drop_archived_partitions(db, cutoff)
+    purged = purge_archived_violations(db)
+
+    if archives or purged or dropped:
+        bump_data_generation(db)
+        db.commit()
+
+    return {
+        "enabled": True,
+        "cutoff": cutoff,
+        "archives": archives,
+        "dropped_partitions": dropped,
+        "purged_rows": purged,
+    }
@@ -0,0 +1,273 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import func, desc, insert, select, delete, union_all
+from sqlalchemy.orm import Session
+
+from app.models.scan_history import ScanHistory, UNFINISHED_STATUSES
+from app.models.scan_summary import ScanSummary
+from app.models.scan_summary_group import ScanSummaryGroup
+from app.models.violation import Violation
+from app.models.violation_record_set import ViolationRecordSet
+from app.services.analytics_cache import bump_data_generation
+from app.services.scan_engine import consolidate_record_sets
+from app.services.trend_service import apply_scan_to_trends
+
+
+# ─────────────────────────────────────────────
+# Build (called once per scan, inside its transaction)
+# ─────────────────────────────────────────────
+def build_scan_summary(db: Session, scan_id: int) -> ScanSummary:
+    """
+    Aggregate one scan's violations into scan_summary_groups and
+    scan_summary. Only that scan's rows are read; re-running replaces
+    the groups and updates the summary row in place, so trend_applied
+    survives and the scan is never added to the trend buckets twice.
+    Compact record sets already carry their counts.
+    """
+
+    db.execute(delete(ScanSummaryGroup).where(ScanSummaryGroup.scan_id == scan_id))
+
+    grouped = (
+        select(
+            Violation.scan_id,
+            Violation.table_name,
+            Violation.rule_id,
+            Violation.risk_value,
+            func.count(Violation.id),
+            func.sum(Violation.risk_value)
+        )
+        .where(Violation.scan_id == scan_id)
+        .group_by(
+            Violation.scan_id,
+            Violation.table_name,
+            Violation.rule_id,
+            Violation.risk_value
+        )
+    )
+
+    compact = (
+        select(
+            ViolationRecordSet.scan_id,
+            ViolationRecordSet.table_name,
+            ViolationRecordSet.rule_id,
+            ViolationRecordSet.risk_value,
+            func.sum(ViolationRecordSet.record_count),
+            func.sum(ViolationRecordSet.record_count * ViolationRecordSet.risk_value)
+        )
+        .where(ViolationRecordSet.scan_id == scan_id)
+        .group_by(
+            ViolationRecordSet.scan_id,
+            ViolationRecordSet.table_name,
+            ViolationRecordSet.rule_id,
+            ViolationRecordSet.risk_value
+        )
+    )
+
+    # A scan is stored one way or the other, so the grains never overlap
+    db.execute(
+        insert(ScanSummaryGroup).from_select(
+            ["scan_id", "table_name", "rule_id", "risk_value", "violation_count", "risk_sum"],
+            union_all(grouped, compact)
+        )
+    )
+
+    totals = (
+        db.query(
+            func.coalesce(func.sum(ScanSummaryGroup.violation_count), 0),
+            func.coalesce(func.sum(ScanSummaryGroup.risk_sum), 0),
+            func.min(ScanSummaryGroup.risk_value),
+            func.max(ScanSummaryGroup.risk_value),
+            func.count(func.distinct(ScanSummaryGroup.rule_id))
+        )
+        .filter(ScanSummaryGroup.scan_id == scan_id)
+        .one()
+    )
+
+    summary = db.get(ScanSummary, scan_id, with_for_update=True)
+
+    if summary is None:
+        summary = ScanSummary(scan_id=scan_id, trend_applied=False)
+        db.add(summary)
+
+    summary.total_violations = totals[0]
+    summary.total_risk = totals[1]
+    summary.min_risk = totals[2]
+    summary.max_risk = totals[3]
+    summary.distinct_rules = totals[4]
+    summary.computed_at = datetime.utcnow()
+    db.flush()
+
+    return summary
+
+
+def finalize_scan(db: Session, scan_id: int) -> ScanSummary:
+    """
+    Everything that must land in the same transaction as a scan's
+    violations: its rollup, its contribution to the trend buckets, and
+    a new data generation so cached analytics responses are invalidated.
+    Compact record parts are merged into their record sets first.
+    """
+
+    consolidate_record_sets(db, scan_id)
+    summary = build_scan_summary(db, scan_id)
+    apply_scan_to_trends(db, scan_id)
+    bump_data_generation(db)
+
+    return summary
+
+
+def backfill_scan_summaries(db: Session) -> int:
+    """
+    Summarize scans that completed before rollups existed. Run by the
+    scheduler leader only (see scheduler.run_backfills), so two workers
+    starting together don't finalize the same scans.
+    """
+
+    missing = [
+        scan_id for (scan_id,) in
+        db.query(ScanHistory.id)
+        .outerjoin(ScanSummary, ScanSummary.scan_id == ScanHistory.id)
+        .filter(
+            ScanSummary.scan_id.is_(None),
+            # Failed scans may hold some checkpointed shards; never roll those up
+            ScanHistory.status.notin_(UNFINISHED_STATUSES + ("FAILED", "AUTO_FAILED"))
+        )
+        .all()
+    ]
+
+    for scan_id in missing:
+        finalize_scan(db, scan_id)
+        db.commit()
+
+    return len(missing)
+
+
+# ─────────────────────────────────────────────
+# Read Helpers (used by dashboard / risk / report)
+# ─────────────────────────────────────────────
+def _groups(
+    db: Session,
+    scan_id: Optional[int],
+    *columns,
+    table_name: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    query = db.query(*columns).select_from(ScanSummaryGroup)
+
+    if scan_id is not None:
+        query = query.filter(ScanSummaryGroup.scan_id == scan_id)
+
+    if table_name is not None:
+        query = query.filter(ScanSummaryGroup.table_name == table_name)
+
+    # Rollups are per scan, so a time window selects scans by scanned_at
+    if start is not None or end is not None:
+        query = query.join(ScanHistory, ScanHistory.id == ScanSummaryGroup.scan_id)
+
+        if start is not None:
+            query = query.filter(ScanHistory.scanned_at >= start)
+        if end is not None:
+            query = query.filter(ScanHistory.scanned_at < end)
+
+    return query
+
+
+def summary_totals(db: Session, scan_id: Optional[int] = None) -> Dict[str, Any]:
+    query = db.query(
+        func.coalesce(func.sum(ScanSummary.total_violations), 0),
+        func.coalesce(func.sum(ScanSummary.total_risk), 0),
+        func.min(ScanSummary.min_risk),
+        func.max(ScanSummary.max_risk)
+    )
+
+    if scan_id is not None:
+        query = query.filter(ScanSummary.scan_id == scan_id)
+
+    total_violations, total_risk, min_risk, max_risk = query.one()
+
+    return {
+        "total_violations": int(total_violations),
+        "total_risk": int(total_risk),
+        "min_risk": min_risk or 0,
+        "max_risk": max_risk or 0,
+    }
+
+
+def distinct_rule_count(db: Session, scan_id: Optional[int] = None) -> int:
+    return _groups(
+        db, scan_id, func.count(func.distinct(ScanSummaryGroup.rule_id))
+    ).scalar() or 0
+
+
+def risk_distribution(
+    db: Session,
+    scan_id: Optional[int] = None,
+    **filters
+) -> Dict[int, Dict[str, int]]:
+    """
+    One grouped pass: {risk_value: {"count": n, "risk": sum}}.
+    Count, sum, min, max and threshold counts all derive from this.
+    """
+
+    rows = (
+        _groups(
+            db, scan_id,
+            ScanSummaryGroup.risk_value,
+            func.sum(ScanSummaryGroup.violation_count),
+            func.sum(ScanSummaryGroup.risk_sum),
+            **filters
+        )
+        .group_by(ScanSummaryGroup.risk_value)
+        .all()
+    )
+
+    return {
+        risk: {"count": int(count), "risk": int(risk_sum)}
+        for risk, count, risk_sum in rows
+    }
+
+
+def top_tables(
+    db: Session,
+    scan_id: Optional[int] = None,
+    limit: int = 5,
+    **filters
+) -> List[Dict[str, Any]]:
+    rows = (
+        _groups(
+            db, scan_id,
+            ScanSummaryGroup.table_name,
+            func.sum(ScanSummaryGroup.risk_sum).label("table_risk"),
+            **filters
+        )
+        .group_by(ScanSummaryGroup.table_name)
+        .order_by(desc("table_risk"))
+        .limit(limit)
+        .all()
+    )
+
+    return [{"table_name": table, "total_risk": int(risk)} for table, risk in rows]
+
+
+def top_rules(
+    db: Session,
+    scan_id: Optional[int] = None,
+    limit: int = 5,
+    **filters
+) -> List[Dict[str, Any]]:
+    rows = (
+        _groups(
+            db, scan_id,
+            ScanSummaryGroup.rule_id,
+            func.sum(ScanSummaryGroup.risk_sum).label("rule_risk"),
+            **filters
+        )
+        .group_by(ScanSummaryGroup.rule_id)
+        .order_by(desc("rule_risk"))
+        .limit(limit)
+        .all()
+    )
+
+    return [{"rule_id": rule_id, "total_risk": int(risk)} for rule_id, risk in rows]
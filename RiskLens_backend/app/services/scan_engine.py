@@ -0,0 +1,258 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, delete, inspect, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import VIOLATION_STORAGE_MODE
+from app.models.rule import Rule
+from app.models.violation import Violation
+from app.models.violation_record_part import ViolationRecordPart
+from app.models.violation_record_set import ViolationRecordSet
+from app.services.record_set import build_record_sets, decode_array, encode_ids
+
+
+ALLOWED_OPERATORS = {"=", "==", "!=", "<", ">", "<=", ">="}
+
+
+# ─────────────────────────────────────────────
+# Severity → Numeric Risk Mapping
+# ─────────────────────────────────────────────
+def severity_to_risk(severity: str) -> int:
+    mapping = {
+        "Low": 1,
+        "Medium": 3,
+        "High": 5,
+        "Critical": 8
+    }
+    return mapping.get(severity, 3)
+
+
+# ─────────────────────────────────────────────
+# Data Sources
+# ─────────────────────────────────────────────
+DATASET_READERS = {
+    ".csv": lambda path: pd.read_csv(path, memory_map=True),
+    ".xlsx": pd.read_excel,
+    ".xls": pd.read_excel,
+    ".json": pd.read_json,
+}
+
+
+def build_dataset_engine(path: str, suffix: str) -> Engine:
+    """Load an uploaded dataset into an in-memory SQLite table named temp_table."""
+
+    df = DATASET_READERS[suffix](path)
+
+    # One shared connection: the data lives in it and must survive thread hops
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    df.to_sql("temp_table", engine, if_exists="replace", index=False)
+
+    return engine
+
+
+def introspect_schema(engine: Engine) -> Dict[str, List[str]]:
+    inspector = inspect(engine)
+    return {
+        table: [col["name"] for col in inspector.get_columns(table)]
+        for table in inspector.get_table_names()
+    }
+
+
+# ─────────────────────────────────────────────
+# Rule Compilation
+# ─────────────────────────────────────────────
+class CompiledRule:
+    """A stored rule bound to one data source's dialect and schema."""
+
+    def __init__(self, rule: Rule, query, field: str, operator: str, value: Any):
+        self.rule = rule
+        self.query = query
+        self.field = field
+        self.operator = operator
+        self.value = value
+        self.risk_value = severity_to_risk(rule.severity)
+
+
+def compile_rule(
+    rule: Rule,
+    schema: Dict[str, List[str]],
+    engine: Engine
+) -> Optional[CompiledRule]:
+    """
+    Turn a stored rule into a parameterized violation query.
+
+    Returns None when the rule can't run against this source
+    (unknown table/column or disallowed operator).
+    """
+
+    condition = rule.condition_json or {}
+
+    field = condition.get("field")
+    operator = condition.get("operator")
+    value = condition.get("value")
+
+    if (
+        rule.table_name not in schema
+        or field not in schema[rule.table_name]
+        or operator not in ALLOWED_OPERATORS
+    ):
+        return None
+
+    quote = engine.dialect.identifier_preparer.quote
+
+    query = text(f"""
+        SELECT * FROM {quote(rule.table_name)}
+        WHERE NOT ({quote(field)} {operator} :value)
+    """)
+
+    return CompiledRule(rule, query, field, operator, value)
+
+
+def compile_rules(
+    rules: List[Rule],
+    schema: Dict[str, List[str]],
+    engine: Engine
+) -> List[CompiledRule]:
+    compiled = (compile_rule(rule, schema, engine) for rule in rules)
+    return [c for c in compiled if c is not None]
+
+
+# ─────────────────────────────────────────────
+# Evaluation
+# ─────────────────────────────────────────────
+def evaluate_rules(
+    conn,
+    compiled_rules: List[CompiledRule],
+    scan_id: Optional[int],
+    timer=None
+) -> List[dict]:
+    """
+    Run compiled rules on a Session or Connection to the data source.
+    Returns violation rows ready for persist_violations(). A ScanTimer,
+    if given, gets each rule's query time and row count.
+    """
+
+    violations = []
+
+    for c in compiled_rules:
+        started = time.perf_counter()
+        rows = conn.execute(c.query, {"value": c.value}).fetchall()
+
+        if timer is not None:
+            timer.rule_query(c.rule.id, time.perf_counter() - started, len(rows))
+
+        for row in rows:
+            violations.append({
+                "rule_id": c.rule.id,
+                "scan_id": scan_id,
+                "table_name": c.rule.table_name,
+                "record_id": row[0],
+                "field_name": c.field,
+                "actual_value": str(row._mapping.get(c.field)),
+                "expected_condition": f"{c.operator} {c.value}",
+                "explanation": "Rule condition violated",
+                "risk_value": c.risk_value,
+            })
+
+    return violations
+
+
+def is_compact_scan(db, scan_id: int) -> bool:
+    """Whether the scan's violations were stored as record sets (or parts, while it runs)."""
+
+    return any(
+        db.query(model.id).filter(model.scan_id == scan_id).first() is not None
+        for model in (ViolationRecordSet, ViolationRecordPart)
+    )
+
+
+def persist_violations(db, violations: List[dict], mode: str = VIOLATION_STORAGE_MODE):
+    if not violations:
+        return
+
+    if mode == "compact":
+        # One part per shard; merged once per rule by consolidate_record_sets()
+        db.execute(insert(ViolationRecordPart), build_record_sets(violations))
+        return
+
+    # Executemany insert; no ORM identity-map bookkeeping per row
+    db.execute(insert(Violation), violations)
+
+
+def consolidate_record_sets(db, scan_id: int):
+    """
+    Merge the scan's record parts into one record set per rule, decoding
+    and encoding each rule's ids once, and delete the parts. Call in the
+    transaction that finalizes the scan.
+    """
+
+    rule_ids = [
+        rule_id for (rule_id,) in
+        db.execute(
+            select(ViolationRecordPart.rule_id)
+            .where(ViolationRecordPart.scan_id == scan_id)
+            .distinct()
+        ).all()
+    ]
+
+    for rule_id in rule_ids:
+        parts = db.execute(
+            select(ViolationRecordPart).where(
+                ViolationRecordPart.scan_id == scan_id,
+                ViolationRecordPart.rule_id.is_(None) if rule_id is None
+                else ViolationRecordPart.rule_id == rule_id
+            )
+        ).scalars().all()
+
+        existing = db.execute(
+            select(ViolationRecordSet)
+            .where(
+                ViolationRecordSet.scan_id == scan_id,
+                ViolationRecordSet.rule_id.is_(None) if rule_id is None
+                else ViolationRecordSet.rule_id == rule_id
+            )
+            .with_for_update()
+        ).scalars().first()
+
+        blobs = [part.record_ids for part in parts]
+        if existing is not None:
+            blobs.append(existing.record_ids)
+
+        ids = np.unique(np.concatenate([decode_array(blob) for blob in blobs]))
+
+        values = {
+            "record_ids": encode_ids(ids),
+            "record_count": int(ids.size),
+            "min_record_id": int(ids[0]),
+            "max_record_id": int(ids[-1]),
+        }
+
+        if existing is None:
+            first = parts[0]
+            db.execute(insert(ViolationRecordSet), [{
+                "scan_id": scan_id,
+                "rule_id": rule_id,
+                "table_name": first.table_name,
+                "field_name": first.field_name,
+                "expected_condition": first.expected_condition,
+                "risk_value": first.risk_value,
+                **values,
+            }])
+        else:
+            db.execute(
+                update(ViolationRecordSet)
+                .where(ViolationRecordSet.id == existing.id)
+                .values(**values)
+            )
+
+        db.execute(delete(ViolationRecordPart).where(
+            ViolationRecordPart.id.in_([part.id for part in parts])
+        ))
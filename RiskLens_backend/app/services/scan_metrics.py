@@ -0,0 +1,340 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.core.db_pool import WAIT_BUCKETS, InstrumentedQueuePool
+from app.models.metric_sample import MetricSample
+
+
+# Pipeline phases, in the order a manual scan goes through them
+PHASES = (
+    "upload",                # spooling policy / dataset uploads to disk
+    "dataset_load",          # dataset file -> in-memory SQLite table
+    "pdf_extraction",
+    "llm_extraction",
+    "schema_introspection",
+    "change_detection",
+    "shard_planning",
+    "rule_query",            # summed over every rule query of the scan
+    "persistence",           # violation inserts + checkpoint commits
+    "rollup",
+)
+
+# Histogram bucket bounds (seconds)
+PHASE_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+QUERY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+ROWS_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+_LE = re.compile(r',?le="([^"]*)"')
+
+
+# ─────────────────────────────────────────────
+# Per-scan Timer (persisted to ScanHistory.phase_timings)
+# ─────────────────────────────────────────────
+class ScanTimer:
+    """
+    Accumulates phase seconds and per-rule query stats for one scan run.
+    Shards run on several threads, so every update takes the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}
+        self.rules: Dict[str, Dict] = {}
+        self.rows_fetched = 0
+        self.violations_persisted = 0
+        self.queries: List[Tuple[float, int]] = []  # (seconds, rows) per rule query
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def rule_query(self, rule_id, seconds: float, rows: int):
+        with self._lock:
+            self.phases["rule_query"] = self.phases.get("rule_query", 0.0) + seconds
+            self.rows_fetched += rows
+            self.queries.append((seconds, rows))
+
+            stats = self.rules.setdefault(str(rule_id), {"queries": 0, "seconds": 0.0, "rows": 0})
+            stats["queries"] += 1
+            stats["seconds"] += seconds
+            stats["rows"] += rows
+
+    def persisted(self, seconds: float, violations: int):
+        with self._lock:
+            self.phases["persistence"] = self.phases.get("persistence", 0.0) + seconds
+            self.violations_persisted += violations
+
+    def merged_into(self, previous: Optional[Dict]) -> Dict:
+        """
+        This run's timings added onto a scan's stored ones; a resumed
+        scan keeps what its earlier runs spent.
+        """
+
+        previous = previous or {}
+
+        with self._lock:
+            phases = dict(previous.get("phases") or {})
+            for name, seconds in self.phases.items():
+                phases[name] = round(phases.get(name, 0.0) + seconds, 4)
+
+            rules = {key: dict(value) for key, value in (previous.get("rules") or {}).items()}
+            for key, stats in self.rules.items():
+                merged = rules.setdefault(key, {"queries": 0, "seconds": 0.0, "rows": 0})
+                merged["queries"] += stats["queries"]
+                merged["seconds"] = round(merged["seconds"] + stats["seconds"], 4)
+                merged["rows"] += stats["rows"]
+
+            return {
+                "phases": phases,
+                "rules": rules,
+                "rows_fetched": (previous.get("rows_fetched") or 0) + self.rows_fetched,
+                "violations_persisted": (previous.get("violations_persisted") or 0) + self.violations_persisted,
+                "runs": (previous.get("runs") or 0) + 1,
+            }
+
+
+# ─────────────────────────────────────────────
+# Scan Metrics (Prometheus text format)
+# Stored as cumulative samples in the app database, so every worker
+# process adds to the same series and any worker can serve a scrape
+# ─────────────────────────────────────────────
+# (name, type, help), in exposition order
+SCAN_FAMILIES = (
+    ("policyguard_scans_total", "counter", "Scan runs by mode and final status"),
+    ("policyguard_scan_duration_seconds", "histogram", "Wall time of one scan run"),
+    ("policyguard_scan_phase_seconds_total", "counter", "Seconds spent per scan pipeline phase"),
+    ("policyguard_scan_phase_seconds", "histogram", "Per-scan time spent in each pipeline phase"),
+    ("policyguard_rule_query_seconds", "histogram", "Time of one rule query (one shard of one rule)"),
+    ("policyguard_rule_query_rows", "histogram", "Rows fetched by one rule query"),
+    ("policyguard_rows_fetched_total", "counter", "Violating rows fetched from data sources"),
+    ("policyguard_violations_persisted_total", "counter", "Violation rows written"),
+    ("policyguard_rule_queries_total", "counter", "Rule queries run"),
+)
+
+
+class _Histogram:
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _add(samples: Dict[Tuple[str, str], float], name: str, value: float, **labels):
+    key = (name, _labels(**labels))
+    samples[key] = samples.get(key, 0.0) + value
+
+
+def _add_histogram(samples: Dict[Tuple[str, str], float], name: str, hist: _Histogram, **labels):
+    for bound, count in zip(hist.buckets, hist.counts):
+        _add(samples, f"{name}_bucket", count, **labels, le=_bound(bound))
+
+    _add(samples, f"{name}_bucket", hist.count, **labels, le="+Inf")
+    _add(samples, f"{name}_sum", hist.sum, **labels)
+    _add(samples, f"{name}_count", hist.count, **labels)
+
+
+def _increment(db: Session, samples: Dict[Tuple[str, str], float]):
+    rows = [
+        {"name": name, "labels": labels, "value": value}
+        for (name, labels), value in sorted(samples.items())
+    ]
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+
+        stmt = upsert(MetricSample)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["name", "labels"],
+                set_={"value": MetricSample.value + stmt.excluded.value}
+            ),
+            rows
+        )
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(MetricSample)
+            .where(MetricSample.name == row["name"], MetricSample.labels == row["labels"])
+            .values(value=MetricSample.value + row["value"])
+        )
+
+        if not result.rowcount:
+            db.execute(insert(MetricSample).values(**row))
+
+
+def observe_scan(
+    db: Session,
+    scan_mode: str,
+    status: str,
+    timer: Optional[ScanTimer],
+    duration: Optional[float] = None
+):
+    """
+    Add one finished (or interrupted) scan run to the stored metrics.
+    Runs in the caller's transaction, so the run is counted exactly
+    when its final status is committed.
+    """
+
+    samples: Dict[Tuple[str, str], float] = {}
+    mode = scan_mode or "unknown"
+
+    _add(samples, "policyguard_scans_total", 1, mode=mode, status=status or "unknown")
+
+    if duration is not None:
+        hist = _Histogram(PHASE_BUCKETS)
+        hist.observe(duration)
+        _add_histogram(samples, "policyguard_scan_duration_seconds", hist, mode=mode)
+
+    if timer is not None:
+        with timer._lock:
+            phases = dict(timer.phases)
+            queries = list(timer.queries)
+            rows_fetched = timer.rows_fetched
+            persisted = timer.violations_persisted
+
+        for name, seconds in phases.items():
+            _add(samples, "policyguard_scan_phase_seconds_total", seconds, phase=name)
+
+            hist = _Histogram(PHASE_BUCKETS)
+            hist.observe(seconds)
+            _add_histogram(samples, "policyguard_scan_phase_seconds", hist, phase=name)
+
+        query_hist = _Histogram(QUERY_BUCKETS)
+        rows_hist = _Histogram(ROWS_BUCKETS)
+
+        for seconds, rows in queries:
+            query_hist.observe(seconds)
+            rows_hist.observe(rows)
+
+        _add_histogram(samples, "policyguard_rule_query_seconds", query_hist)
+        _add_histogram(samples, "policyguard_rule_query_rows", rows_hist)
+
+        _add(samples, "policyguard_rows_fetched_total", rows_fetched)
+        _add(samples, "policyguard_violations_persisted_total", persisted)
+        _add(samples, "policyguard_rule_queries_total", len(queries))
+
+    _increment(db, samples)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _bound(value: float) -> str:
+    return f"{value:g}"
+
+
+def _pool_lines(pool) -> List[str]:
+    """
+    The serving worker's own connection pool. Labelled by worker so one
+    process's counters never read as a reset of another's.
+    """
+
+    if not isinstance(pool, InstrumentedQueuePool):
+        return []
+
+    stats = pool.snapshot()
+    worker = os.getpid()
+
+    lines = [
+        "# HELP policyguard_db_pool_checked_out App database connections currently checked out",
+        "# TYPE policyguard_db_pool_checked_out gauge",
+        f"policyguard_db_pool_checked_out{_labels(worker=worker)} {pool.checkedout()}",
+        "# HELP policyguard_db_pool_timeouts_total Checkouts that gave up waiting for a connection",
+        "# TYPE policyguard_db_pool_timeouts_total counter",
+        f"policyguard_db_pool_timeouts_total{_labels(worker=worker)} {stats['timeouts']}",
+        "# HELP policyguard_db_pool_checkout_wait_seconds Time spent waiting for an app database connection",
+        "# TYPE policyguard_db_pool_checkout_wait_seconds histogram",
+    ]
+
+    # The pool's buckets are already cumulative
+    lines.extend(
+        f"policyguard_db_pool_checkout_wait_seconds_bucket{_labels(worker=worker, le=_bound(bound))} {count}"
+        for bound, count in zip(WAIT_BUCKETS, stats["wait_buckets"])
+    )
+    lines.append(
+        f"policyguard_db_pool_checkout_wait_seconds_bucket{_labels(worker=worker, le='+Inf')} {stats['checkouts']}"
+    )
+    lines.append(
+        f"policyguard_db_pool_checkout_wait_seconds_sum{_labels(worker=worker)} {stats['wait_seconds_total']:.6f}"
+    )
+    lines.append(f"policyguard_db_pool_checkout_wait_seconds_count{_labels(worker=worker)} {stats['checkouts']}")
+
+    return lines
+
+
+def _sample_key(sample: MetricSample):
+    # Buckets in ascending le order, whatever order the labels sort in
+    match = _LE.search(sample.labels)
+
+    if match is None:
+        return sample.labels, 0.0
+
+    return _LE.sub("", sample.labels), float(match.group(1).replace("+Inf", "inf"))
+
+
+def _value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.6f}"
+
+
+def render_metrics(db: Session, pool=None) -> str:
+    by_name: Dict[str, List[MetricSample]] = {}
+    for sample in db.query(MetricSample).all():
+        by_name.setdefault(sample.name, []).append(sample)
+
+    lines = []
+
+    for family, kind, help_text in SCAN_FAMILIES:
+        lines += [f"# HELP {family} {help_text}", f"# TYPE {family} {kind}"]
+
+        if kind == "histogram":
+            names = (f"{family}_bucket", f"{family}_sum", f"{family}_count")
+        else:
+            names = (family,)
+
+        samples = sorted(
+            ((sample, name) for name in names for sample in by_name.get(name, [])),
+            key=lambda pair: (_sample_key(pair[0])[0], names.index(pair[1]), _sample_key(pair[0])[1])
+        )
+        lines.extend(f"{name}{sample.labels} {_value(sample.value)}" for sample, name in samples)
+
+    lines.extend(_pool_lines(pool))
+
+    return "\n".join(lines) + "\n"
@@ -1,131 +1,183 @@
 import threading
-import time
-from sqlalchemy import text
+from datetime import datetime, timedelta
 
+from app.core.config import CDC_BATCH_SIZE, CDC_POLL_SECONDS, SCHEDULER_HEARTBEAT_SECONDS, SCHEDULER_TICK_SECONDS
 from app.core.database import SessionLocal
-from app.models.rule import Rule
-from app.models.scan_history import ScanHistory
+from app.models.scheduler_lease import SchedulerLease
 from app.models.system_config import SystemConfig
-from app.models.violation import Violation
-
-
-ALLOWED_OPERATORS = {"=", "==", "!=", "<", ">", "<=", ">="}
+from app.services.target_scanner import dispatch_due_targets, in_flight_targets
+from app.services.change_capture import consume_changes, listener
+from app.services.rollup_service import backfill_scan_summaries
+from app.services.trend_service import backfill_trends, downsample_trends
+from app.services.retention_service import apply_retention, ensure_partitions
+from app.services.leader_election import LeaderLease, lease_status
 
 
 # ─────────────────────────────────────────────
-# Inline Compliance Logic for Auto Scan
+# Housekeeping Cycle (leader only, every system interval)
 # ─────────────────────────────────────────────
-def run_auto_scan(db, rules):
+def run_cycle(db, config):
 
-    violations = []
+    try:
+        downsample_trends(db)
+    except Exception as e:
+        db.rollback()
+        print("Trend downsampling error:", e)
 
-    for rule in rules:
-        table = rule.table_name
-        condition = rule.condition_json
+    try:
+        ensure_partitions(db)
+        apply_retention(db)
+    except Exception as e:
+        db.rollback()
+        print("Retention error:", e)
 
-        field = condition.get("field")
-        operator = condition.get("operator")
-        value = condition.get("value")
 
-        if not table or not field or operator not in ALLOWED_OPERATORS:
-            continue
+def run_if_due(lease: LeaderLease):
+    """
+    Run a cycle when the schedule stored on the lease row says it's due.
+    The schedule lives in the DB, so a new leader picks up where the
+    old one stopped instead of restarting the interval.
+    """
 
-        query = text(f"""
-            SELECT * FROM {table}
-            WHERE NOT ({field} {operator} :value)
-        """)
+    db = SessionLocal()
 
-        try:
-            result = db.execute(query, {"value": value})
-            rows = result.fetchall()
-        except Exception:
-            continue
-
-        for row in rows:
-            violations.append(
-                Violation(
-                    rule_id=rule.id,
-                    table_name=table,
-                    record_id=row[0],
-                    message=f"{field} {operator} {value} violated",
-                    severity=rule.severity,
-                    remediation="Auto detected violation"
-                )
-            )
-
-    return violations
+    try:
+        config = db.query(SystemConfig).first()
 
+        if not config:
+            return
 
-# ─────────────────────────────────────────────
-# Background Auto Scan Thread
-# ─────────────────────────────────────────────
-def auto_scan():
+        row = db.get(SchedulerLease, lease.name)
+        now = datetime.utcnow()
 
-    while True:
+        if row is None or (row.next_run_at is not None and now < row.next_run_at):
+            return
 
-        db = SessionLocal()
+        due = row.next_run_at or now
+        row.last_run_started_at = now
+        row.last_run_lag_seconds = round((now - due).total_seconds(), 3)
+        db.commit()
 
         try:
-            config = db.query(SystemConfig).first()
+            run_cycle(db, config)
+        finally:
+            db.rollback()
 
-            if not config:
-                time.sleep(300)
-                continue
+            row = db.get(SchedulerLease, lease.name)
+            row.last_run_finished_at = datetime.utcnow()
+            row.next_run_at = now + timedelta(minutes=config.scan_interval_minutes)
+            db.commit()
 
-            interval = config.scan_interval_minutes * 60
+    finally:
+        db.close()
 
-            if config.auto_scan_enabled:
 
-                start_time = time.time()
+def run_backfills():
+    """
+    Rollups and trends for scans that finished before those existed.
+    Once per leadership: a single worker does it, never two at once.
+    """
 
-                try:
-                    rules = db.query(Rule).all()
+    try:
+        with SessionLocal() as db:
+            backfilled = backfill_scan_summaries(db)
+            backfilled_trends = backfill_trends(db)
+        if backfilled or backfilled_trends:
+            print(f"Built rollups for {backfilled} scans, trends for {backfilled_trends}")
+    except Exception as e:
+        print("Rollup backfill failed:", e)
 
-                    violations = run_auto_scan(db, rules)
 
-                    for v in violations:
-                        db.add(v)
+def run_due_targets():
+    """Fan scans out over registered targets whose own schedule is due."""
 
-                    duration = time.time() - start_time
+    db = SessionLocal()
 
-                    log = ScanHistory(
-                        scan_mode="database",
-                        total_rules=len(rules),
-                        total_violations=len(violations),
-                        status="AUTO_SUCCESS",
-                        duration_seconds=duration
-                    )
+    try:
+        config = db.query(SystemConfig).first()
 
-                    db.add(log)
-                    db.commit()
+        # System switch still turns all auto-scanning off
+        if not config or not config.auto_scan_enabled:
+            return
 
-                except Exception as e:
-                    db.rollback()
+        dispatch_due_targets(db, config.scan_interval_minutes)
 
-                    duration = time.time() - start_time
+    finally:
+        db.close()
 
-                    log = ScanHistory(
-                        scan_mode="database",
-                        total_rules=0,
-                        total_violations=0,
-                        status="AUTO_FAILED",
-                        duration_seconds=duration
-                    )
 
-                    db.add(log)
-                    db.commit()
+# ─────────────────────────────────────────────
+# Background Threads (every worker; only the leader runs jobs)
+# ─────────────────────────────────────────────
+lease = LeaderLease("auto_scan")
 
-                    print("Auto Scan Error:", e)
+_stop = threading.Event()
 
-        finally:
-            db.close()
 
-        time.sleep(interval if config else 300)
+def _heartbeat_loop():
+    # Separate thread so long scans don't let the lease expire
+    while not _stop.wait(SCHEDULER_HEARTBEAT_SECONDS):
+        if lease.is_leader():
+            lease.heartbeat()
+
+
+def _scheduler_loop():
+    backfilled = False
+
+    while not _stop.is_set():
+        try:
+            if lease.is_leader() or lease.try_acquire():
+                if not backfilled:
+                    run_backfills()
+                    backfilled = True
+
+                run_if_due(lease)
+                run_due_targets()
+            else:
+                # A later leadership (after a failover) backfills again
+                backfilled = False
+        except Exception as e:
+            print("Scheduler error:", e)
+
+        _stop.wait(SCHEDULER_TICK_SECONDS)
+
+
+def _change_capture_loop():
+    # Leader only, so each change is consumed by one worker
+    while not _stop.is_set():
+        consumed = 0
+
+        if lease.is_leader():
+            try:
+                consumed = consume_changes()
+            except Exception as e:
+                print("Change capture error:", e)
+        else:
+            listener.close()
+
+        # A full batch means more is waiting; otherwise sleep until NOTIFY or the poll interval
+        if consumed < CDC_BATCH_SIZE:
+            if lease.is_leader():
+                listener.wait(CDC_POLL_SECONDS)
+            else:
+                _stop.wait(SCHEDULER_TICK_SECONDS)
+
+
+def scheduler_status() -> dict:
+    return {**lease_status(lease), "targets_in_flight": in_flight_targets()}
 
 
 # ─────────────────────────────────────────────
-# Start Thread
+# Start / Stop Threads
 # ─────────────────────────────────────────────
 def start_scheduler():
-    thread = threading.Thread(target=auto_scan, daemon=True)
-    thread.start()
\ No newline at end of file
+    _stop.clear()
+    threading.Thread(target=_scheduler_loop, daemon=True).start()
+    threading.Thread(target=_heartbeat_loop, daemon=True).start()
+    threading.Thread(target=_change_capture_loop, daemon=True).start()
+
+
+def stop_scheduler():
+    _stop.set()
+    lease.release()
+    listener.close()
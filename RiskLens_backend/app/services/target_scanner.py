@@ -0,0 +1,226 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.engine import Engine
+
+from app.core.config import AUTO_SCAN_CHANGE_DETECTION, AUTO_SCAN_MAX_WORKERS
+from app.core.database import SessionLocal, build_target_url, create_dynamic_engine
+from app.models.rule import Rule
+from app.models.scan_history import ScanHistory
+from app.models.targetdb import TargetDatabase
+from app.services.change_detection import carry_forward_violations, detect_changes, record_fingerprints
+from app.services.checkpoint_service import (
+    create_checkpoints,
+    finish_checkpointed_scan,
+    mark_interrupted,
+    plan_shards,
+    run_checkpoints,
+)
+from app.services.scan_engine import compile_rules, introspect_schema
+from app.services.scan_metrics import ScanTimer, observe_scan
+
+
+# ─────────────────────────────────────────────
+# Pooled Engines (one per target, reused across runs)
+# ─────────────────────────────────────────────
+_engines: Dict[int, Tuple[tuple, Engine]] = {}
+_engines_lock = threading.Lock()
+
+
+def get_target_engine(target: TargetDatabase) -> Engine:
+    """
+    Engine whose pool is sized to the target's concurrency limit, so a
+    run can never hold more connections to it than allowed. Rebuilt
+    when the target's URL or limit changes.
+    """
+
+    url = build_target_url(target)
+    size = max(1, target.max_concurrency or 1)
+    key = (url.render_as_string(hide_password=False), size)
+
+    with _engines_lock:
+        cached = _engines.get(target.id)
+
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        if cached is not None:
+            cached[1].dispose()
+
+        engine = create_dynamic_engine(url, pool_size=size, max_overflow=0)
+        _engines[target.id] = (key, engine)
+
+        return engine
+
+
+def dispose_target_engine(target_id: int):
+    with _engines_lock:
+        cached = _engines.pop(target_id, None)
+
+    if cached is not None:
+        cached[1].dispose()
+
+
+# ─────────────────────────────────────────────
+# One Target Run
+# ─────────────────────────────────────────────
+def scan_target(target_id: int) -> dict:
+    """Scan one registered target with its policy's rules, logged to ScanHistory."""
+
+    db = SessionLocal()
+    start_time = time.time()
+    timer = ScanTimer()
+    log = None
+
+    try:
+        target = db.get(TargetDatabase, target_id)
+
+        if target is None or target.policy_id is None:
+            return {"target_id": target_id, "status": "SKIPPED"}
+
+        rules = db.query(Rule).filter(Rule.policy_id == target.policy_id).all()
+        engine = get_target_engine(target)
+        concurrency = max(1, target.max_concurrency or 1)
+
+        with timer.phase("schema_introspection"):
+            schema = introspect_schema(engine)
+
+        compiled = compile_rules(rules, schema, engine)
+        tables = {c.rule.table_name for c in compiled}
+
+        plan = None
+        unchanged = set()
+
+        if AUTO_SCAN_CHANGE_DETECTION:
+            with timer.phase("change_detection"):
+                plan = detect_changes(db, engine, schema, tables, target.id, target.policy_id)
+            unchanged = plan["unchanged"]
+
+        log = ScanHistory(
+            target_db_id=target.id,
+            policy_id=target.policy_id,
+            scan_mode="database",
+            input_format="sql",
+            total_rules=len(compiled),
+            total_violations=0,
+            tables_checked=len(tables) if plan else None,
+            skipped_tables=len(unchanged) if plan else None,
+            skipped_rules=sum(c.rule.table_name in unchanged for c in compiled) if plan else None,
+            status="PROCESSING"
+        )
+        db.add(log)
+        db.commit()
+
+        target.last_scanned_at = datetime.utcnow()
+
+        if tables and unchanged == tables:
+            # Nothing moved: no rule runs, no rows copied, no rollups
+            log.status = "AUTO_UNCHANGED"
+            log.duration_seconds = time.time() - start_time
+            log.phase_timings = timer.merged_into(None)
+            record_fingerprints(db, target.id, target.policy_id, plan, scan_id=None)
+            observe_scan(db, log.scan_mode, log.status, timer, log.duration_seconds)
+            db.commit()
+
+            return {"target_id": target_id, "scan_id": log.id, "status": log.status}
+
+        to_run = [c for c in compiled if c.rule.table_name not in unchanged]
+
+        if unchanged:
+            carry_forward_violations(db, plan["carry_from"], log.id)
+
+        with timer.phase("shard_planning"):
+            shards = plan_shards(engine, schema, to_run)
+
+        create_checkpoints(db, log, shards)
+        db.commit()
+
+        outcome = run_checkpoints(log.id, engine, to_run, concurrency, timer)
+        log = finish_checkpointed_scan(db, log.id, outcome, time.time() - start_time, auto=True, timer=timer)
+
+        if plan and outcome == "DONE":
+            record_fingerprints(db, target.id, target.policy_id, plan, scan_id=log.id)
+            db.commit()
+
+        return {"target_id": target_id, "scan_id": log.id, "status": log.status}
+
+    except Exception as e:
+        status = "AUTO_FAILED"
+
+        if log is not None and log.id is not None:
+            status = mark_interrupted(db, log.id, time.time() - start_time, failed_status=status, timer=timer)
+        else:
+            db.rollback()
+
+        print(f"Auto Scan Error (target {target_id}):", e)
+
+        return {"target_id": target_id, "status": status, "error": str(e)}
+
+    finally:
+        db.close()
+
+
+# ─────────────────────────────────────────────
+# Fan-out (bounded pool shared by all targets)
+# ─────────────────────────────────────────────
+_executor = ThreadPoolExecutor(max_workers=AUTO_SCAN_MAX_WORKERS, thread_name_prefix="auto-scan")
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def in_flight_targets() -> List[int]:
+    with _in_flight_lock:
+        return sorted(_in_flight)
+
+
+def _finished(target_id: int):
+    with _in_flight_lock:
+        _in_flight.discard(target_id)
+
+
+def dispatch_due_targets(db, default_interval_minutes: int) -> List[int]:
+    """
+    Queue every enabled target whose next_scan_at has passed. Doesn't
+    wait for the runs; a target still running is never queued twice.
+    next_scan_at advances at dispatch, so schedules are start-to-start.
+    """
+
+    now = datetime.utcnow()
+
+    with _in_flight_lock:
+        busy = set(_in_flight)
+
+    due = (
+        db.query(TargetDatabase)
+        .filter(
+            TargetDatabase.auto_scan_enabled.is_(True),
+            TargetDatabase.policy_id.isnot(None),
+            or_(TargetDatabase.next_scan_at.is_(None), TargetDatabase.next_scan_at <= now)
+        )
+        .all()
+    )
+
+    dispatched = []
+
+    for target in due:
+        if target.id in busy:
+            continue
+
+        interval = target.scan_interval_minutes or default_interval_minutes
+        target.next_scan_at = now + timedelta(minutes=interval)
+        dispatched.append(target.id)
+
+    db.commit()
+
+    for target_id in dispatched:
+        with _in_flight_lock:
+            _in_flight.add(target_id)
+
+        future = _executor.submit(scan_target, target_id)
+        future.add_done_callback(lambda _, target_id=target_id: _finished(target_id))
+
+    return dispatched
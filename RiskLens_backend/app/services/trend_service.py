@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, delete, update, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import TREND_HOURLY_RETENTION_DAYS, TREND_DAILY_RETENTION_DAYS
+from app.models.risk_trend_bucket import RiskTrendBucket
+from app.models.scan_history import ScanHistory
+from app.models.scan_summary import ScanSummary
+from app.models.scan_summary_group import ScanSummaryGroup
+
+
+GRANULARITIES = ("hour", "day", "week")
+
+# None = kept indefinitely
+RETENTION_DAYS = {
+    "hour": TREND_HOURLY_RETENTION_DAYS,
+    "day": TREND_DAILY_RETENTION_DAYS,
+    "week": None,
+}
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if granularity == "day":
+        return day
+
+    # ISO weeks start on Monday
+    return day - timedelta(days=day.weekday())
+
+
+# ─────────────────────────────────────────────
+# Incremental Update (one scan at a time)
+# ─────────────────────────────────────────────
+def _upsert(db: Session, row: Dict[str, Any]):
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+
+        stmt = upsert(RiskTrendBucket).values(**row)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "table_name", "rule_id"],
+            set_={
+                "violation_count": RiskTrendBucket.violation_count + stmt.excluded.violation_count,
+                "risk_sum": RiskTrendBucket.risk_sum + stmt.excluded.risk_sum,
+                "scan_count": RiskTrendBucket.scan_count + stmt.excluded.scan_count,
+            }
+        ))
+        return
+
+    result = db.execute(
+        update(RiskTrendBucket)
+        .where(
+            RiskTrendBucket.granularity == row["granularity"],
+            RiskTrendBucket.bucket_start == row["bucket_start"],
+            RiskTrendBucket.table_name == row["table_name"],
+            RiskTrendBucket.rule_id == row["rule_id"]
+        )
+        .values(
+            violation_count=RiskTrendBucket.violation_count + row["violation_count"],
+            risk_sum=RiskTrendBucket.risk_sum + row["risk_sum"],
+            scan_count=RiskTrendBucket.scan_count + row["scan_count"]
+        )
+    )
+
+    if not result.rowcount:
+        db.execute(insert(RiskTrendBucket).values(**row))
+
+
+def apply_scan_to_trends(db: Session, scan_id: int):
+    """
+    Add one scan's rollup groups into the hour, day and week buckets.
+    Reads only the scan's (table, rule) groups, never raw violations.
+    """
+
+    summary = db.get(ScanSummary, scan_id)
+
+    if summary is None or summary.trend_applied:
+        return
+
+    scanned_at = db.query(ScanHistory.scanned_at).filter(ScanHistory.id == scan_id).scalar()
+    scanned_at = scanned_at or datetime.utcnow()
+
+    groups = (
+        db.query(
+            ScanSummaryGroup.table_name,
+            ScanSummaryGroup.rule_id,
+            func.sum(ScanSummaryGroup.violation_count),
+            func.sum(ScanSummaryGroup.risk_sum)
+        )
+        .filter(ScanSummaryGroup.scan_id == scan_id)
+        .group_by(ScanSummaryGroup.table_name, ScanSummaryGroup.rule_id)
+        .all()
+    )
+
+    for granularity in GRANULARITIES:
+        start = bucket_start(scanned_at, granularity)
+
+        for table_name, rule_id, count, risk in groups:
+            _upsert(db, {
+                "granularity": granularity,
+                "bucket_start": start,
+                "table_name": table_name,
+                "rule_id": rule_id or 0,
+                "violation_count": int(count),
+                "risk_sum": int(risk),
+                "scan_count": 1,
+            })
+
+    summary.trend_applied = True
+    db.flush()
+
+
+def backfill_trends(db: Session) -> int:
+    pending = [
+        scan_id for (scan_id,) in
+        db.query(ScanSummary.scan_id)
+        .filter(ScanSummary.trend_applied.is_(False))
+        .order_by(ScanSummary.scan_id)
+        .all()
+    ]
+
+    for scan_id in pending:
+        apply_scan_to_trends(db, scan_id)
+        db.commit()
+
+    return len(pending)
+
+
+# ─────────────────────────────────────────────
+# Retention-aware Downsampling
+# ─────────────────────────────────────────────
+def downsample_trends(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Every scan is written at all granularities, so downsampling only
+    drops fine buckets past retention; the coarser ones already hold
+    their totals.
+    """
+
+    now = now or datetime.utcnow()
+    removed = {}
+
+    for granularity, days in RETENTION_DAYS.items():
+        if days is None:
+            continue
+
+        cutoff = bucket_start(now - timedelta(days=days), granularity)
+
+        result = db.execute(
+            delete(RiskTrendBucket).where(
+                RiskTrendBucket.granularity == granularity,
+                RiskTrendBucket.bucket_start < cutoff
+            )
+        )
+        removed[granularity] = result.rowcount or 0
+
+    db.commit()
+
+    return removed
+
+
+# ─────────────────────────────────────────────
+# Query
+# ─────────────────────────────────────────────
+def query_trend(
+    db: Session,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    group_by: Optional[str] = None,
+    table_name: Optional[str] = None,
+    rule_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+
+    columns = [RiskTrendBucket.bucket_start]
+
+    if group_by == "table":
+        columns.append(RiskTrendBucket.table_name)
+    elif group_by == "rule":
+        columns.append(RiskTrendBucket.rule_id)
+
+    query = (
+        db.query(
+            *columns,
+            func.sum(RiskTrendBucket.violation_count),
+            func.sum(RiskTrendBucket.risk_sum)
+        )
+        .filter(RiskTrendBucket.granularity == granularity)
+    )
+
+    if start is not None:
+        query = query.filter(RiskTrendBucket.bucket_start >= bucket_start(start, granularity))
+    if end is not None:
+        query = query.filter(RiskTrendBucket.bucket_start < end)
+    if table_name is not None:
+        query = query.filter(RiskTrendBucket.table_name == table_name)
+    if rule_id is not None:
+        query = query.filter(RiskTrendBucket.rule_id == rule_id)
+
+    rows = query.group_by(*columns).order_by(*columns).all()
+
+    points = []
+
+    for row in rows:
+        point = {"bucket": row[0]}
+
+        if group_by == "table":
+            point["table_name"] = row[1]
+        elif group_by == "rule":
+            point["rule_id"] = row[1] or None
+
+        point["violations"] = int(row[-2])
+        point["total_risk"] = int(row[-1])
+        points.append(point)
+
+    return points
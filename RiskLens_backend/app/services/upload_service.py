@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import UPLOAD_CHUNK_SIZE, UPLOAD_TMP_DIR
+
+
+@dataclass
+class SpooledUpload:
+    """An upload streamed to a local file, hashed on the way in."""
+
+    path: str
+    filename: str
+    suffix: str
+    size: int
+    sha256: str
+
+    def read_text(self) -> str:
+        with open(self.path, "rb") as f:
+            return f.read().decode("utf-8", errors="ignore")
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+async def spool_upload(
+    upload: UploadFile,
+    max_bytes: int,
+    allowed_suffixes: Optional[Iterable[str]] = None
+) -> SpooledUpload:
+    """
+    Stream an upload to disk in UPLOAD_CHUNK_SIZE chunks.
+
+    Never holds more than one chunk in memory, keeps the original file
+    extension, and aborts with 413 as soon as max_bytes is exceeded.
+    """
+
+    filename = upload.filename or "upload"
+    suffix = os.path.splitext(filename)[1].lower()
+
+    if allowed_suffixes is not None and suffix not in allowed_suffixes:
+        raise HTTPException(
+            400,
+            f"Unsupported file type '{suffix or filename}'. "
+            f"Supported: {', '.join(sorted(allowed_suffixes))}"
+        )
+
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(413, f"{filename} exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+    digest = hashlib.sha256()
+    size = 0
+
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=UPLOAD_TMP_DIR)
+
+    try:
+        with tmp:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        413, f"{filename} exceeds the {max_bytes // (1024 * 1024)} MB limit"
+                    )
+
+                digest.update(chunk)
+                # Disk writes off the event loop
+                await run_in_threadpool(tmp.write, chunk)
+
+    except BaseException:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
+        raise
+
+    return SpooledUpload(
+        path=tmp.name,
+        filename=filename,
+        suffix=suffix,
+        size=size,
+        sha256=digest.hexdigest()
+    )
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+# The app reads its database URL at import time: point it at a scratch
+# SQLite file before anything under app/ is imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+import pytest
+
+import app.models  # noqa: F401  (registers every table on Base)
+from app.core.database import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
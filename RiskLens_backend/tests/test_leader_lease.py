@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from app.models.scheduler_lease import SchedulerLease
+from app.services.leader_election import LeaderLease
+
+
+def _expire(db, name: str):
+    db.query(SchedulerLease).filter(SchedulerLease.name == name).update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def test_only_one_holder(db):
+    first, second = LeaderLease("job", ttl_seconds=60), LeaderLease("job", ttl_seconds=60)
+
+    assert first.backend == "lease_row"
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+    # Renewal by the holder succeeds and keeps acquired_at
+    acquired_at = db.get(SchedulerLease, "job").acquired_at
+    assert first.heartbeat()
+    db.expire_all()
+    lease = db.get(SchedulerLease, "job")
+    assert (lease.holder, lease.acquired_at) == (first.holder_id, acquired_at)
+
+    assert first.is_leader() and not second.is_leader()
+
+
+def test_expired_lease_is_taken_over(db):
+    first, second = LeaderLease("job", ttl_seconds=60), LeaderLease("job", ttl_seconds=60)
+
+    assert first.try_acquire()
+    _expire(db, "job")
+
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    assert not first.is_leader() and second.is_leader()
+
+    db.expire_all()
+    assert db.get(SchedulerLease, "job").holder == second.holder_id
+
+
+def test_release_hands_over_without_waiting(db):
+    first, second = LeaderLease("job", ttl_seconds=600), LeaderLease("job", ttl_seconds=600)
+
+    assert first.try_acquire()
+    first.release()
+
+    assert not first.is_leader()
+    assert second.try_acquire()
+
+
+def test_leases_are_per_name(db):
+    assert LeaderLease("scheduler", ttl_seconds=60).try_acquire()
+    assert LeaderLease("retention", ttl_seconds=60).try_acquire()
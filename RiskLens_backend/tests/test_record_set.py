@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from app.services.record_set import (
+    EMPTY_SET,
+    build_record_sets,
+    contains,
+    decode_ids,
+    diff,
+    diff_counts,
+    encode_ids,
+)
+
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+
+@pytest.mark.parametrize("ids", [
+    [],
+    [0],
+    [1, 2, 3, 4, 5],
+    [-5, -1, 0, 7],
+    [-(10 ** 12), 3, 10 ** 12],
+    [INT64_MIN],
+    [INT64_MAX],
+    [INT64_MIN, INT64_MAX],
+    [INT64_MIN, -1, 0, 1, INT64_MAX],
+    [INT64_MAX - 1, INT64_MAX],
+])
+def test_round_trip(ids):
+    assert decode_ids(encode_ids(ids)) == ids
+
+
+def test_round_trip_sorts_and_deduplicates():
+    assert decode_ids(encode_ids([5, -3, 5, 2, -3])) == [-3, 2, 5]
+
+
+def test_ndarray_input_matches_list_input():
+    ids = [9, -4, 100000, 7]
+    assert encode_ids(np.array(ids)) == encode_ids(ids)
+
+
+def test_empty_set():
+    assert decode_ids(EMPTY_SET) == []
+    assert not contains(EMPTY_SET, 0)
+
+
+def test_contains():
+    blob = encode_ids([-7, 3, INT64_MAX])
+
+    assert contains(blob, -7)
+    assert contains(blob, INT64_MAX)
+    assert not contains(blob, 4)
+    assert not contains(blob, INT64_MIN)
+
+
+def test_diff():
+    before = encode_ids([1, 2, 3, -4, INT64_MIN])
+    after = encode_ids([2, 3, 5, INT64_MAX])
+
+    added, resolved, persisting = diff(before, after)
+
+    assert added.tolist() == [5, INT64_MAX]
+    assert resolved.tolist() == [INT64_MIN, -4, 1]
+    assert persisting.tolist() == [2, 3]
+    assert diff_counts(before, after) == {"new": 2, "resolved": 3, "persisting": 2}
+
+
+def test_diff_against_empty():
+    blob = encode_ids([1, 2])
+
+    assert diff_counts(EMPTY_SET, blob) == {"new": 2, "resolved": 0, "persisting": 0}
+    assert diff_counts(blob, EMPTY_SET) == {"new": 0, "resolved": 2, "persisting": 0}
+
+
+def test_build_record_sets_groups_by_rule():
+    rows = [
+        {"scan_id": 1, "rule_id": rule_id, "table_name": "t", "record_id": record_id,
+         "field_name": "f", "expected_condition": "> 0", "risk_value": 3}
+        for rule_id, record_id in ((1, 10), (1, 12), (2, -1), (1, 10))
+    ]
+
+    sets = {row["rule_id"]: row for row in build_record_sets(rows)}
+
+    assert decode_ids(sets[1]["record_ids"]) == [10, 12]
+    assert (sets[1]["record_count"], sets[1]["min_record_id"], sets[1]["max_record_id"]) == (2, 10, 12)
+    assert decode_ids(sets[2]["record_ids"]) == [-1]
@@ -0,0 +1,77 @@
+import pytest
+
+from app.models.scan_history import ScanHistory
+from app.services.diff_service import diff_summary
+from app.services.rollup_service import finalize_scan
+from app.services.scan_engine import persist_violations
+
+
+BASE = {(1, "accounts"): [1, 2, 3, 4], (2, "accounts"): [10], (4, "loans"): [-5, 8]}
+CURRENT = {(1, "accounts"): [3, 4, 5], (3, "loans"): [7], (4, "loans"): [-5, 8]}
+
+EXPECTED = {
+    (1, "accounts"): {"new": 1, "resolved": 2, "persisting": 2},
+    (2, "accounts"): {"new": 0, "resolved": 1, "persisting": 0},
+    (3, "loans"): {"new": 1, "resolved": 0, "persisting": 0},
+    (4, "loans"): {"new": 0, "resolved": 0, "persisting": 2},
+}
+
+
+def _scan(db, records: dict, mode: str) -> int:
+    scan = ScanHistory(scan_mode="file", status="SUCCESS", total_rules=len(records))
+    db.add(scan)
+    db.flush()
+
+    persist_violations(db, [
+        {
+            "rule_id": rule_id,
+            "scan_id": scan.id,
+            "table_name": table,
+            "record_id": record_id,
+            "field_name": "amount",
+            "actual_value": "0",
+            "expected_condition": "> 0",
+            "explanation": "Rule condition violated",
+            "risk_value": 3,
+        }
+        for (rule_id, table), ids in records.items()
+        for record_id in ids
+    ], mode=mode)
+
+    finalize_scan(db, scan.id)
+    db.commit()
+
+    return scan.id
+
+
+@pytest.mark.parametrize("base_mode, current_mode", [
+    ("rows", "rows"),
+    ("compact", "compact"),
+    ("rows", "compact"),
+    ("compact", "rows"),
+])
+def test_diff_counts(db, base_mode, current_mode):
+    base_id = _scan(db, BASE, base_mode)
+    scan_id = _scan(db, CURRENT, current_mode)
+
+    summary = diff_summary(db, base_id, scan_id)
+
+    groups = {
+        (g["rule_id"], g["table_name"]): {kind: g[kind] for kind in ("new", "resolved", "persisting")}
+        for g in summary["groups"]
+    }
+
+    assert groups == EXPECTED
+    assert summary["totals"] == {"new": 2, "resolved": 3, "persisting": 4}
+    assert summary["cached"] is False
+
+
+def test_diff_is_cached(db):
+    base_id = _scan(db, BASE, "rows")
+    scan_id = _scan(db, CURRENT, "rows")
+
+    first = diff_summary(db, base_id, scan_id)
+    second = diff_summary(db, base_id, scan_id)
+
+    assert second["cached"] is True
+    assert second["totals"] == first["totals"]
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from app.api.violations import decode_cursor, encode_cursor, violation_page
+from app.models.violation import Violation
+
+
+def _add_violations(db, count: int):
+    start = datetime(2024, 1, 1)
+
+    db.execute(insert(Violation), [
+        {
+            "rule_id": 1 + i % 2,
+            "scan_id": 1 + i % 3,
+            "table_name": "accounts",
+            "record_id": i,
+            "field_name": "balance",
+            "risk_value": 1 + i % 8,
+            # Duplicate timestamps: ties must be broken by id
+            "created_at": start + timedelta(minutes=i // 2),
+        }
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def _walk(db, order: str, limit: int, **filters) -> list:
+    arguments = {
+        "scan_id": None, "rule_id": None, "table_name": None, "record_id": None,
+        "min_risk": None, "max_risk": None, **filters
+    }
+
+    ids, cursor = [], None
+
+    while True:
+        page = violation_page(db, order=order, limit=limit, cursor=cursor, **arguments)
+        assert len(page["items"]) <= limit
+        ids.extend(item["id"] for item in page["items"])
+
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("order, key", [
+    ("scan", lambda v: (v.scan_id, v.id)),
+    ("time", lambda v: (v.created_at, v.id)),
+])
+def test_pages_cover_every_row_once_in_order(db, order, key):
+    _add_violations(db, 23)
+
+    expected = [v.id for v in sorted(db.query(Violation).all(), key=key, reverse=True)]
+
+    assert _walk(db, order, limit=4) == expected
+
+
+def test_filters_apply_on_every_page(db):
+    _add_violations(db, 30)
+
+    expected = sorted(
+        (v for v in db.query(Violation).all() if v.rule_id == 2 and v.risk_value >= 4),
+        key=lambda v: (v.scan_id, v.id),
+        reverse=True
+    )
+
+    assert _walk(db, "scan", limit=3, rule_id=2, min_risk=4) == [v.id for v in expected]
+
+
+def test_cursor_round_trip():
+    when = datetime(2024, 5, 6, 7, 8, 9, 123456)
+
+    assert decode_cursor(encode_cursor("time", when, 42), "time") == (when, 42)
+    assert decode_cursor(encode_cursor("scan", 17, 3), "scan") == (17, 3)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor("scan", "x", 1)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "scan")
+
+    assert error.value.status_code == 400
+
+
+def test_cursor_from_another_order_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(encode_cursor("scan", 5, 1), "time")
+
+    assert error.value.status_code == 400
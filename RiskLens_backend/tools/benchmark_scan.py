@@ -0,0 +1,123 @@
+"""
+End-to-end scan throughput benchmark.
+
+Fires concurrent POST /scan requests (policy text + generated CSV dataset)
+at a running backend and reports throughput, latency percentiles and
+error counts. Intended to run against tools/mock_llm_server.py so the
+numbers reflect the pipeline, not the upstream LLM.
+
+    python -m tools.mock_llm_server --port 8100 --latency-ms 300 &
+    LLM_BASE_URL=http://127.0.0.1:8100 uvicorn app.main:app --port 8000 &
+    python -m tools.benchmark_scan --api-url http://127.0.0.1:8000 \\
+        --requests 50 --concurrency 8 --rows 5000
+"""
+
+import argparse
+import io
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+
+POLICY_TEXT = (
+    "Customer accounts must have a positive balance. "
+    "Transactions above the approved amount require review. "
+    "Customers must be at least 18 years old."
+)
+
+
+def build_dataset(rows: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    out = io.StringIO()
+    out.write("id,balance,amount,age,score\n")
+
+    for i in range(1, rows + 1):
+        out.write(
+            f"{i},{rng.randint(-50, 500)},{rng.randint(0, 200)},"
+            f"{rng.randint(12, 90)},{rng.randint(0, 100)}\n"
+        )
+
+    return out.getvalue().encode()
+
+
+def run_one(client: httpx.Client, dataset: bytes) -> tuple:
+    started = time.perf_counter()
+
+    try:
+        response = client.post(
+            "/scan",
+            files={
+                "policy_file": ("policy.txt", POLICY_TEXT.encode(), "text/plain"),
+                "data_file": ("dataset.csv", dataset, "text/csv"),
+            },
+        )
+        ok = response.status_code == 200
+        detail = response.status_code
+    except httpx.HTTPError as e:
+        ok = False
+        detail = type(e).__name__
+
+    return ok, time.perf_counter() - started, detail
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark POST /scan under concurrent load")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    dataset = build_dataset(args.rows, args.seed)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    client = httpx.Client(base_url=args.api_url, timeout=args.timeout, limits=limits)
+
+    print(
+        f"Running {args.requests} scans, concurrency={args.concurrency}, "
+        f"rows={args.rows} ({len(dataset) / 1024:.1f} KiB)"
+    )
+
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: run_one(client, dataset), range(args.requests)))
+
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    latencies = [latency for ok, latency, _ in results if ok]
+    failures = {}
+    for ok, _, detail in results:
+        if not ok:
+            failures[detail] = failures.get(detail, 0) + 1
+
+    print(f"Elapsed:      {elapsed:.2f}s")
+    print(f"Succeeded:    {len(latencies)}/{args.requests}")
+    print(f"Throughput:   {len(latencies) / elapsed:.2f} scans/s")
+
+    if latencies:
+        print(f"Latency mean: {statistics.mean(latencies) * 1000:.0f} ms")
+        print(f"Latency p50:  {percentile(latencies, 50) * 1000:.0f} ms")
+        print(f"Latency p95:  {percentile(latencies, 95) * 1000:.0f} ms")
+        print(f"Latency max:  {max(latencies) * 1000:.0f} ms")
+
+    if failures:
+        print(f"Failures:     {failures}")
+
+
+if __name__ == "__main__":
+    main()
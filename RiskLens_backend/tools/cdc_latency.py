@@ -0,0 +1,98 @@
+"""
+Change-capture detection latency check.
+
+Writes rows to a target table that has change capture installed
+(POST /targets/{id}/capture) and measures how long each write takes to
+show up as consumed in GET /targets/{id}/capture. Works against a local
+SQLite file or a PostgreSQL stand-in.
+
+    LLM_BASE_URL=http://127.0.0.1:8100 uvicorn app.main:app --port 8000 &
+    python -m tools.cdc_latency --api-url http://127.0.0.1:8000 --target-id 1 \\
+        --db-url sqlite:////tmp/target.db --table temp_table --writes 50
+"""
+
+import argparse
+import statistics
+import time
+
+import httpx
+from sqlalchemy import create_engine, inspect, text
+
+
+def wait_for(client: httpx.Client, target_id: int, processed: int, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+
+    while time.perf_counter() < deadline:
+        status = client.get(f"/targets/{target_id}/capture").json()
+
+        if (status.get("changes_processed") or 0) >= processed:
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--target-id", type=int, required=True)
+    parser.add_argument("--db-url", required=True, help="SQLAlchemy URL of the target database")
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--interval-ms", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_url)
+    column = inspect(engine).get_columns(args.table)[0]["name"]
+    quote = engine.dialect.identifier_preparer.quote
+
+    with engine.connect() as conn:
+        record_ids = [
+            row[0] for row in
+            conn.execute(text(f"SELECT {quote(column)} FROM {quote(args.table)} LIMIT :n"), {"n": args.writes})
+        ]
+
+    if not record_ids:
+        raise SystemExit(f"{args.table} has no rows to touch")
+
+    # No-op update: fires the capture trigger without changing the data
+    touch = text(f"UPDATE {quote(args.table)} SET {quote(column)} = {quote(column)} WHERE {quote(column)} = :id")
+
+    observed = []
+    missed = 0
+
+    with httpx.Client(base_url=args.api_url, timeout=args.timeout) as client:
+        processed = client.get(f"/targets/{args.target_id}/capture").json().get("changes_processed") or 0
+
+        for i in range(args.writes):
+            with engine.begin() as conn:
+                conn.execute(touch, {"id": record_ids[i % len(record_ids)]})
+
+            committed = time.perf_counter()
+            processed += 1
+
+            if wait_for(client, args.target_id, processed, args.timeout):
+                observed.append((time.perf_counter() - committed) * 1000)
+            else:
+                missed += 1
+
+            time.sleep(args.interval_ms / 1000)
+
+        server = client.get(f"/targets/{args.target_id}/capture").json()
+
+    print(f"writes:            {args.writes}  (missed {missed})")
+
+    if observed:
+        observed.sort()
+        print(f"observed p50 ms:   {statistics.median(observed):.1f}")
+        print(f"observed p95 ms:   {observed[min(len(observed) - 1, int(0.95 * len(observed)))]:.1f}")
+        print(f"observed max ms:   {observed[-1]:.1f}")
+
+    # Server side: trigger timestamp -> violations persisted
+    print(f"server window:     {server.get('latency_window')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Read-path load test: sync vs async database sessions.
+
+Keeps --concurrency requests in flight against the read endpoints
+(dashboard, risk, risk trend, history, violations) for --duration
+seconds and reports throughput and latency percentiles per endpoint.
+Run it once per mode against the same data and compare:
+
+    uvicorn app.main:app --port 8000 --workers 1 &
+    python -m tools.load_test_reads --api-url http://127.0.0.1:8000 --label sync
+
+    ASYNC_DB_ENABLED=true uvicorn app.main:app --port 8000 --workers 1 &
+    python -m tools.load_test_reads --api-url http://127.0.0.1:8000 --label async
+
+Analytics responses are cached per data generation, so requests spread
+scan_id over --scan-ids values; use a short ANALYTICS_GENERATION_TTL_SECONDS
+or a fresh data generation between runs to measure the database, not
+the cache.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+
+ENDPOINTS = {
+    "dashboard": lambda scan_id: ("/dashboard", {"scan_id": scan_id}),
+    "risk": lambda scan_id: ("/risk", {"scan_id": scan_id}),
+    "risk_trend": lambda scan_id: ("/risk/trend", {"granularity": "hour"}),
+    "history": lambda scan_id: ("/history", {}),
+    "violations": lambda scan_id: ("/violations", {"scan_id": scan_id, "limit": 100}),
+}
+
+
+async def worker(client: httpx.AsyncClient, names, scan_ids: int, deadline: float, results):
+    while time.perf_counter() < deadline:
+        name = random.choice(names)
+        path, params = ENDPOINTS[name](random.randint(1, scan_ids))
+
+        started = time.perf_counter()
+
+        try:
+            response = await client.get(path, params=params)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+
+        results[name].append(((time.perf_counter() - started) * 1000, ok))
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def run(args):
+    names = args.endpoints.split(",") if args.endpoints else list(ENDPOINTS)
+    results = defaultdict(list)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.api_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+
+        await asyncio.gather(*(
+            worker(client, names, args.scan_ids, deadline, results)
+            for _ in range(args.concurrency)
+        ))
+
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in results.values())
+    errors = sum(1 for samples in results.values() for _, ok in samples if not ok)
+
+    print(f"[{args.label}] {total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s, "
+          f"{errors} errors, concurrency {args.concurrency}")
+    print(f"{'endpoint':<12} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    for name in names:
+        latencies = sorted(ms for ms, _ in results[name])
+
+        if not latencies:
+            continue
+
+        print(
+            f"{name:<12} {len(latencies):>7} {len(latencies) / elapsed:>8.1f} "
+            f"{statistics.median(latencies):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+            f"{percentile(latencies, 0.99):>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--scan-ids", type=int, default=20, help="scan_id values to spread requests over")
+    parser.add_argument("--endpoints", default=None, help=f"comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--timeout", type=float, default=30)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
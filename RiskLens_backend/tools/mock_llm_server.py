@@ -0,0 +1,249 @@
+"""
+Local stand-in for the Groq chat-completions API.
+
+Returns deterministic rule sets derived from the schema embedded in the
+rule-extraction prompt, and canned text for every other prompt.
+Latency, server errors and rate limiting can be injected so the scan
+pipeline can be benchmarked and load-tested offline.
+
+Run (from RiskLens_backend/):
+    python -m tools.mock_llm_server --port 8100 --latency-ms 300 --error-rate 0.05
+
+Then point the backend at it:
+    LLM_BASE_URL=http://127.0.0.1:8100
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+
+SCHEMA_MARKER = "Database Schema (ONLY use tables & columns from here):"
+SCHEMA_END_MARKER = "Allowed operators"
+REMEDIATION_BATCH_MARKER = "Violation templates (JSON):"
+
+RULE_OPERATORS = ["!=", ">=", "<=", ">", "<"]
+
+
+# ─────────────────────────────────────────────
+# Runtime Settings (env defaults, CLI overrides)
+# ─────────────────────────────────────────────
+settings = {
+    "latency_ms": float(os.getenv("MOCK_LLM_LATENCY_MS", 0)),
+    "jitter_ms": float(os.getenv("MOCK_LLM_JITTER_MS", 0)),
+    "error_rate": float(os.getenv("MOCK_LLM_ERROR_RATE", 0)),
+    "rate_limit_rate": float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", 0)),
+    "retry_after_seconds": float(os.getenv("MOCK_LLM_RETRY_AFTER_SECONDS", 1)),
+    "rules_per_table": int(os.getenv("MOCK_LLM_RULES_PER_TABLE", 2)),
+    "seed": int(os.getenv("MOCK_LLM_SEED", 42)),
+}
+
+_rng = random.Random(settings["seed"])
+_rng_lock = threading.Lock()
+
+stats = {
+    "requests": 0,
+    "rule_extractions": 0,
+    "remediation_batches": 0,
+    "completions": 0,
+    "injected_errors": 0,
+    "injected_rate_limits": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str):
+    with _stats_lock:
+        stats[key] += 1
+
+
+def _roll() -> float:
+    with _rng_lock:
+        return _rng.random()
+
+
+# ─────────────────────────────────────────────
+# Deterministic Responses
+# ─────────────────────────────────────────────
+def _extract_schema(prompt: str):
+    start = prompt.find(SCHEMA_MARKER)
+    if start == -1:
+        return None
+
+    start += len(SCHEMA_MARKER)
+    end = prompt.find(SCHEMA_END_MARKER, start)
+    if end == -1:
+        return None
+
+    try:
+        schema = json.loads(prompt[start:end].strip())
+    except json.JSONDecodeError:
+        return None
+
+    return schema if isinstance(schema, dict) else None
+
+
+def build_rules(schema: dict, rules_per_table: int) -> list:
+    """
+    Same schema in, same rules out.
+    The first column of every table is treated as the record id and skipped.
+    """
+
+    rules = []
+
+    for table in sorted(schema):
+        columns = list(schema[table])[1:] or list(schema[table])
+
+        for column in columns[:rules_per_table]:
+            digest = int(hashlib.sha256(f"{table}.{column}".encode()).hexdigest(), 16)
+
+            rules.append({
+                "table_name": table,
+                "field": column,
+                "operator": RULE_OPERATORS[digest % len(RULE_OPERATORS)],
+                "value": digest % 100,
+            })
+
+    return rules
+
+
+def build_remediation(rule: str) -> str:
+    return (
+        f"1. Review records violating '{rule}'.\n"
+        "2. Correct the non-compliant field value.\n"
+        "3. Re-run the compliance scan to confirm."
+    )
+
+
+def build_content(prompt: str) -> str:
+    schema = _extract_schema(prompt)
+
+    if schema is not None:
+        _count("rule_extractions")
+        return json.dumps(build_rules(schema, settings["rules_per_table"]))
+
+    marker = prompt.find(REMEDIATION_BATCH_MARKER)
+
+    if marker != -1:
+        try:
+            items = json.loads(prompt[marker + len(REMEDIATION_BATCH_MARKER):].strip())
+        except json.JSONDecodeError:
+            items = []
+
+        _count("remediation_batches")
+        return json.dumps({
+            str(item.get("id")): build_remediation(str(item.get("rule")))
+            for item in items
+        })
+
+    _count("completions")
+    return build_remediation("policy")
+
+
+# ─────────────────────────────────────────────
+# App
+# ─────────────────────────────────────────────
+app = FastAPI(title="RiskLens Mock LLM", docs_url=None, redoc_url=None)
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+
+    _count("requests")
+    body = await request.json()
+
+    delay = settings["latency_ms"]
+    if settings["jitter_ms"]:
+        with _rng_lock:
+            delay += _rng.uniform(0, settings["jitter_ms"])
+
+    if delay:
+        # Non-blocking sleep so injected latency doesn't serialize concurrent callers
+        await asyncio.sleep(delay / 1000)
+
+    if _roll() < settings["rate_limit_rate"]:
+        _count("injected_rate_limits")
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(settings["retry_after_seconds"])},
+            content={"error": {
+                "message": "Rate limit reached (mock)",
+                "type": "tokens",
+                "code": "rate_limit_exceeded",
+            }},
+        )
+
+    if _roll() < settings["error_rate"]:
+        _count("injected_errors")
+        return JSONResponse(
+            status_code=503,
+            content={"error": {
+                "message": "Service unavailable (mock)",
+                "type": "internal_server_error",
+            }},
+        )
+
+    prompt = "\n".join(
+        str(m.get("content", "")) for m in body.get("messages", [])
+    )
+    content = build_content(prompt)
+
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+
+    return {
+        "id": f"chatcmpl-mock-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@app.get("/stats")
+def get_stats():
+    return {"settings": settings, "stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Groq/OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=settings["jitter_ms"])
+    parser.add_argument("--error-rate", type=float, default=settings["error_rate"])
+    parser.add_argument("--rate-limit-rate", type=float, default=settings["rate_limit_rate"])
+    parser.add_argument("--retry-after-seconds", type=float, default=settings["retry_after_seconds"])
+    parser.add_argument("--rules-per-table", type=int, default=settings["rules_per_table"])
+    parser.add_argument("--seed", type=int, default=settings["seed"])
+    args = parser.parse_args()
+
+    for key in settings:
+        settings[key] = getattr(args, key)
+
+    _rng.seed(settings["seed"])
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()